@@ -0,0 +1,112 @@
+"""Measure cold-start latency: package import, first MCP tool call and first LLM token.
+
+Each stage runs in a fresh interpreter so nothing is warm from a previous stage.
+
+Usage:
+    python -m benchmarks.bench_cold_start [--runs 3] [--ticker AAPL] [--skip-llm]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+STAGES = ("import", "first_tool_call", "first_token")
+
+
+async def _first_tool_call(ticker):
+    from stock_research_assistant.sub_agents.stock_data_agent import stock_data_agent
+
+    toolset = stock_data_agent.tools[-1]
+    start = time.perf_counter()
+    tools = await toolset.get_tools()
+    tools_ready = time.perf_counter() - start
+
+    aggs = next(tool for tool in tools if tool.name == "get_aggs")
+    await aggs.run_async(
+        args={"ticker": ticker, "multiplier": 1, "timespan": "day", "from_": "2024-01-02", "to": "2024-01-05"},
+        tool_context=None,
+    )
+    first_call = time.perf_counter() - start
+    await toolset.close()
+    return {"tools_ready_s": tools_ready, "first_tool_call_s": first_call}
+
+
+async def _first_token(ticker):
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+    from stock_research_assistant.agent import root_agent
+
+    runner = InMemoryRunner(agent=root_agent, app_name="cold_start_bench")
+    session = await runner.session_service.create_session(app_name="cold_start_bench", user_id="bench")
+    message = types.Content(role="user", parts=[types.Part(text=f"What did {ticker} close at yesterday?")])
+
+    start = time.perf_counter()
+    async for event in runner.run_async(
+        user_id="bench",
+        session_id=session.id,
+        new_message=message,
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+    ):
+        if event.content and event.content.parts and any(part.text for part in event.content.parts):
+            return {"first_token_s": time.perf_counter() - start}
+    return {"first_token_s": None}
+
+
+def run_stage(stage, ticker):
+    """Run one stage in this (fresh) process and print its timings as JSON"""
+    start = time.perf_counter()
+    import stock_research_assistant  # noqa: F401
+    result = {"import_s": time.perf_counter() - start}
+
+    if stage == "first_tool_call":
+        result.update(asyncio.run(_first_tool_call(ticker)))
+    elif stage == "first_token":
+        result.update(asyncio.run(_first_token(ticker)))
+    print(json.dumps(result))
+
+
+def measure(stage, ticker, runs):
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_cold_start", "--stage", stage, "--ticker", ticker],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{stage} failed:\n{proc.stderr.strip()}", file=sys.stderr)
+            return None
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--ticker", default="AAPL")
+    parser.add_argument("--skip-llm", action="store_true", help="skip the time-to-first-token stage")
+    parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        run_stage(args.stage, args.ticker)
+        return
+
+    stages = [s for s in STAGES if not (args.skip_llm and s == "first_token")]
+    for stage in stages:
+        samples = measure(stage, args.ticker, args.runs)
+        if not samples:
+            continue
+        for metric in samples[0]:
+            values = [s[metric] for s in samples if s.get(metric) is not None]
+            if values:
+                print(f"{stage:16} {metric:18} median {statistics.median(values) * 1000:9.1f} ms  "
+                      f"min {min(values) * 1000:9.1f} ms  ({len(values)} runs)")
+
+
+if __name__ == "__main__":
+    main()
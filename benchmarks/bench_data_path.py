@@ -0,0 +1,244 @@
+"""Benchmark the Polygon data path offline against the fake MCP server.
+
+Measures StockDataService methods (cold and warm), call_mcp_tool throughput,
+batch fan-out scaling across concurrency levels, quote reads served from the
+streamed snapshot table (fed by the local replay server) and cold start. Every run is
+appended to benchmarks/results.jsonl and compared with the previous run that
+used the same settings.
+
+Usage:
+    python -m benchmarks.bench_data_path [--latency-ms 40] [--only service,mcp,fan_out,quote_stream,cold_start]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+FAKE_SERVER = Path(__file__).with_name("fake_polygon_server.py")
+REPLAY_SERVER = Path(__file__).with_name("replay_quote_server.py")
+RESULTS_FILE = Path(__file__).with_name("results.jsonl")
+SECTIONS = ("service", "mcp", "fan_out", "quote_stream", "cold_start")
+
+
+def use_fake_server(args):
+    """Point every Polygon code path at the fake server; must run before the first Polygon call"""
+    command = [sys.executable, str(FAKE_SERVER), "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms)]
+    if args.rate_limit:
+        command += ["--rate-limit", str(args.rate_limit)]
+    os.environ.setdefault("POLYGON_API_KEY", "fake")
+    os.environ["POLYGON_MCP_MODE"] = "local"
+    os.environ["POLYGON_MCP_COMMAND"] = shlex.join(command)
+    os.environ["POLYGON_BAR_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_bars_")
+    os.environ["POLYGON_REQUESTS_PER_MINUTE"] = str(args.client_rate_limit)
+    os.environ["POLYGON_MCP_POOL_MAX_SIZE"] = str(max(args.concurrency))
+
+
+async def _timed(coro):
+    start = time.perf_counter()
+    result = await coro
+    elapsed = time.perf_counter() - start
+    if isinstance(result, dict) and "error" in result:
+        raise RuntimeError(result["error"])
+    return elapsed
+
+
+async def bench_service(args):
+    from stock_research_assistant.sub_agents.stock_data_agent.polygon_mcp_client import StockDataService
+
+    service = StockDataService(os.environ["POLYGON_API_KEY"])
+    await service.warm_up()
+    methods = {
+        "get_stock_quote": lambda s: service.get_stock_quote(s),
+        "get_historical_data": lambda s: service.get_historical_data(s, days=30),
+        "get_intraday_data": lambda s: service.get_intraday_data(s),
+        "get_comprehensive_analysis": lambda s: service.get_comprehensive_analysis(s),
+    }
+    metrics = {}
+    for i, (name, call) in enumerate(methods.items()):
+        symbol = f"SVC{i}"
+        metrics[f"service.{name}.cold_s"] = await _timed(call(symbol))
+        warm = [await _timed(call(symbol)) for _ in range(args.repeat)]
+        metrics[f"service.{name}.warm_s"] = statistics.median(warm)
+    await service.pool.close()
+    return metrics
+
+
+async def bench_mcp(args):
+    from stock_research_assistant.sub_agents.stock_data_agent.mcp_tool import PolygonMCPClient
+
+    client = PolygonMCPClient(os.environ["POLYGON_API_KEY"])
+    await client.connect()
+    snapshot = lambda ticker: client.call_mcp_tool("get_snapshot_ticker", {"market_type": "stocks", "ticker": ticker})
+    metrics = {}
+
+    # Distinct tickers so every call misses the response cache
+    start = time.perf_counter()
+    for i in range(args.calls):
+        await snapshot(f"SEQ{i}")
+    metrics["mcp.sequential_calls_per_s"] = args.calls / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(snapshot(f"CON{i}") for i in range(args.calls)))
+    metrics["mcp.concurrent_calls_per_s"] = args.calls / (time.perf_counter() - start)
+
+    await snapshot("HOT")
+    start = time.perf_counter()
+    await asyncio.gather(*(snapshot("HOT") for _ in range(args.calls)))
+    metrics["mcp.cached_calls_per_s"] = args.calls / (time.perf_counter() - start)
+
+    await client.disconnect()
+    return metrics
+
+
+async def bench_fan_out(args):
+    from stock_research_assistant.sub_agents.stock_data_agent.polygon_mcp_client import StockDataService
+
+    metrics = {}
+    for level in args.concurrency:
+        service = StockDataService(os.environ["POLYGON_API_KEY"], max_concurrency=level)
+        await service.warm_up()
+        # Grow the pool to this level first so server start-up is not timed
+        await service.get_market_data_batch([f"W{level}X{i}" for i in range(level)], days=30)
+        # Fresh symbols per level so no level is served from an earlier one's bar cache
+        symbols = [f"F{level}X{i}" for i in range(args.symbols)]
+        start = time.perf_counter()
+        batch = await service.get_market_data_batch(symbols, days=30)
+        metrics[f"fan_out.c{level}_s"] = time.perf_counter() - start
+        if batch["errors"]:
+            print(f"fan-out at concurrency {level}: {len(batch['errors'])} errors, e.g. {next(iter(batch['errors'].values()))}")
+        await service.pool.close()
+    return metrics
+
+
+async def bench_quote_stream(args):
+    from stock_research_assistant.sub_agents.stock_data_agent.polygon_mcp_client import StockDataService
+    from stock_research_assistant.sub_agents.stock_data_agent.quote_stream import QuoteFeed
+
+    server = subprocess.Popen(
+        [sys.executable, str(REPLAY_SERVER), "--port", "0", "--rate", "20"],
+        stdout=subprocess.PIPE, text=True
+    )
+    try:
+        url = server.stdout.readline().strip().rsplit(" ", 1)[-1]
+        feed = QuoteFeed(os.environ["POLYGON_API_KEY"], url=url)
+        symbols = [f"Q{i}" for i in range(args.symbols)]
+        feed.subscribe(symbols)
+        feed.start()
+        deadline = time.time() + 10
+        while any(feed.table.seq(s) == 0 for s in symbols) and time.time() < deadline:
+            await asyncio.sleep(0.05)
+
+        metrics = {}
+        lookups = args.calls * 100
+        start = time.perf_counter()
+        for i in range(lookups):
+            feed.table.get(symbols[i % len(symbols)])
+        metrics["quote_stream.table_get_s"] = (time.perf_counter() - start) / lookups
+
+        service = StockDataService(os.environ["POLYGON_API_KEY"], quote_feed=feed)
+        metrics["quote_stream.get_stock_quote_s"] = statistics.median(
+            [await _timed(service.get_stock_quote(symbols[i % len(symbols)])) for i in range(args.calls)]
+        )
+        # The same call for a ticker the stream has not delivered yet goes over MCP
+        await service.warm_up()
+        metrics["quote_stream.mcp_fallback_s"] = await _timed(service.get_stock_quote("NOSTREAM"))
+        feed.stop()
+        await service.pool.close()
+        return metrics
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def bench_cold_start(args):
+    from benchmarks import bench_cold_start
+
+    samples = bench_cold_start.measure("first_tool_call", "AAPL", args.cold_runs)
+    if not samples:
+        return {}
+    return {
+        f"cold_start.{metric}": statistics.median(s[metric] for s in samples)
+        for metric in samples[0]
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def previous_run(settings):
+    if not RESULTS_FILE.exists():
+        return None
+    previous = None
+    for line in RESULTS_FILE.read_text().splitlines():
+        record = json.loads(line)
+        if record.get("settings") == settings:
+            previous = record
+    return previous
+
+
+def report(metrics, previous):
+    for name, value in metrics.items():
+        unit = "calls/s" if name.endswith("_per_s") else "us" if value < 0.001 else "ms"
+        shown = value if unit == "calls/s" else value * 1_000_000 if unit == "us" else value * 1000
+        line = f"{name:48} {shown:10.1f} {unit}"
+        old = (previous or {}).get("metrics", {}).get(name)
+        if old:
+            change = (value - old) / old * 100
+            # Positive means better for throughput, worse for latency
+            better = change > 0 if unit == "calls/s" else change < 0
+            line += f"   {change:+6.1f}% vs {previous['commit'] or 'previous'}{'' if abs(change) < 5 else ' (better)' if better else ' (worse)'}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="fake server latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-limit", type=int, default=0, help="fake server requests per minute (0 = unlimited)")
+    parser.add_argument("--client-rate-limit", type=int, default=0, help="POLYGON_REQUESTS_PER_MINUTE for the client")
+    parser.add_argument("--repeat", type=int, default=5, help="warm calls per service method")
+    parser.add_argument("--calls", type=int, default=100, help="call_mcp_tool calls per throughput test")
+    parser.add_argument("--symbols", type=int, default=32, help="symbols per fan-out batch")
+    parser.add_argument("--concurrency", type=lambda s: [int(v) for v in s.split(",")], default=[1, 2, 4, 8, 16])
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--only", type=lambda s: s.split(","), default=list(SECTIONS))
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to results.jsonl")
+    args = parser.parse_args()
+
+    use_fake_server(args)
+    metrics = {}
+    if "service" in args.only:
+        metrics.update(asyncio.run(bench_service(args)))
+    if "mcp" in args.only:
+        metrics.update(asyncio.run(bench_mcp(args)))
+    if "fan_out" in args.only:
+        metrics.update(asyncio.run(bench_fan_out(args)))
+    if "quote_stream" in args.only:
+        metrics.update(asyncio.run(bench_quote_stream(args)))
+    if "cold_start" in args.only:
+        metrics.update(bench_cold_start(args))
+
+    settings = {
+        key: getattr(args, key)
+        for key in ("latency_ms", "jitter_ms", "rate_limit", "client_rate_limit", "repeat", "calls", "symbols", "concurrency", "only")
+    }
+    report(metrics, previous_run(settings))
+    if not args.no_save:
+        record = {"timestamp": time.time(), "commit": git_commit(), "settings": settings, "metrics": metrics}
+        with open(RESULTS_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Stand-in stdio MCP server for the Polygon tools, serving synthetic or recorded data.
+
+Exposes the same tool names and argument names as mcp_polygon (get_aggs,
+get_snapshot_ticker, list_ticker_news, get_grouped_daily_aggs) so the whole
+data path can run offline. Synthetic data is deterministic per ticker and
+timestamp, so repeated runs see identical responses.
+
+Point the assistant at it with:
+    POLYGON_MCP_COMMAND="python benchmarks/fake_polygon_server.py --latency-ms 50"
+
+Options:
+    --latency-ms N       mean added latency per call
+    --jitter-ms N        uniform +/- jitter around the mean
+    --rate-limit N       requests per minute before calls fail with a 429 (0 = unlimited)
+    --error-rate P       probability that any call fails
+    --hang-rate P        probability that a call stalls for --hang-ms (default: an hour)
+    --crash-rate P       probability that a call kills the server process
+    --fixtures DIR       serve DIR/<tool>/<TICKER or date>.json when it exists
+    --universe N         tickers in grouped daily results
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+import zlib
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from zoneinfo import ZoneInfo
+from mcp.server.fastmcp import FastMCP
+
+# Polygon stamps daily and longer bars at midnight New York time
+MARKET_TZ = ZoneInfo("America/New_York")
+
+TIMESPAN_MS = {
+    "second": 1_000,
+    "minute": 60_000,
+    "hour": 3_600_000,
+    "day": 86_400_000,
+    "week": 7 * 86_400_000,
+    "month": 30 * 86_400_000,
+}
+
+HEADLINE_TEMPLATES = [
+    "{t} beats earnings estimates as revenue surges",
+    "{t} shares tumble after guidance cut",
+    "Analysts upgrade {t} on strong demand",
+    "{t} faces investigation over accounting practices",
+    "{t} announces record buyback program",
+    "{t} misses revenue expectations, stock slides",
+    "{t} expands partnership with major cloud provider",
+    "{t} holds annual shareholder meeting",
+]
+
+config = argparse.Namespace(
+    latency_ms=0.0, jitter_ms=0.0, rate_limit=0, error_rate=0.0, hang_rate=0.0, hang_ms=3_600_000.0,
+    crash_rate=0.0, fixtures=None, universe=500,
+)
+_recent_calls: deque = deque()
+
+mcp = FastMCP("fake-polygon", log_level="WARNING")
+
+
+def _seed(*parts: Any) -> int:
+    return zlib.crc32("|".join(str(p) for p in parts).encode("utf-8"))
+
+
+def _price(ticker: str, t_ms: int) -> float:
+    """Smooth deterministic price path with a little per-bar noise"""
+    seed = _seed(ticker)
+    base = 20 + seed % 480
+    days = t_ms / 86_400_000
+    trend = 1 + 0.25 * math.sin(days / 40 + seed % 7) + 0.08 * math.sin(days / 6 + seed % 3)
+    noise = (_seed(ticker, t_ms) % 2001 - 1000) / 100_000
+    return round(base * trend * (1 + noise), 4)
+
+
+def _bar(ticker: str, t_ms: int, span_ms: int) -> Dict[str, Any]:
+    open_ = _price(ticker, t_ms)
+    close = _price(ticker, t_ms + span_ms)
+    spread = abs(close - open_) + open_ * 0.004
+    volume = float(1_000 + _seed(ticker, "v", t_ms) % 5_000_000)
+    return {
+        "o": open_,
+        "h": round(max(open_, close) + spread / 2, 4),
+        "l": round(min(open_, close) - spread / 2, 4),
+        "c": close,
+        "v": volume,
+        "vw": round((open_ + close) / 2, 4),
+        "n": int(volume // 100),
+        "t": t_ms,
+    }
+
+
+def _market_midnight(day: date) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=MARKET_TZ).timestamp() * 1000)
+
+
+def _session_starts(start_ms: int, end_ms: int, step_days: int) -> Iterator[int]:
+    """Market-midnight timestamps of weekdays in [start_ms, end_ms]"""
+    day = datetime.fromtimestamp(start_ms / 1000, MARKET_TZ).date()
+    if _market_midnight(day) < start_ms:
+        day += timedelta(days=1)
+    while _market_midnight(day) <= end_ms:
+        if day.weekday() < 5:
+            yield _market_midnight(day)
+        day += timedelta(days=step_days)
+
+
+def _to_ms(value: str, end_of_day: bool = False) -> int:
+    """Millisecond timestamps pass through; dates start (or end) at market midnight"""
+    if str(value).isdigit():
+        return int(value)
+    day = datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    if end_of_day:
+        return _market_midnight(day + timedelta(days=1)) - 1
+    return _market_midnight(day)
+
+
+def _is_trading_time(t_ms: int) -> bool:
+    """Inside the regular 9:30-16:00 New York session on a weekday"""
+    moment = datetime.fromtimestamp(t_ms / 1000, MARKET_TZ)
+    minutes = moment.hour * 60 + moment.minute
+    return moment.weekday() < 5 and 9 * 60 + 30 <= minutes < 16 * 60
+
+
+def _fixture(tool: str, key: str) -> Optional[str]:
+    if not config.fixtures:
+        return None
+    path = Path(config.fixtures) / tool / f"{key}.json"
+    return path.read_text() if path.exists() else None
+
+
+async def _simulate(tool: str) -> Optional[str]:
+    """Apply latency, rate limiting and random failures; returns an error text when the call fails"""
+    if config.crash_rate and random.random() < config.crash_rate:
+        os._exit(1)
+    if config.hang_rate and random.random() < config.hang_rate:
+        await asyncio.sleep(config.hang_ms / 1000)
+    delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+
+    if config.rate_limit:
+        now = time.monotonic()
+        while _recent_calls and now - _recent_calls[0] > 60:
+            _recent_calls.popleft()
+        if len(_recent_calls) >= config.rate_limit:
+            return "Error: 429 Too Many Requests: You've exceeded the maximum requests per minute"
+        _recent_calls.append(now)
+
+    if config.error_rate and random.random() < config.error_rate:
+        return f"Error: 500 Internal Server Error while calling {tool}"
+    return None
+
+
+@mcp.tool()
+async def get_aggs(
+    ticker: str,
+    multiplier: int,
+    timespan: str,
+    from_: str,
+    to: str,
+    adjusted: Optional[bool] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = 10,
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """List aggregate bars for a ticker over a given date range in custom time window sizes."""
+    error = await _simulate("get_aggs")
+    if error:
+        return error
+    ticker = ticker.upper()
+    recorded = _fixture("get_aggs", ticker)
+    if recorded:
+        return recorded
+
+    span_ms = TIMESPAN_MS.get(timespan, TIMESPAN_MS["day"]) * max(1, multiplier)
+    start, end = _to_ms(from_), _to_ms(to, end_of_day=True)
+    limit = limit or 5000
+
+    if span_ms >= TIMESPAN_MS["day"]:
+        timestamps = _session_starts(start, end, span_ms // TIMESPAN_MS["day"])
+    else:
+        first = start + (-start) % span_ms
+        timestamps = (t for t in range(first, end + 1, span_ms) if _is_trading_time(t))
+
+    bars: List[Dict[str, Any]] = []
+    t = None
+    for t in timestamps:
+        if len(bars) >= limit:
+            break
+        bars.append(_bar(ticker, t, span_ms))
+
+    response = {
+        "ticker": ticker,
+        "queryCount": len(bars),
+        "resultsCount": len(bars),
+        "adjusted": adjusted is not False,
+        "results": bars,
+        "status": "OK",
+        "request_id": f"fake-{_seed(ticker, from_, to):08x}",
+        "count": len(bars),
+    }
+    if bars and t is not None and t > bars[-1]["t"]:
+        response["next_url"] = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{t}/{end}"
+    return json.dumps(response)
+
+
+@mcp.tool()
+async def get_snapshot_ticker(market_type: str, ticker: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Get snapshot for a specific ticker."""
+    error = await _simulate("get_snapshot_ticker")
+    if error:
+        return error
+    ticker = ticker.upper()
+    recorded = _fixture("get_snapshot_ticker", ticker)
+    if recorded:
+        return recorded
+
+    now_ms = int(time.time() * 1000)
+    today = _market_midnight(datetime.now(MARKET_TZ).date())
+    day, prev = _bar(ticker, today, TIMESPAN_MS["day"]), _bar(ticker, today - TIMESPAN_MS["day"], TIMESPAN_MS["day"])
+    last = _price(ticker, now_ms)
+    return json.dumps({
+        "status": "OK",
+        "request_id": f"fake-{_seed(ticker, now_ms):08x}",
+        "ticker": {
+            "ticker": ticker,
+            "day": day,
+            "prevDay": prev,
+            "min": _bar(ticker, now_ms - now_ms % 60_000, 60_000),
+            "lastTrade": {"p": last, "s": 100, "t": now_ms * 1_000_000},
+            "lastQuote": {"p": round(last * 0.9995, 4), "P": round(last * 1.0005, 4), "t": now_ms * 1_000_000},
+            "todaysChange": round(last - prev["c"], 4),
+            "todaysChangePerc": round((last / prev["c"] - 1) * 100, 4),
+            "updated": now_ms * 1_000_000,
+        },
+    })
+
+
+@mcp.tool()
+async def list_ticker_news(
+    ticker: Optional[str] = None,
+    published_utc: Optional[str] = None,
+    limit: Optional[int] = 10,
+    sort: Optional[str] = None,
+    order: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Get recent news articles for a stock ticker."""
+    error = await _simulate("list_ticker_news")
+    if error:
+        return error
+    ticker = (ticker or "SPY").upper()
+    recorded = _fixture("list_ticker_news", ticker)
+    if recorded:
+        return recorded
+
+    # Like the real server, range filters only arrive as raw query parameters
+    since = (params or {}).get("published_utc.gte") or (date.today() - timedelta(days=7)).isoformat()
+    start = _to_ms(since)
+    now_ms = int(time.time() * 1000)
+    count = min(limit or 10, 100)
+    results = []
+    for i in range(count):
+        published = now_ms - (now_ms - start) * i // max(count, 1)
+        template = HEADLINE_TEMPLATES[_seed(ticker, i) % len(HEADLINE_TEMPLATES)]
+        article_id = f"{ticker}-{published // 3_600_000}-{i}"
+        results.append({
+            "id": article_id,
+            "publisher": {"name": "Fake Wire"},
+            "title": template.format(t=ticker),
+            "author": "Staff",
+            "published_utc": datetime.fromtimestamp(published / 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "article_url": f"https://example.com/news/{article_id}",
+            "tickers": [ticker],
+            "description": f"Synthetic article {i} about {ticker}.",
+        })
+    return json.dumps({"results": results, "status": "OK", "request_id": f"fake-{_seed(ticker, since):08x}", "count": len(results)})
+
+
+@mcp.tool()
+async def get_grouped_daily_aggs(
+    date: str,
+    adjusted: Optional[bool] = None,
+    include_otc: Optional[bool] = None,
+    locale: Optional[str] = None,
+    market_type: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Get grouped daily bars for an entire market for a specific date."""
+    error = await _simulate("get_grouped_daily_aggs")
+    if error:
+        return error
+    recorded = _fixture("get_grouped_daily_aggs", date)
+    if recorded:
+        return recorded
+
+    day = datetime.strptime(date[:10], "%Y-%m-%d").date()
+    t = _market_midnight(day)
+    if day.weekday() >= 5:
+        return json.dumps({"status": "OK", "queryCount": 0, "resultsCount": 0, "results": []})
+    results = []
+    for i in range(config.universe):
+        ticker = f"T{i:04d}"
+        results.append({"T": ticker, **_bar(ticker, t, TIMESPAN_MS["day"])})
+    return json.dumps({"status": "OK", "queryCount": len(results), "resultsCount": len(results), "adjusted": True, "results": results})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-ms", type=float, default=3_600_000.0)
+    parser.add_argument("--crash-rate", type=float, default=0.0)
+    parser.add_argument("--fixtures")
+    parser.add_argument("--universe", type=int, default=500)
+    parser.parse_args(namespace=config)
+    mcp.run("stdio")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Stand-in for Polygon's stocks websocket, replaying recorded or synthetic trades and quotes.
+
+Speaks the same protocol as wss://socket.polygon.io/stocks: a "connected"
+status on connect, {"action": "auth"} then {"action": "subscribe", "params":
+"T.AAPL,Q.AAPL"} (or "T.*"), and JSON arrays of T, Q and AM events. Recorded
+events are restamped to the current time so clients treat them as fresh.
+
+Point the assistant at it with:
+    POLYGON_QUOTE_STREAM=1 POLYGON_QUOTE_STREAM_URL=ws://localhost:8765
+
+Options:
+    --port N             port to listen on (0 picks a free port and prints it)
+    --replay FILE        JSONL of recorded events (one event or array per line), looped
+    --speed X            replay speed multiplier for recorded events
+    --rate N             synthetic events per ticker per second when not replaying
+    --universe N         tickers a "*" subscription streams synthetically
+    --api-key KEY        reject any other key (default: accept every key)
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Set
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+config = argparse.Namespace(port=8765, replay=None, speed=1.0, rate=10.0, universe=500, api_key=None)
+
+
+def _status(status: str, message: str) -> str:
+    return json.dumps([{"ev": "status", "status": status, "message": message}])
+
+
+def _wants(subscriptions: Set[str], channel: str, symbol: str) -> bool:
+    return f"{channel}.{symbol}" in subscriptions or f"{channel}.*" in subscriptions
+
+
+def _symbols(subscriptions: Set[str]) -> List[str]:
+    symbols = {sub.split(".", 1)[1] for sub in subscriptions}
+    if "*" in symbols:
+        symbols.discard("*")
+        symbols.update(f"T{i:04d}" for i in range(config.universe))
+    return sorted(symbols)
+
+
+class SyntheticTicker:
+    """Random-walk trades and quotes around a deterministic per-ticker base price"""
+
+    def __init__(self, symbol: str):
+        seed = zlib.crc32(symbol.encode("utf-8"))
+        self.symbol = symbol
+        self.price = float(20 + seed % 480)
+        self.random = random.Random(seed)
+        self.volume = 0.0
+        self.notional = 0.0
+        self.open = self.price
+        self.seq = 0
+
+    def events(self, t_ms: int) -> List[Dict[str, Any]]:
+        self.price = round(max(0.01, self.price * math.exp(self.random.gauss(0, 0.0005))), 4)
+        size = float(self.random.choice((1, 10, 50, 100, 100, 200, 500)))
+        spread = round(max(0.01, self.price * 0.0002), 4)
+        self.volume += size
+        self.notional += self.price * size
+        self.seq += 1
+        return [
+            {"ev": "T", "sym": self.symbol, "x": 4, "p": self.price, "s": size, "c": [0], "t": t_ms, "q": self.seq},
+            {
+                "ev": "Q", "sym": self.symbol, "bx": 4, "ax": 7, "bp": round(self.price - spread / 2, 4),
+                "ap": round(self.price + spread / 2, 4), "bs": 2, "as": 3, "t": t_ms, "q": self.seq,
+            },
+        ]
+
+    def minute(self, t_ms: int) -> Dict[str, Any]:
+        return {
+            "ev": "AM", "sym": self.symbol, "v": 0, "av": self.volume, "op": self.open,
+            "vw": self.price, "o": self.price, "c": self.price, "h": self.price, "l": self.price,
+            "a": round(self.notional / self.volume, 4) if self.volume else self.price,
+            "s": t_ms - 60_000, "e": t_ms,
+        }
+
+
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    events = []
+    for line in Path(path).read_text().splitlines():
+        if line.strip():
+            parsed = json.loads(line)
+            events.extend(parsed if isinstance(parsed, list) else [parsed])
+    return sorted((e for e in events if e.get("ev") in ("T", "Q", "A", "AM")), key=lambda e: e.get("t") or e.get("e") or 0)
+
+
+async def stream_synthetic(ws: ServerConnection, subscriptions: Set[str]):
+    tickers: Dict[str, SyntheticTicker] = {}
+    interval = 1.0 / config.rate
+    last_minute = time.time()
+    while True:
+        now_ms = int(time.time() * 1000)
+        batch = []
+        for symbol in _symbols(subscriptions):
+            ticker = tickers.get(symbol) or tickers.setdefault(symbol, SyntheticTicker(symbol))
+            batch.extend(e for e in ticker.events(now_ms) if _wants(subscriptions, e["ev"], symbol))
+            if time.time() - last_minute >= 60 and _wants(subscriptions, "AM", symbol):
+                batch.append(ticker.minute(now_ms))
+        if time.time() - last_minute >= 60:
+            last_minute = time.time()
+        if batch:
+            await ws.send(json.dumps(batch))
+        await asyncio.sleep(interval)
+
+
+async def stream_recording(ws: ServerConnection, subscriptions: Set[str], events: List[Dict[str, Any]]):
+    while True:
+        first = events[0].get("t") or events[0].get("e")
+        started = time.time()
+        for event in events:
+            stamp = event.get("t") or event.get("e")
+            due = started + (stamp - first) / 1000 / config.speed
+            delay = due - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not _wants(subscriptions, event["ev"], event.get("sym", "")):
+                continue
+            shift = int(time.time() * 1000) - stamp
+            replayed = dict(event)
+            for key in ("t", "s", "e"):
+                if key in replayed and (key != "s" or replayed["ev"] in ("A", "AM")):
+                    replayed[key] += shift
+            await ws.send(json.dumps([replayed]))
+
+
+async def handle(ws: ServerConnection, recording: List[Dict[str, Any]]):
+    subscriptions: Set[str] = set()
+    streamer = None
+    await ws.send(_status("connected", "Connected Successfully"))
+    try:
+        async for raw in ws:
+            message = json.loads(raw)
+            action, params = message.get("action"), message.get("params") or ""
+            if action == "auth":
+                if config.api_key and params != config.api_key:
+                    await ws.send(_status("auth_failed", "authentication failed"))
+                    return
+                await ws.send(_status("auth_success", "authenticated"))
+                streamer = streamer or asyncio.create_task(
+                    stream_recording(ws, subscriptions, recording) if recording else stream_synthetic(ws, subscriptions)
+                )
+            elif action in ("subscribe", "unsubscribe"):
+                channels = {p.strip() for p in params.split(",") if p.strip()}
+                if action == "subscribe":
+                    subscriptions.update(channels)
+                else:
+                    subscriptions.difference_update(channels)
+                for channel in sorted(channels):
+                    await ws.send(_status("success", f"{action}d to: {channel}"))
+    except ConnectionClosed:
+        pass
+    finally:
+        if streamer is not None:
+            streamer.cancel()
+
+
+async def serve_forever():
+    recording = load_recording(config.replay) if config.replay else []
+    async with serve(lambda ws: handle(ws, recording), "127.0.0.1", config.port, max_size=None) as server:
+        port = server.sockets[0].getsockname()[1]
+        print(f"replay quote server listening on ws://127.0.0.1:{port}", flush=True)
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--replay")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--rate", type=float, default=10.0)
+    parser.add_argument("--universe", type=int, default=500)
+    parser.add_argument("--api-key")
+    parser.parse_args(namespace=config)
+    try:
+        asyncio.run(serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 from google.adk.agents import LlmAgent
+from google.adk.apps import App
 from google.adk.tools import AgentTool
 from google.genai import types
 from .sub_agents.stock_data_agent import stock_data_agent
 from .sub_agents.sentiment_agent import sentiment_agent
 from .sub_agents.report_generator_agent import report_generator
+from .pipeline import research_pipeline
+from .telemetry import TelemetryPlugin
+from .state_store import StateOffloadPlugin
+from .fast_path import fast_path_callback
 
 root_agent = LlmAgent(
     name="stock_research_assistant",
@@ -14,6 +19,9 @@ root_agent = LlmAgent(
         AgentTool(agent=sentiment_agent),
         AgentTool(agent=report_generator) #, skip_summarization=False)
     ],
+    sub_agents=[research_pipeline],
+    # Simple quote, OHLC and percent-change lookups are answered without calling the model
+    before_agent_callback=fast_path_callback,
     instruction="""
     You are an expert AI Stock Research Assistant. Your primary goal is to help users
     conduct thorough, data-backed research on publicly traded companies.
@@ -25,8 +33,12 @@ root_agent = LlmAgent(
     - Generating structured investor reports that summarize all available information.
 
     When asked for stock data use the stock data agent.
+    When asked to screen for stocks, pass the user's criteria to the stock data agent, which has a market-wide screener.
     When asked for sentiment analysis use the sentiment analysis agent.
-    When asked to generate a report use the information from the stock data and sentiment agents to generate a report using the report generator agent.
+    When asked to generate a report for a ticker, transfer to the `research_report_pipeline` agent. It gathers
+    the stock data and sentiment in parallel and writes the report itself, so do not call the other agents first.
+    Only use the report generator agent directly when the user asks to rewrite or adjust a report from information
+    already gathered in this conversation.
     Do not fabricate information.
 
     **Do not provide financial advice, and do not execute trades.**
@@ -38,4 +50,7 @@ root_agent = LlmAgent(
     # generate_content_config=types.GenerateContentConfig(
     #     temperature=0.3,
     # )
-)
\ No newline at end of file
+)
+
+# adk web and adk run pick up `app` ahead of `root_agent`, so the plugins apply there too
+app = App(name="stock_research_assistant", root_agent=root_agent, plugins=[StateOffloadPlugin(), TelemetryPlugin()])
@@ -0,0 +1,284 @@
+"""Headless batch runner: generate investor reports for a whole watchlist.
+
+Tickers flow through a bounded work queue to a fixed set of workers, each
+running `research_pipeline` in its own session. LLM calls and Polygon
+requests in flight are limited separately across all workers, progress is
+checkpointed after every ticker so an interrupted run resumes where it
+stopped, and each report is written to its own file.
+
+Usage:
+    python -m stock_research_assistant.batch AAPL MSFT NVDA --out reports
+    python -m stock_research_assistant.batch --file watchlist.txt --workers 16 --llm-concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from contextlib import aclosing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins import BasePlugin
+from google.adk.runners import InMemoryRunner
+from google.adk.tools import BaseTool
+from google.adk.tools.mcp_tool.mcp_tool import McpTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+from .pipeline import research_pipeline
+from .state_store import StateOffloadPlugin, get_blob_store, resolve_state_value
+from .sub_agents.stock_data_agent.rate_limiter import ConcurrencyLimit, set_concurrency_limit
+from .telemetry import TelemetryPlugin
+
+APP_NAME = "stock_research_batch"
+USER_ID = "batch"
+
+
+class ConcurrencyLimitPlugin(BasePlugin):
+    """Caps in-flight LLM calls and Polygon requests across every session of a runner
+
+    A permit is taken in the before_* callback and returned in the matching
+    after_* or on_*_error callback. Permits are tracked per session, so a run
+    that ends early, or is cancelled mid-call, hands back whatever it still
+    holds through release_session().
+
+    Only MCP tool calls take a Polygon permit here, since each is exactly one
+    Polygon request. Function tools that fan out (indicators, screener,
+    news) take one slot of the same limit per request inside
+    StockDataService. Agent tools are not limited because the agent they
+    wrap makes its own calls.
+    """
+
+    def __init__(self, llm_concurrency: int, polygon_limit: ConcurrencyLimit):
+        super().__init__(name="concurrency_limits")
+        self.llm_semaphore = asyncio.Semaphore(llm_concurrency)
+        self.polygon_limit = polygon_limit
+        # session id -> permit key -> release function
+        self._held: Dict[str, Dict[Tuple[str, ...], Callable[[], None]]] = {}
+
+    def _hold(self, session_id: str, key: Tuple[str, ...], release: Callable[[], None]):
+        self._held.setdefault(session_id, {})[key] = release
+
+    def _release(self, session_id: str, key: Tuple[str, ...]):
+        held = self._held.get(session_id, {})
+        release = held.pop(key, None)
+        if release is not None:
+            release()
+        if not held:
+            self._held.pop(session_id, None)
+
+    def release_session(self, session_id: str):
+        """Return every permit the session still holds"""
+        for release in self._held.pop(session_id, {}).values():
+            release()
+
+    @staticmethod
+    def _model_call_key(callback_context: CallbackContext) -> Tuple[str, ...]:
+        return ("llm", callback_context.invocation_id, callback_context.agent_name)
+
+    @staticmethod
+    def _tool_call_key(tool_context: ToolContext) -> Tuple[str, ...]:
+        return ("tool", tool_context.function_call_id)
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        await self.llm_semaphore.acquire()
+        self._hold(callback_context.session.id, self._model_call_key(callback_context), self.llm_semaphore.release)
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        self._release(callback_context.session.id, self._model_call_key(callback_context))
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> Optional[LlmResponse]:
+        self._release(callback_context.session.id, self._model_call_key(callback_context))
+        return None
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext
+    ) -> Optional[Dict[str, Any]]:
+        if isinstance(tool, McpTool):
+            await self.polygon_limit.acquire()
+            self._hold(tool_context.session.id, self._tool_call_key(tool_context), self.polygon_limit.release)
+        return None
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, result: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        self._release(tool_context.session.id, self._tool_call_key(tool_context))
+        return None
+
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, error: Exception
+    ) -> Optional[Dict[str, Any]]:
+        self._release(tool_context.session.id, self._tool_call_key(tool_context))
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self.release_session(invocation_context.session.id)
+
+
+class Checkpoint:
+    """Per-ticker progress stored as JSON, rewritten atomically after every update"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tickers: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.tickers = json.load(f).get("tickers", {})
+
+    def is_done(self, ticker: str) -> bool:
+        return self.tickers.get(ticker, {}).get("status") == "done"
+
+    def update(self, ticker: str, **fields):
+        entry = self.tickers.setdefault(ticker, {"attempts": 0})
+        entry.update(fields, updated_at=time.time())
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"tickers": self.tickers}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class BatchReportRunner:
+    """Runs research_pipeline for many tickers with bounded concurrency and resumable progress"""
+
+    def __init__(
+        self,
+        out_dir: str,
+        workers: int = 8,
+        llm_concurrency: int = 4,
+        polygon_concurrency: int = 8,
+        retries: int = 1,
+        ticker_timeout: float = 600.0
+    ):
+        self.out_dir = out_dir
+        self.workers = workers
+        self.retries = retries
+        self.ticker_timeout = ticker_timeout
+        os.makedirs(out_dir, exist_ok=True)
+        self.checkpoint = Checkpoint(os.path.join(out_dir, "checkpoint.json"))
+        # Shared with StockDataService, so function tools count against the same cap
+        self.limits = ConcurrencyLimitPlugin(llm_concurrency, set_concurrency_limit(polygon_concurrency))
+        self.runner = InMemoryRunner(agent=research_pipeline, app_name=APP_NAME, plugins=[self.limits, StateOffloadPlugin(), TelemetryPlugin()])
+
+    async def generate(self, ticker: str) -> Dict[str, Any]:
+        """Run the pipeline for one ticker in a fresh session and return its final, resolved state"""
+        session = await self.runner.session_service.create_session(app_name=APP_NAME, user_id=USER_ID)
+        session_id = session.id
+        message = types.Content(role="user", parts=[types.Part(text=f"Generate an investor report for {ticker}.")])
+        try:
+            async with aclosing(self.runner.run_async(user_id=USER_ID, session_id=session_id, new_message=message)) as events:
+                async for _ in events:
+                    pass
+            session = await self.runner.session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+            return {key: resolve_state_value(value) for key, value in session.state.items()}
+        finally:
+            # Also runs when the ticker times out mid-call, so no permit or session outlives it
+            self.limits.release_session(session_id)
+            await self.runner.session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+            if get_blob_store() is not None:
+                get_blob_store().drop_session(session_id)
+
+    def write_report(self, ticker: str, state: Dict[str, Any]) -> str:
+        report = state.get("investor_report")
+        if not report:
+            raise RuntimeError("Pipeline finished without an investor report")
+        path = os.path.join(self.out_dir, f"{ticker}.md")
+        with open(path, "w") as f:
+            f.write(report)
+        if state.get("investor_report_data"):
+            with open(os.path.join(self.out_dir, f"{ticker}.json"), "w") as f:
+                json.dump(state["investor_report_data"], f, indent=2)
+        return path
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            ticker = await queue.get()
+            try:
+                if ticker is None:
+                    return
+                await self._process(ticker)
+            finally:
+                queue.task_done()
+
+    async def _process(self, ticker: str):
+        for attempt in range(self.retries + 1):
+            attempts = self.checkpoint.tickers.get(ticker, {}).get("attempts", 0) + 1
+            self.checkpoint.update(ticker, status="running", attempts=attempts)
+            start = time.perf_counter()
+            try:
+                state = await asyncio.wait_for(self.generate(ticker), timeout=self.ticker_timeout)
+                path = self.write_report(ticker, state)
+            except Exception as e:
+                self.checkpoint.update(ticker, status="failed", error=f"{type(e).__name__}: {e}")
+                print(f"{ticker}: attempt {attempt + 1} failed: {e}")
+                continue
+            self.checkpoint.update(ticker, status="done", output=path, seconds=round(time.perf_counter() - start, 1), error=None)
+            print(f"{ticker}: done in {time.perf_counter() - start:.1f}s")
+            return
+
+    async def run(self, tickers: List[str]) -> Dict[str, Any]:
+        """Process every ticker not already done; returns a summary of the run"""
+        pending = [t for t in dict.fromkeys(t.strip().upper() for t in tickers if t.strip()) if not self.checkpoint.is_done(t)]
+        print(f"{len(pending)} tickers to process ({len(tickers) - len(pending)} already done)")
+
+        # A short queue keeps the producer just ahead of the workers
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.workers)]
+        for ticker in pending:
+            await queue.put(ticker)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+        statuses = [self.checkpoint.tickers.get(t, {}).get("status") for t in pending]
+        return {"processed": len(pending), "done": statuses.count("done"), "failed": statuses.count("failed")}
+
+
+def read_tickers(args) -> List[str]:
+    tickers = list(args.tickers)
+    if args.file:
+        with open(args.file) as f:
+            tickers += [line.split("#")[0].strip() for line in f]
+    return [t for t in tickers if t]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="*", help="ticker symbols")
+    parser.add_argument("--file", help="file with one ticker per line")
+    parser.add_argument("--out", default="reports", help="directory for reports and the checkpoint")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BATCH_WORKERS", "8")), help="tickers in flight")
+    parser.add_argument("--llm-concurrency", type=int, default=int(os.getenv("BATCH_LLM_CONCURRENCY", "4")))
+    parser.add_argument(
+        "--polygon-concurrency", type=int, default=int(os.getenv("BATCH_POLYGON_CONCURRENCY", "8")),
+        help="Polygon requests in flight (0 = unlimited)"
+    )
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds per ticker attempt")
+    args = parser.parse_args()
+
+    tickers = read_tickers(args)
+    if not tickers:
+        parser.error("no tickers given")
+
+    runner = BatchReportRunner(
+        args.out,
+        workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        polygon_concurrency=args.polygon_concurrency,
+        retries=args.retries,
+        ticker_timeout=args.timeout,
+    )
+    print(json.dumps(asyncio.run(runner.run(tickers))))
+
+
+if __name__ == "__main__":
+    main()
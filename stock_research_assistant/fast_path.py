@@ -0,0 +1,169 @@
+"""Deterministic fast path for simple quote lookups.
+
+Messages like "what's AAPL trading at?" or "$MSFT open high low close" name
+explicit tickers and ask only for the latest price, OHLC or percent change.
+`fast_path_callback` runs before the root agent and recognizes these when
+every word other than the tickers comes from a small quote vocabulary, then
+answers them from StockDataService with a templated reply. Daily bars come
+from the on-disk bar store, so a repeat lookup only refetches the
+still-forming bar for today. Anything else, and any lookup that fails, goes
+to the full agent.
+
+    FAST_PATH=0    send every message to the full agent
+"""
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+from .sub_agents.stock_data_agent.bar_store import MARKET_TZ
+from .sub_agents.stock_data_agent.polygon_mcp_client import StockDataService, get_stock_data_service
+from .telemetry import get_telemetry
+
+# Longer messages are rarely plain lookups
+MAX_WORDS = 16
+MAX_TICKERS = 10
+
+# Calendar days of daily bars fetched; enough for a previous close across long weekends
+LOOKBACK_DAYS = 10
+
+# Words, keeping $AAPL, BRK.B, P/E and what's in one piece
+WORD_PATTERN = re.compile(r"\$?[A-Za-z0-9]+(?:[.'/&-][A-Za-z0-9]+)*")
+
+# $AAPL in any case; bare symbols must be upper case and at least two letters
+DOLLAR_SYMBOL_PATTERN = re.compile(r"[A-Za-z]{1,5}(?:\.[A-Za-z])?")
+BARE_SYMBOL_PATTERN = re.compile(r"[A-Z]{2,5}(?:\.[A-Z])?")
+
+# Upper-case words that look like symbols but ask about something a quote does not answer
+NOT_TICKERS = frozenset({
+    "AI", "API", "ATH", "CEO", "CFO", "COO", "CPI", "CTO", "EPS", "ESG", "EU", "EV", "FED", "FOMC", "GDP",
+    "IPO", "PE", "ROE", "ROI", "SEC", "UK", "USA", "YTD",
+})
+
+# Requested fields, checked on the lower-cased message
+FIELD_PATTERNS = {
+    "price": re.compile(r"\b(price|prices|quote|quotes|trading|trade|trades|traded|worth|cost|costs)\b|how much"),
+    "ohlc": re.compile(r"\b(ohlc|ohlcv|open|opened|high|low|close|closed|closing|range|volume)\b"),
+    "change": re.compile(r"%|\b(percent|pct|change|changed|up|down|move|moved|moving|gain|gained|lose|lost)\b"),
+}
+
+# Every word of a lookup other than its tickers must be one of these. Anything
+# else (market cap, CEO, Q3, news, last week, ...) needs the full agent.
+QUOTE_WORDS = frozenset({
+    # fields
+    "price", "prices", "quote", "quotes", "trading", "trade", "trades", "traded", "worth", "cost", "costs",
+    "ohlc", "ohlcv", "open", "opened", "high", "low", "close", "closed", "closing", "range", "volume",
+    "percent", "pct", "change", "changed", "up", "down", "move", "moved", "moving", "gain", "gained", "lose",
+    "lost", "day", "day's", "daily", "session",
+    # time and venue
+    "now", "right", "current", "currently", "latest", "today", "today's", "todays", "moment", "so", "far",
+    "am", "pm", "et", "est", "us", "usd", "nyse", "nasdaq",
+    # phrasing
+    "a", "an", "and", "are", "as", "at", "by", "can", "check", "for", "from", "get", "give", "how", "i", "in",
+    "is", "it", "it's", "its", "me", "much", "my", "of", "on", "or", "please", "show", "stock", "stocks",
+    "share", "shares", "tell", "the", "their", "them", "ticker", "tickers", "to", "vs", "was", "were",
+    "what", "what's", "whats", "with", "etf", "etfs",
+})
+
+
+class QuoteRequest(NamedTuple):
+    """A simple lookup the fast path can answer"""
+    tickers: List[str]
+    fields: FrozenSet[str]
+
+
+def parse_quote_request(text: str) -> Optional[QuoteRequest]:
+    """The tickers and fields a message asks for, or None when it needs the full agent"""
+    text = text.strip().replace("\u2019", "'")
+    words = WORD_PATTERN.findall(text)
+    if not words or len(words) > MAX_WORDS:
+        return None
+
+    fields = frozenset(name for name, pattern in FIELD_PATTERNS.items() if pattern.search(text.lower()))
+    if not fields:
+        return None
+
+    # In an all-caps message every word looks like a ticker, so only $-prefixed ones count
+    shouting = text.upper() == text
+    tickers: List[str] = []
+    for word in words:
+        if word.startswith("$") and DOLLAR_SYMBOL_PATTERN.fullmatch(word[1:]):
+            symbol = word[1:].upper()
+        elif word.lower() in QUOTE_WORDS:
+            continue
+        elif not shouting and BARE_SYMBOL_PATTERN.fullmatch(word) and word not in NOT_TICKERS:
+            symbol = word
+        else:
+            return None
+        if symbol not in tickers:
+            tickers.append(symbol)
+    if not tickers or len(tickers) > MAX_TICKERS:
+        return None
+    return QuoteRequest(tickers, fields)
+
+
+def _money(value: float) -> str:
+    return f"${value:,.2f}"
+
+
+def _volume(value: float) -> str:
+    for divisor, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if value >= divisor:
+            return f"{value / divisor:.2f}{suffix}"
+    return f"{value:,.0f}"
+
+
+def format_quote(symbol: str, bars: List[Dict[str, Any]], fields: FrozenSet[str]) -> str:
+    """One markdown line describing the latest daily bar of a ticker"""
+    latest = bars[-1]
+    day = datetime.fromtimestamp(latest["t"] / 1000, MARKET_TZ).strftime("%Y-%m-%d")
+    line = f"**{symbol}**: {_money(latest['c'])}"
+    if "change" in fields and len(bars) > 1:
+        previous = bars[-2]["c"]
+        change = latest["c"] - previous
+        line += f", {change:+,.2f} ({change / previous * 100:+.2f}%) from the previous close of {_money(previous)}"
+    if "ohlc" in fields:
+        line += (
+            f"; open {_money(latest['o'])}, high {_money(latest['h'])}, low {_money(latest['l'])},"
+            f" close {_money(latest['c'])}, volume {_volume(latest['v'])}"
+        )
+    return f"{line} (daily bar of {day})"
+
+
+async def answer_quote_request(request: QuoteRequest, service: Optional[StockDataService] = None) -> Optional[str]:
+    """Templated answer for a lookup, or None when any ticker could not be fetched"""
+    service = service or get_stock_data_service()
+    batch = await service.get_market_data_batch(request.tickers, days=LOOKBACK_DAYS)
+    if batch["errors"]:
+        return None
+
+    lines = []
+    for symbol in request.tickers:
+        bars = batch["results"].get(symbol, {}).get("results") or []
+        if not bars:
+            return None
+        lines.append(format_quote(symbol, bars, request.fields))
+    return "\n".join(f"- {line}" for line in lines) if len(lines) > 1 else lines[0]
+
+
+async def fast_path_callback(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback answering simple quote lookups without running the agent"""
+    if os.getenv("FAST_PATH", "1") == "0":
+        return None
+    content = callback_context.user_content
+    text = " ".join(part.text for part in (content.parts if content else None) or [] if part.text)
+    request = parse_quote_request(text)
+    if request is None:
+        return None
+
+    with get_telemetry().span("fast_path", "quote", tickers=len(request.tickers)) as span:
+        try:
+            answer = await answer_quote_request(request)
+        except Exception as e:
+            answer = None
+            span.error = f"{type(e).__name__}: {e}"
+        span.set(answered=answer is not None)
+    if answer is None:
+        return None
+    return types.Content(role="model", parts=[types.Part(text=answer)])
@@ -0,0 +1,21 @@
+from google.adk.agents import ParallelAgent, SequentialAgent
+from .sub_agents.stock_data_agent import stock_data_agent
+from .sub_agents.sentiment_agent import sentiment_agent
+from .sub_agents.report_generator_agent import incremental_report_generator
+
+# Data gathering and sentiment are independent, so they run concurrently.
+# Each writes its result to session state through its output_key, which the
+# report generator reads directly instead of waiting on orchestrator turns.
+# The report is assembled from cached sections, so a refresh only rewrites
+# the sections whose inputs changed.
+research_gatherer = ParallelAgent(
+    name="research_gatherer",
+    description="Gathers stock market data and news sentiment for a ticker at the same time.",
+    sub_agents=[stock_data_agent, sentiment_agent],
+)
+
+research_pipeline = SequentialAgent(
+    name="research_report_pipeline",
+    description="Generates a complete investor report for a stock ticker: gathers market data and sentiment in parallel, then writes the report.",
+    sub_agents=[research_gatherer, incremental_report_generator],
+)
@@ -0,0 +1,67 @@
+"""Fingerprints of the tool results behind each research agent's answer.
+
+Report sections are cached by their inputs, but the research agents' prose
+differs from run to run even when the data behind it does not. Each agent's
+after_tool_callback records a hash of every tool result here, per session
+and invocation, and the report generator keys its sections on those hashes
+instead of the prose.
+
+Results of agents called as tools (AgentTool), such as the sentiment
+agent's web search, are recorded too. They are prose and rarely repeat
+exactly, but anything learned only through them has to reach the key.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def _digest(value: Any) -> str:
+    text = json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ToolResultLog:
+    """Bounded LRU of tool result hashes per (session, agent), for the agent's latest invocation"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, Dict[str, str]]]" = OrderedDict()
+
+    def record(self, session_id: str, agent_name: str, invocation_id: str, call: Any, result: Any):
+        """Hash one tool result; the agent's first result in a new invocation starts a fresh record"""
+        key = (session_id, agent_name)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != invocation_id:
+            entry = (invocation_id, {})
+            self._entries[key] = entry
+        entry[1][_digest(call)] = _digest(result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def fingerprint(self, session_id: str, agent_name: str, invocation_id: str) -> Optional[str]:
+        """Hash of everything the agent's tools returned in this invocation, or None when nothing was recorded"""
+        entry = self._entries.get((session_id, agent_name))
+        if entry is None or entry[0] != invocation_id or not entry[1]:
+            return None
+        return _digest(entry[1])
+
+
+# Global tool result log, in process like the report section cache it feeds
+_tool_result_log = None
+
+def get_tool_result_log() -> ToolResultLog:
+    """Get or create the tool result log"""
+    global _tool_result_log
+    if _tool_result_log is None:
+        _tool_result_log = ToolResultLog()
+    return _tool_result_log
+
+
+def record_tool_result(tool, args: Dict[str, Any], tool_context, tool_response: Any) -> None:
+    """after_tool_callback that logs a hash of the raw result; the response is left as it is"""
+    get_tool_result_log().record(
+        tool_context.session.id, tool_context.agent_name, tool_context.invocation_id, [tool.name, args], tool_response
+    )
+    return None
@@ -0,0 +1,282 @@
+"""Content-addressed blob store for large session-state values.
+
+Agent outputs written through `output_key` can be many kilobytes each, and a
+session covering many tickers keeps all of them in state. `StateOffloadPlugin`
+rewrites each event's state delta before the event is stored, moving large
+values into a local SQLite store and leaving a small reference with a summary,
+so neither the session's state nor its event history holds the full value.
+`resolve_state_value` turns a reference back into the full value for code
+that needs it.
+
+Each session's stored bytes are capped, and so is the whole store; values
+beyond a cap are evicted least recently used first and readers fall back to
+the summary. Values nobody has read within the TTL expire, so sessions that
+are never dropped explicitly (e.g. under adk web) do not grow the file
+without bound.
+
+    STATE_BLOB_STORE=0           keep every value inline in session state
+    STATE_BLOB_PATH=...          SQLite file (default ~/.cache/stock_research_assistant/state_blobs.sqlite3)
+    STATE_INLINE_LIMIT=4096      values up to this many bytes stay inline
+    STATE_SESSION_CAP=16777216   stored bytes per session before LRU eviction
+    STATE_STORE_CAP=268435456    stored bytes across all sessions before LRU eviction
+    STATE_BLOB_TTL=604800        seconds since a value was last used before it expires
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.events import Event
+from google.adk.plugins import BasePlugin
+
+# Marker key of a blob reference in session state
+REF_KEY = "$blob"
+
+# State keys holding agent outputs that may be moved out of state
+OFFLOADED_KEYS = (
+    "stock_data_agent_result",
+    "sentiment_agent_result",
+    "investor_report",
+    "investor_report_data",
+)
+
+SUMMARY_CHARS = 280
+
+# Expired values are swept at most this often, from put()
+EXPIRY_INTERVAL = 60.0
+
+# {key} or {key?} placeholders in instruction templates
+PLACEHOLDER_PATTERN = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\??\}")
+
+
+def summarize(value: Any, max_chars: int = SUMMARY_CHARS) -> str:
+    """Short preview of a value, kept in state next to its reference"""
+    if isinstance(value, dict) and value.get("report_title"):
+        text = f"{value.get('ticker', '')}: {value['report_title']}"
+    else:
+        text = value if isinstance(value, str) else json.dumps(value, default=str)
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[:max_chars - 3] + "..."
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and REF_KEY in value
+
+
+class BlobStore:
+    """SQLite store of compressed values keyed by content hash, with LRU caps and a TTL
+
+    Blobs are shared between sessions that store the same content; a blob is
+    deleted once no session references it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        session_cap: int = 16 * 1024 * 1024,
+        store_cap: int = 256 * 1024 * 1024,
+        ttl: float = 7 * 24 * 3600.0
+    ):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.session_cap = session_cap
+        self.store_cap = store_cap
+        self.ttl = ttl
+        self._next_expiry = 0.0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS refs ("
+            " session_id TEXT NOT NULL, digest TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (session_id, digest))"
+        )
+
+    @staticmethod
+    def encode(value: Any) -> bytes:
+        return json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+
+    def put(self, session_id: str, value: Any) -> Dict[str, Any]:
+        """Store a value for a session and return the reference to keep in state"""
+        raw = self.encode(value)
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO blobs (digest, data, size) VALUES (?, ?, ?)",
+                    (digest, zlib.compress(raw), len(raw)),
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO refs (session_id, digest, size, last_used) VALUES (?, ?, ?, ?)",
+                    (session_id, digest, len(raw), time.time()),
+                )
+                self._evict(session_id)
+                if time.time() >= self._next_expiry:
+                    self._expire()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return {REF_KEY: digest, "session": session_id, "bytes": len(raw), "summary": summarize(value)}
+
+    def get(self, ref: Dict[str, Any]) -> Optional[Any]:
+        """Full value behind a reference, or None when it has been evicted"""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM blobs WHERE digest = ?", (ref[REF_KEY],)).fetchone()
+            if row is None:
+                return None
+            if ref.get("session"):
+                self._db.execute(
+                    "UPDATE refs SET last_used = ? WHERE session_id = ? AND digest = ?",
+                    (time.time(), ref["session"], ref[REF_KEY]),
+                )
+        return json.loads(zlib.decompress(row[0]))
+
+    def _evict(self, session_id: str):
+        """Drop the session's least recently used references until it fits its cap"""
+        rows = self._db.execute(
+            "SELECT digest, size FROM refs WHERE session_id = ? ORDER BY last_used DESC", (session_id,)
+        ).fetchall()
+        total = 0
+        for i, (digest, size) in enumerate(rows):
+            total += size
+            # The newest value is always kept, even if it alone exceeds the cap
+            if i > 0 and total > self.session_cap:
+                self._db.execute("DELETE FROM refs WHERE session_id = ? AND digest = ?", (session_id, digest))
+        self._collect_garbage()
+
+    def _expire(self):
+        """Drop references unused for longer than the TTL, then trim the store to its cap"""
+        now = time.time()
+        self._next_expiry = now + EXPIRY_INTERVAL
+        self._db.execute("DELETE FROM refs WHERE last_used < ?", (now - self.ttl,))
+        rows = self._db.execute(
+            "SELECT b.digest, b.size FROM blobs b JOIN refs r ON r.digest = b.digest"
+            " GROUP BY b.digest ORDER BY MAX(r.last_used) DESC"
+        ).fetchall()
+        total = 0
+        for i, (digest, size) in enumerate(rows):
+            total += size
+            if i > 0 and total > self.store_cap:
+                self._db.execute("DELETE FROM refs WHERE digest = ?", (digest,))
+        self._collect_garbage()
+
+    def expire(self):
+        """Apply the TTL and the store cap now instead of on the next put"""
+        with self._lock:
+            self._expire()
+
+    def _collect_garbage(self):
+        self._db.execute("DELETE FROM blobs WHERE digest NOT IN (SELECT digest FROM refs)")
+
+    def drop_session(self, session_id: str):
+        """Forget everything stored for a session"""
+        with self._lock:
+            self._db.execute("DELETE FROM refs WHERE session_id = ?", (session_id,))
+            self._collect_garbage()
+
+    def stats(self, session_id: Optional[str] = None) -> Dict[str, int]:
+        with self._lock:
+            if session_id:
+                count, size = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM refs WHERE session_id = ?", (session_id,)
+                ).fetchone()
+            else:
+                count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {"values": count, "bytes": size}
+
+
+def inline_limit() -> int:
+    return int(os.getenv("STATE_INLINE_LIMIT", "4096"))
+
+
+# Global blob store instance
+_blob_store = None
+
+def get_blob_store() -> Optional[BlobStore]:
+    """Get or create the blob store, or None when offloading is disabled"""
+    global _blob_store
+    if os.getenv("STATE_BLOB_STORE", "1") == "0":
+        return None
+    if _blob_store is None:
+        default_path = Path.home() / ".cache" / "stock_research_assistant" / "state_blobs.sqlite3"
+        _blob_store = BlobStore(
+            os.getenv("STATE_BLOB_PATH") or str(default_path),
+            session_cap=int(os.getenv("STATE_SESSION_CAP", str(16 * 1024 * 1024))),
+            store_cap=int(os.getenv("STATE_STORE_CAP", str(256 * 1024 * 1024))),
+            ttl=float(os.getenv("STATE_BLOB_TTL", str(7 * 24 * 3600))),
+        )
+    return _blob_store
+
+
+def resolve_state_value(value: Any) -> Any:
+    """The full value behind a blob reference; other values are returned unchanged
+
+    An evicted value resolves to its summary so readers still get some context.
+    """
+    if not is_blob_ref(value):
+        return value
+    store = get_blob_store()
+    resolved = store.get(value) if store is not None else None
+    return resolved if resolved is not None else value.get("summary")
+
+
+def resolving_instruction(template: str) -> Callable[[ReadonlyContext], str]:
+    """Instruction provider that fills {key} placeholders from state, resolving blob references
+
+    Used in place of ADK's own templating, which would show the model the
+    reference instead of the value. Missing keys become empty strings.
+    """
+
+    def instruction(context: ReadonlyContext) -> str:
+        def fill(match: re.Match) -> str:
+            value = resolve_state_value(context.state.get(match.group(1)))
+            if value is None:
+                return ""
+            return value if isinstance(value, str) else json.dumps(value, indent=2, default=str)
+
+        return PLACEHOLDER_PATTERN.sub(fill, template)
+
+    return instruction
+
+
+def offload_state_delta(session_id: str, state_delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace large agent outputs in a state delta with blob references, in place"""
+    store = get_blob_store()
+    if store is None or not state_delta:
+        return state_delta
+    limit = inline_limit()
+    for key in OFFLOADED_KEYS:
+        value = state_delta.get(key)
+        if value is None or is_blob_ref(value):
+            continue
+        if len(BlobStore.encode(value)) > limit:
+            state_delta[key] = store.put(session_id, value)
+    return state_delta
+
+
+class StateOffloadPlugin(BasePlugin):
+    """Moves large agent outputs into the blob store before their event is stored
+
+    The runner calls on_event_callback before appending the event to the
+    session, so the full value never reaches session state or the stored
+    event history. Agent tools inherit the plugin, so outputs of agents run
+    as tools are offloaded in their own runs too.
+    """
+
+    def __init__(self):
+        super().__init__(name="state_offload")
+
+    async def on_event_callback(self, *, invocation_context: InvocationContext, event: Event) -> Optional[Event]:
+        if event.actions and event.actions.state_delta:
+            offload_state_delta(invocation_context.session.id, event.actions.state_delta)
+        return None
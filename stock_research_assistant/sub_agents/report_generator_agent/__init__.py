@@ -1 +1,2 @@
-from .agent import report_generator
\ No newline at end of file
+from .agent import report_generator
+from .incremental_report import incremental_report_generator
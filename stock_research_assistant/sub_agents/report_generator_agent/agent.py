@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, Dict
 from google.adk.agents import LlmAgent
+from ...state_store import resolving_instruction
 
 # Define the schemas for each section of the report.
 # This ensures a well-structured and consistent output.
@@ -40,14 +41,20 @@ pydantic_report_generator = LlmAgent(
     model="gemini-1.5-pro",
     description="Agent that aggregates inputs from other agents and generates a comprehensive investor report in a structured format.",
     output_schema=Report,
-    instruction="""
+    instruction=resolving_instruction("""
     You are an AI financial report writer. Your task is to take detailed summaries from a team of expert agents and synthesize them into a single, cohesive, and professional investor report.
 
     You will receive inputs from the stock data agent and the sentiment analysis agent. Synthesize these inputs into a structured report that follows the schema.
 
     Use only the information provided in the inputs to fill the `Report` schema. Your goal is to combine the data into a high-quality, readable narrative within each section's summary field. 
     Do not invent or assume any information. Your output must conform exactly to the `Report` schema.
-    """,
+
+    Stock data agent result:
+    {stock_data_agent_result?}
+
+    Sentiment agent result:
+    {sentiment_agent_result?}
+    """),
     output_key="investor_report"
 )
 
@@ -55,7 +62,7 @@ report_generator = LlmAgent(
     name="report_generator_agent",
     model="gemini-1.5-pro",
     description="Agent that aggregates inputs from other agents and generates a comprehensive investor report in Markdown format.",
-    instruction="""
+    instruction=resolving_instruction("""
     You are an AI financial report writer. Your task is to take detailed summaries from the stock data agent 
     and the sentiment analysis agent, then synthesize them into a single, cohesive, and professional investor report.
     You should receive inputs from stock data and sentiment analysis agents. Synthesize these inputs into a structured report.
@@ -89,6 +96,12 @@ report_generator = LlmAgent(
     - Write in a professional, investor-focused tone.
     - Only use information provided in the inputs. Do not invent facts.
     - Always include all sections, even if some are brief.
-    """,
+
+    Stock data agent result:
+    {stock_data_agent_result?}
+
+    Sentiment agent result:
+    {sentiment_agent_result?}
+    """),
     output_key="investor_report"
 )
\ No newline at end of file
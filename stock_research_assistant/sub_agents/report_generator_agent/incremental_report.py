@@ -0,0 +1,315 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple, Type
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from pydantic import BaseModel, Field
+from .agent import FundamentalsSection, Report, SentimentSection, TechnicalsSection, report_generator
+from ...research_data import get_tool_result_log
+from ...state_store import resolve_state_value
+
+# Session state keys written by the research agents
+REPORT_INPUT_KEYS = ("stock_data_agent_result", "sentiment_agent_result")
+
+# The agent behind each input, whose tool results the section cache is keyed on
+REPORT_INPUT_AGENTS = {
+    "stock_data_agent_result": "stock_data_agent",
+    "sentiment_agent_result": "stock_sentiment_agent",
+}
+
+# Sections are written by the same model as the single-call report
+SECTION_MODEL = report_generator.model
+
+
+class ConclusionSection(BaseModel):
+    ticker: str = Field(description="The stock ticker symbol (e.g., AAPL).")
+    report_title: str = Field(description="A concise, descriptive title for the investor report.")
+    conclusion: str = Field(description="A concluding summary of the research, highlighting key insights and potential risks.")
+
+
+def read_report_input(state, key: str) -> Any:
+    """Value of a report input from session state, or None when it is missing
+
+    Inputs moved to the blob store are resolved back to their full value.
+    """
+    value = resolve_state_value(state.get(key))
+    return value if value not in ("", None) else None
+
+
+def input_fingerprint(ctx: InvocationContext, key: str) -> Any:
+    """What a section input is based on, for its cache key
+
+    An agent's prose changes between runs even when its data does not, so a
+    research agent's result stands for the tool results it was written from
+    when those were recorded in this invocation. Anything else, including the
+    finished sections the conclusion reads, stands for itself.
+    """
+    agent = REPORT_INPUT_AGENTS.get(key)
+    if agent is not None:
+        fingerprint = get_tool_result_log().fingerprint(ctx.session.id, agent, ctx.invocation_id)
+        if fingerprint is not None:
+            return {"tool_results": fingerprint}
+    return read_report_input(ctx.session.state, key)
+
+
+def _normalize(value: Any) -> Any:
+    # Whitespace-only differences in agent text should not invalidate a section
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def content_hash(*parts: Any) -> str:
+    """Stable hash of JSON-serializable parts"""
+    text = json.dumps([_normalize(part) for part in parts], sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SectionCache:
+    """Bounded LRU of generated report sections keyed by (section, input hash)"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, section: str, digest: str) -> Optional[Any]:
+        key = (section, digest)
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def put(self, section: str, digest: str, value: Any):
+        self._entries[(section, digest)] = value
+        self._entries.move_to_end((section, digest))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Global section cache, shared across sessions so a refresh reuses unchanged sections
+_section_cache = None
+
+def get_section_cache() -> SectionCache:
+    """Get or create the report section cache"""
+    global _section_cache
+    if _section_cache is None:
+        _section_cache = SectionCache()
+    return _section_cache
+
+
+def _section_key(name: str) -> str:
+    return f"report_section_{name}"
+
+
+def _input_block(state, keys) -> str:
+    blocks = []
+    for key in keys:
+        value = read_report_input(state, key)
+        text = value if isinstance(value, str) else json.dumps(value, indent=2, default=str)
+        blocks.append(f"{key}:\n{text if value is not None else '(not available)'}")
+    return "\n\n".join(blocks)
+
+
+def _section_agent(name: str, schema: Type[BaseModel], task: str, inputs: Tuple[str, ...]) -> LlmAgent:
+    """Small single-purpose writer for one report section"""
+
+    def instruction(context: ReadonlyContext) -> str:
+        return (
+            "You are an AI financial report writer working on one section of an investor report.\n"
+            f"{task}\n"
+            "Use only the information provided below. Do not invent or assume any information; "
+            "say so briefly when something is not available. Write in a professional, investor-focused tone.\n\n"
+            + _input_block(context.state, inputs)
+        )
+
+    return LlmAgent(
+        name=f"report_{name}_writer",
+        model=SECTION_MODEL,
+        description=f"Writes the {name} section of the investor report.",
+        instruction=instruction,
+        include_contents="none",
+        output_schema=schema,
+        output_key=_section_key(name),
+        disallow_transfer_to_parent=True,
+        disallow_transfer_to_peers=True,
+    )
+
+
+class SectionSpec:
+    """One report section: the state it depends on and the agent that writes it"""
+
+    def __init__(self, name: str, inputs: Tuple[str, ...], agent: LlmAgent):
+        self.name = name
+        self.inputs = inputs
+        self.agent = agent
+
+
+SECTIONS = [
+    SectionSpec(
+        "fundamentals",
+        ("stock_data_agent_result",),
+        _section_agent(
+            "fundamentals",
+            FundamentalsSection,
+            "Summarize valuation and financial health, and list the key fundamental metrics.",
+            ("stock_data_agent_result",),
+        ),
+    ),
+    SectionSpec(
+        "technicals",
+        ("stock_data_agent_result",),
+        _section_agent(
+            "technicals",
+            TechnicalsSection,
+            "Summarize recent price action and trends, and list the key technical indicators.",
+            ("stock_data_agent_result",),
+        ),
+    ),
+    SectionSpec(
+        "sentiment",
+        ("sentiment_agent_result",),
+        _section_agent(
+            "sentiment",
+            SentimentSection,
+            "Summarize the latest news, social media, and analyst sentiment.",
+            ("sentiment_agent_result",),
+        ),
+    ),
+]
+
+# The conclusion is written from the finished sections, so it only changes when one of them does
+CONCLUSION = SectionSpec(
+    "conclusion",
+    tuple(_section_key(spec.name) for spec in SECTIONS),
+    _section_agent(
+        "conclusion",
+        ConclusionSection,
+        "Identify the ticker, write a concise report title, and write a conclusion highlighting key insights and potential risks.",
+        tuple(_section_key(spec.name) for spec in SECTIONS),
+    ),
+)
+
+
+def render_report(report: Report) -> str:
+    """Markdown investor report in the same layout report_generator writes"""
+    lines = [f"# {report.report_title}", "", f"**Ticker:** {report.ticker}", ""]
+
+    def bullets(metrics: Dict[str, str]):
+        lines.extend(f"- **{name}:** {value}" for name, value in metrics.items())
+
+    def notes(extra: Optional[str]):
+        if extra:
+            lines.extend(["", extra])
+        lines.append("")
+
+    lines.extend(["## Fundamentals", "", report.fundamentals.valuation_summary, ""])
+    bullets(report.fundamentals.key_metrics)
+    notes(report.fundamentals.extra_notes)
+
+    lines.extend(["## Technicals", "", report.technicals.market_overview, ""])
+    bullets(report.technicals.key_indicators)
+    notes(report.technicals.extra_notes)
+
+    lines.extend(["## Sentiment", "", report.sentiment.sentiment_summary])
+    notes(report.sentiment.extra_notes)
+
+    lines.extend(["## Conclusion", "", report.conclusion])
+    return "\n".join(lines)
+
+
+class IncrementalReportAgent(BaseAgent):
+    """Builds the investor report section by section, reusing sections whose inputs are unchanged
+
+    Every section is cached under a hash of what it is written from: the
+    tool results behind a research agent's answer, or the state value itself
+    (see input_fingerprint). On a refresh only the sections whose inputs
+    changed are sent to their writer agent; the rest come from the cache, and
+    the final Markdown is assembled without another model call.
+    """
+
+    def __init__(self, name: str = "report_generator_agent", description: str = ""):
+        super().__init__(
+            name=name,
+            description=description or "Agent that aggregates inputs from other agents and generates a comprehensive investor report in Markdown format.",
+            sub_agents=[spec.agent for spec in SECTIONS + [CONCLUSION]],
+        )
+
+    def _event(self, ctx: InvocationContext, state_delta: Dict[str, Any], text: Optional[str] = None) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=state_delta),
+            content=types.Content(role="model", parts=[types.Part(text=text)]) if text else None,
+        )
+
+    async def _run_section(self, ctx: InvocationContext, spec: SectionSpec, digests: Dict[str, str]) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        digest = content_hash(spec.name, spec.agent.model, [input_fingerprint(ctx, key) for key in spec.inputs])
+        digests[spec.name] = digest
+        key = _section_key(spec.name)
+
+        cache = get_section_cache()
+        cached = cache.get(spec.name, digest)
+        if cached is not None:
+            if state.get(key) != cached:
+                yield self._event(ctx, {key: cached})
+            return
+
+        async for event in spec.agent.run_async(ctx):
+            yield event
+        section = ctx.session.state.get(key)
+        if isinstance(section, dict):
+            cache.put(spec.name, digest, section)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        if not any(read_report_input(state, key) is not None for key in REPORT_INPUT_KEYS):
+            yield self._event(ctx, {}, "I am missing the stock data and sentiment information needed to complete the report.")
+            return
+
+        digests: Dict[str, str] = {}
+        for spec in SECTIONS + [CONCLUSION]:
+            async for event in self._run_section(ctx, spec, digests):
+                yield event
+
+        try:
+            conclusion = ConclusionSection.model_validate(state.get(_section_key("conclusion")))
+            report = Report(
+                ticker=conclusion.ticker,
+                report_title=conclusion.report_title,
+                fundamentals=state.get(_section_key("fundamentals")),
+                technicals=state.get(_section_key("technicals")),
+                sentiment=state.get(_section_key("sentiment")),
+                conclusion=conclusion.conclusion,
+            )
+        except ValueError as e:
+            yield self._event(ctx, {}, f"Could not assemble the report: {e}")
+            return
+
+        markdown = render_report(report)
+        yield self._event(
+            ctx,
+            {
+                "investor_report": markdown,
+                "investor_report_data": report.model_dump(),
+                "report_section_hashes": digests,
+            },
+            markdown,
+        )
+
+
+incremental_report_generator = IncrementalReportAgent()
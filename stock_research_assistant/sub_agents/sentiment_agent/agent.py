@@ -1,5 +1,21 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools import google_search
+from google.adk.tools.agent_tool import AgentTool
+from .tools import score_news_sentiment
+from ...research_data import record_tool_result
+
+# google_search is a built-in tool and cannot share an agent with function tools,
+# so web search runs in its own agent that the sentiment agent calls as a tool
+sentiment_search_agent = LlmAgent(
+    name="sentiment_search_agent",
+    model="gemini-2.0-flash",
+    description="Searches the web for current opinion about a stock.",
+    instruction="""
+    Search social media platforms like X, Reddit, Stocktwits, or credible analyst reports
+    for current opinion about the requested stock, and summarize what you find.
+    """,
+    tools=[google_search],
+)
 
 sentiment_agent = LlmAgent(
     name="stock_sentiment_agent",
@@ -8,9 +24,15 @@ sentiment_agent = LlmAgent(
     instruction="""
     You are a market sentiment assistant. Your role is to provide up-to-date sentiment about a certain stock.
 
-    You can use the `google_search` tool to look through social media platforms like X, Reddit, Stocktwits, or 
-    credible analyst reports if available to achieve a sentiment.
+    Start with the `score_news_sentiment` tool: it scores recent news headlines for one or more tickers
+    from -1 to 1 and returns a daily sentiment series. Pass every ticker in one call when asked about
+    several stocks so their scores can be compared.
+
+    Use the `sentiment_search_agent` tool to look through social media platforms like X, Reddit, Stocktwits, or
+    credible analyst reports if available, to add context the news scores do not capture.
     """,
-    tools=[google_search],
+    tools=[score_news_sentiment, AgentTool(agent=sentiment_search_agent)],
+    # The report's section cache keys sentiment on the news scores and search results rather than this agent's prose
+    after_tool_callback=record_tool_result,
     output_key="sentiment_agent_result",
 )
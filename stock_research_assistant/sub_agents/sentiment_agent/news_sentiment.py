@@ -0,0 +1,154 @@
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+# Finance-specific lexicon: weight of each word in a news headline
+FINANCE_LEXICON = {
+    # Positive
+    "beat": 2.0, "beats": 2.0, "tops": 1.5, "exceed": 1.5, "exceeds": 1.5, "exceeded": 1.5,
+    "surge": 2.0, "surges": 2.0, "soar": 2.0, "soars": 2.0, "jump": 1.5, "jumps": 1.5,
+    "rally": 1.5, "rallies": 1.5, "gain": 1.0, "gains": 1.0, "rise": 1.0, "rises": 1.0,
+    "climb": 1.0, "climbs": 1.0, "upgrade": 2.0, "upgrades": 2.0, "upgraded": 2.0,
+    "outperform": 1.5, "overweight": 1.0, "buy": 1.0, "bullish": 2.0, "record": 1.5,
+    "growth": 1.0, "profit": 1.0, "profitable": 1.5, "strong": 1.0, "stronger": 1.0,
+    "raise": 1.0, "raises": 1.0, "raised": 1.0, "boost": 1.0, "boosts": 1.0,
+    "expand": 1.0, "expands": 1.0, "expansion": 1.0, "approval": 1.5, "approved": 1.5,
+    "partnership": 1.0, "wins": 1.5, "win": 1.0, "dividend": 0.5, "buyback": 1.0,
+    "optimistic": 1.5, "momentum": 0.5, "breakthrough": 2.0, "rebound": 1.0, "recovers": 1.0,
+    # Negative
+    "miss": -2.0, "misses": -2.0, "missed": -2.0, "plunge": -2.5, "plunges": -2.5,
+    "plummet": -2.5, "plummets": -2.5, "tumble": -2.0, "tumbles": -2.0, "slump": -2.0,
+    "slumps": -2.0, "sink": -1.5, "sinks": -1.5, "fall": -1.0, "falls": -1.0, "drop": -1.0,
+    "drops": -1.0, "decline": -1.0, "declines": -1.0, "slide": -1.0, "slides": -1.0,
+    "downgrade": -2.0, "downgrades": -2.0, "downgraded": -2.0, "underperform": -1.5,
+    "underweight": -1.0, "sell": -1.0, "bearish": -2.0, "loss": -1.5, "losses": -1.5,
+    "weak": -1.5, "weaker": -1.5, "cut": -1.0, "cuts": -1.0, "lawsuit": -2.0, "sued": -2.0,
+    "probe": -1.5, "investigation": -1.5, "fraud": -3.0, "recall": -1.5, "recalls": -1.5,
+    "bankruptcy": -3.0, "default": -2.0, "layoffs": -1.5, "warning": -1.5, "warns": -1.5,
+    "fine": -1.0, "fined": -1.5, "halt": -1.5, "halts": -1.5, "delay": -1.0, "delays": -1.0,
+    "concern": -1.0, "concerns": -1.0, "risk": -0.5, "risks": -0.5, "volatile": -0.5,
+    "pessimistic": -1.5, "crash": -3.0, "selloff": -2.0, "downturn": -1.5, "shortfall": -1.5,
+}
+
+# Words that flip the polarity of the next few words
+NEGATORS = {"not", "no", "never", "without", "fails", "failed", "despite", "isn't", "wasn't", "won't", "didn't", "doesn't"}
+NEGATION_WINDOW = 3
+
+# Controls how quickly raw sums saturate towards +/-1
+NORMALIZATION_ALPHA = 15.0
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z']*")
+
+
+def score_texts(texts: List[str]) -> np.ndarray:
+    """Score a batch of headlines in [-1, 1] with one vectorized pass over all tokens"""
+    token_lists = [TOKEN_PATTERN.findall(text.lower()) for text in texts]
+    lengths = np.array([len(tokens) for tokens in token_lists], dtype=np.int64)
+    scores = np.zeros(len(texts))
+    if lengths.sum() == 0:
+        return scores
+
+    flat = np.array([token for tokens in token_lists for token in tokens])
+    doc_ids = np.repeat(np.arange(len(texts)), lengths)
+
+    # Look each distinct token up once, then broadcast back to every occurrence
+    vocabulary, inverse = np.unique(flat, return_inverse=True)
+    weights = np.array([FINANCE_LEXICON.get(word, 0.0) for word in vocabulary])[inverse]
+    is_negator = np.isin(vocabulary, list(NEGATORS))[inverse]
+
+    # A negator within the previous few tokens of the same headline flips the weight
+    negated = np.zeros(len(flat), dtype=bool)
+    for shift in range(1, NEGATION_WINDOW + 1):
+        negated[shift:] |= is_negator[:-shift] & (doc_ids[shift:] == doc_ids[:-shift])
+    weights = np.where(negated, -0.75 * weights, weights)
+
+    sums = np.bincount(doc_ids, weights=weights, minlength=len(texts))
+    return sums / np.sqrt(sums * sums + NORMALIZATION_ALPHA)
+
+
+def _published_date(item: Dict[str, Any]) -> Optional[str]:
+    published = item.get("published_utc")
+    return published[:10] if published else None
+
+
+class NewsSentimentScorer:
+    """Lexicon scorer for Polygon news items with scores cached by article id"""
+
+    def __init__(self, max_cached: int = 50000, half_life_days: float = 3.0):
+        self.max_cached = max_cached
+        self.half_life_days = half_life_days
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+
+    def score_items(self, items: List[Dict[str, Any]]) -> List[float]:
+        """Scores for news items, only scoring articles not seen before"""
+        keys = [item.get("id") or item.get("article_url") or item.get("title", "") for item in items]
+        known = {key: self._cache[key] for key in keys if key in self._cache}
+        pending = [i for i, key in enumerate(keys) if key not in known]
+        if pending:
+            texts = [
+                f"{items[i].get('title', '')}. {items[i].get('description') or ''}"
+                for i in pending
+            ]
+            for i, score in zip(pending, score_texts(texts)):
+                known[keys[i]] = float(score)
+
+        for key, score in known.items():
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return [known[key] for key in keys]
+
+    def ticker_sentiment(self, ticker: str, items: List[Dict[str, Any]], now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Daily sentiment series and recency-weighted summary for one ticker"""
+        now = now or datetime.now(timezone.utc)
+        scores = self.score_items(items)
+        if not scores:
+            return {"ticker": ticker, "articles": 0, "score": None, "label": "no coverage", "daily": []}
+
+        by_day: Dict[str, List[float]] = {}
+        weighted, total_weight = 0.0, 0.0
+        for item, score in zip(items, scores):
+            day = _published_date(item)
+            if day:
+                by_day.setdefault(day, []).append(score)
+                age_days = max(0.0, (now.date() - datetime.strptime(day, "%Y-%m-%d").date()).days)
+            else:
+                age_days = 0.0
+            weight = 0.5 ** (age_days / self.half_life_days)
+            weighted += weight * score
+            total_weight += weight
+
+        score = weighted / total_weight if total_weight else 0.0
+        ranked = sorted(zip(scores, items), key=lambda pair: pair[0])
+        return {
+            "ticker": ticker,
+            "articles": len(items),
+            "score": round(score, 3),
+            "label": "positive" if score > 0.15 else "negative" if score < -0.15 else "neutral",
+            "daily": [
+                {"date": day, "score": round(float(np.mean(values)), 3), "articles": len(values)}
+                for day, values in sorted(by_day.items())
+            ],
+            "most_positive": ranked[-1][1].get("title") if ranked[-1][0] > 0 else None,
+            "most_negative": ranked[0][1].get("title") if ranked[0][0] < 0 else None,
+        }
+
+    def score_watchlist(self, news: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """Per-ticker sentiment for a whole watchlist, scoring every new headline in one batch"""
+        self.score_items([item for items in news.values() for item in items])
+        now = datetime.now(timezone.utc)
+        return {ticker: self.ticker_sentiment(ticker, items, now) for ticker, items in news.items()}
+
+
+# Global scorer instance
+_news_sentiment_scorer = None
+
+def get_news_sentiment_scorer() -> NewsSentimentScorer:
+    """Get or create the news sentiment scorer"""
+    global _news_sentiment_scorer
+    if _news_sentiment_scorer is None:
+        _news_sentiment_scorer = NewsSentimentScorer()
+    return _news_sentiment_scorer
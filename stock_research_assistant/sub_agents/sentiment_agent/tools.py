@@ -0,0 +1,24 @@
+from typing import Any, Dict, List
+from ..stock_data_agent.polygon_mcp_client import get_stock_data_service
+from .news_sentiment import get_news_sentiment_scorer
+
+async def score_news_sentiment(tickers: List[str], days: int = 7) -> Dict[str, Any]:
+    """Score recent Polygon news sentiment for one or more stock tickers.
+
+    Headlines are scored with a finance lexicon, so scores are comparable
+    across tickers and the whole watchlist can be scored in one call. Each
+    ticker gets a score from -1 (very negative) to 1 (very positive) weighted
+    towards recent articles, a label, a daily series and the most positive
+    and negative headlines.
+
+    Args:
+        tickers: Stock ticker symbols, e.g. ["AAPL", "MSFT"].
+        days: Calendar days of news to score.
+    """
+    service = get_stock_data_service()
+    batch = await service.get_news_batch(tickers, days=days)
+
+    sentiment = get_news_sentiment_scorer().score_watchlist(batch["results"])
+    for symbol, error in batch["errors"].items():
+        sentiment[symbol] = {"error": error}
+    return sentiment
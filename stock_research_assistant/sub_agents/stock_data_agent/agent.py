@@ -1,38 +1,8 @@
-import os
-from dotenv import load_dotenv
-from pathlib import Path
 from google.adk.agents import LlmAgent
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
-from google.adk.tools.mcp_tool.mcp_session_manager import StdioServerParameters
-
-agent_folder = Path(__file__).parent
-load_dotenv(dotenv_path=agent_folder / ".env")
-
-polygon_api_key = os.getenv("POLYGON_API_KEY")
-if not polygon_api_key:
-    raise ValueError("POLYGON_API_KEY environment variable must be set")
-
-uvx_path = None
-
-import shutil
-uvx_path = shutil.which("uvx")
-
-if not uvx_path:
-    possible_paths = [
-        Path.home() / ".cargo" / "bin" / "uvx", 
-        Path.home() / ".local" / "bin" / "uvx",  
-        Path("/usr/local/bin/uvx"),              
-    ]
-    
-    for path in possible_paths:
-        if path.exists() and path.is_file():
-            uvx_path = str(path)
-            break
-
-if not uvx_path:
-    raise ValueError("uvx not found. Please install uv/uvx or add it to your PATH")
-
-print(f"Using uvx from: {uvx_path}")
+from .tools import get_technical_indicators, screen_stocks
+from .lazy_toolset import LazyPolygonToolset
+from .compaction import compact_tool_response
+from ...research_data import record_tool_result
 
 stock_data_agent = LlmAgent(
     name="stock_data_agent",
@@ -42,25 +12,22 @@ stock_data_agent = LlmAgent(
     You are a specialized Stock Data Agent powered by the Polygon.io MCP server.
     Use the tools available to retrieve market data.
     Always explain your results with clear context (price, volume, session info).
+    For technical indicators (RSI, moving averages, MACD, Bollinger bands, ATR, VWAP, volatility)
+    use the `get_technical_indicators` tool instead of calculating them from raw bars.
+    To find stocks matching criteria (e.g. "large caps up 5% today on heavy volume"), translate the criteria
+    into filters for the `screen_stocks` tool, which screens the whole market in one call.
     """,
     tools=[
-        MCPToolset(
-            connection_params=StdioServerParameters(
-                command=uvx_path,
-                args=[
-                    "--from",
-                    "git+https://github.com/polygon-io/mcp_polygon@v0.4.0",
-                    "mcp_polygon"
-                ],
-                # Pass the API key as an environment variable to the uvx process
-                env={
-                    "POLYGON_API_KEY": polygon_api_key,
-                    "HOME": str(Path.home()),  # Some packages might need HOME
-                    "PATH": os.environ.get("PATH", ""),  # Preserve PATH
-                }
-            ),
+        get_technical_indicators,
+        screen_stocks,
+        # Spawned on first use; see server_config for how the server is launched
+        LazyPolygonToolset(
             # tool_filter=['get_snapshot_ticker', 'get_aggs', 'list_ticker_news']
         )
     ],
+    # Log what each tool returned for the report's section cache, then trim raw
+    # Polygon JSON to a token budget before it reaches the model
+    after_tool_callback=[record_tool_result, compact_tool_response],
+    # Large results are moved to the blob store by StateOffloadPlugin; state keeps a reference and summary
     output_key="stock_data_agent_result"
 )
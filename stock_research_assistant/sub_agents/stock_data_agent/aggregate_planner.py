@@ -0,0 +1,138 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from .bar_store import MARKET_TZ, date_to_ms, parse_date
+
+
+class RangeRequest(NamedTuple):
+    """A named slice of bars an analysis needs, optionally resampled after fetching"""
+    name: str
+    ticker: str
+    from_date: str
+    to_date: str
+    multiplier: int = 1
+    timespan: str = "day"
+    resample: Optional[str] = None
+
+
+class PlannedFetch(NamedTuple):
+    """One upstream fetch covering every request that overlaps it"""
+    ticker: str
+    multiplier: int
+    timespan: str
+    from_date: str
+    to_date: str
+    requests: List[RangeRequest]
+
+
+def plan_fetches(requests: List[RangeRequest]) -> List[PlannedFetch]:
+    """Merge overlapping or adjacent ranges of the same series into the fewest fetches"""
+    by_series: Dict[Tuple[str, int, str], List[RangeRequest]] = {}
+    for request in requests:
+        key = (request.ticker.upper(), request.multiplier, request.timespan)
+        by_series.setdefault(key, []).append(request)
+
+    plan: List[PlannedFetch] = []
+    for (ticker, multiplier, timespan), series_requests in by_series.items():
+        series_requests.sort(key=lambda r: r.from_date)
+        start, end, members = None, None, []
+        for request in series_requests:
+            r_start, r_end = parse_date(request.from_date), parse_date(request.to_date)
+            if start is not None and r_start <= end + timedelta(days=1):
+                end = max(end, r_end)
+                members.append(request)
+                continue
+            if start is not None:
+                plan.append(PlannedFetch(ticker, multiplier, timespan, start.isoformat(), end.isoformat(), members))
+            start, end, members = r_start, r_end, [request]
+        plan.append(PlannedFetch(ticker, multiplier, timespan, start.isoformat(), end.isoformat(), members))
+    return plan
+
+
+def slice_bars(bars: List[Dict[str, Any]], from_date: str, to_date: str) -> List[Dict[str, Any]]:
+    """Bars whose timestamps fall within [from_date, to_date]"""
+    lo = date_to_ms(parse_date(from_date))
+    hi = date_to_ms(parse_date(to_date) + timedelta(days=1))
+    return [bar for bar in bars if lo <= bar.get("t", 0) < hi]
+
+
+def _period_key(timestamp_ms: int, period: str) -> Tuple[int, ...]:
+    moment = datetime.fromtimestamp(timestamp_ms / 1000, MARKET_TZ)
+    if period == "week":
+        year, week, _ = moment.isocalendar()
+        return (year, week)
+    if period == "month":
+        return (moment.year, moment.month)
+    raise ValueError(f"Unsupported resample period: {period}")
+
+
+def resample_bars(bars: List[Dict[str, Any]], period: str = "week") -> List[Dict[str, Any]]:
+    """Roll bars up into weekly or monthly OHLCV bars"""
+    resampled: List[Dict[str, Any]] = []
+    current_key = None
+    for bar in bars:
+        key = _period_key(bar["t"], period)
+        if key != current_key:
+            current_key = key
+            resampled.append({
+                "t": bar["t"],
+                "o": bar.get("o"),
+                "h": bar.get("h"),
+                "l": bar.get("l"),
+                "c": bar.get("c"),
+                "v": 0.0,
+                "n": 0,
+                "_notional": 0.0,
+            })
+        out = resampled[-1]
+        out["h"] = max(out["h"], bar.get("h", out["h"]))
+        out["l"] = min(out["l"], bar.get("l", out["l"]))
+        out["c"] = bar.get("c", out["c"])
+        out["v"] += bar.get("v", 0.0)
+        out["n"] += bar.get("n", 0)
+        out["_notional"] += bar.get("vw", bar.get("c", 0.0)) * bar.get("v", 0.0)
+
+    for out in resampled:
+        notional = out.pop("_notional")
+        if out["v"]:
+            out["vw"] = notional / out["v"]
+    return resampled
+
+
+async def execute_plan(
+    requests: List[RangeRequest],
+    fetch: Callable[[str, int, str, str, str], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Dict[str, Any]]:
+    """Run the planned fetches concurrently and derive every requested range from them
+
+    `fetch(ticker, multiplier, timespan, from_date, to_date)` must return a
+    get_aggregates-style response. Results are keyed by request name.
+    """
+    plan = plan_fetches(requests)
+    responses = await asyncio.gather(
+        *(fetch(p.ticker, p.multiplier, p.timespan, p.from_date, p.to_date) for p in plan),
+        return_exceptions=True
+    )
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for planned, response in zip(plan, responses):
+        for request in planned.requests:
+            if isinstance(response, BaseException):
+                results[request.name] = {"error": f"Failed to get aggregates for {planned.ticker}: {response}"}
+                continue
+            if "error" in response:
+                results[request.name] = response
+                continue
+            bars = slice_bars(response.get("results") or [], request.from_date, request.to_date)
+            if request.resample:
+                bars = resample_bars(bars, request.resample)
+            results[request.name] = {
+                "ticker": planned.ticker,
+                "multiplier": planned.multiplier,
+                "timespan": request.resample or planned.timespan,
+                "from": request.from_date,
+                "to": request.to_date,
+                "results": bars,
+                "resultsCount": len(bars),
+            }
+    return results
@@ -0,0 +1,180 @@
+import asyncio
+from contextlib import aclosing
+from datetime import timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import numpy as np
+from .bar_store import date_to_ms, parse_date
+from .rate_limiter import TokenBucket
+
+# Column layout of streamed bars: timestamps as int64, OHLCV as float64
+STREAM_COLUMNS = {
+    "t": np.int64,
+    "o": np.float64,
+    "h": np.float64,
+    "l": np.float64,
+    "c": np.float64,
+    "v": np.float64,
+}
+
+FetchPage = Callable[[str, int, str, str, str, int], Awaitable[Dict[str, Any]]]
+
+
+def page_to_columns(bars: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Decode one page of Polygon result dicts into column arrays"""
+    count = len(bars)
+    return {
+        name: np.fromiter((bar.get(name, np.nan) for bar in bars), dtype=dtype, count=count)
+        for name, dtype in STREAM_COLUMNS.items()
+    }
+
+
+class BarBuffer:
+    """Growable struct-of-arrays buffer of bars with amortized O(1) appends
+
+    With `max_bars` set only the newest `max_bars` bars are kept. The arrays
+    then never grow past twice that; older rows are dropped when the buffer
+    compacts, and `dropped` counts how many bars were discarded.
+    """
+
+    def __init__(self, capacity: int = 1024, max_bars: Optional[int] = None):
+        self.max_bars = max_bars
+        if max_bars is not None:
+            capacity = min(capacity, 2 * max_bars)
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in STREAM_COLUMNS.items()}
+        self._size = 0
+        self._appended = 0
+
+    def __len__(self) -> int:
+        return self._size if self.max_bars is None else min(self._size, self.max_bars)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._columns["t"])
+
+    @property
+    def dropped(self) -> int:
+        """Bars appended but no longer held because of max_bars"""
+        return self._appended - len(self)
+
+    def _reserve(self, needed: int):
+        capacity = self.capacity
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity = max(1, capacity * 2)
+        if self.max_bars is not None:
+            capacity = max(needed, min(capacity, 2 * self.max_bars))
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def _keep_newest(self, keep: int):
+        """Move the newest `keep` rows to the front, dropping the rest"""
+        start = self._size - keep
+        for column in self._columns.values():
+            column[:keep] = column[start:self._size]
+        self._size = keep
+
+    def extend(self, columns: Dict[str, np.ndarray]):
+        """Append a chunk of column arrays"""
+        count = len(columns["t"])
+        self._appended += count
+        if self.max_bars is not None:
+            if count >= self.max_bars:
+                columns = {name: column[count - self.max_bars:] for name, column in columns.items()}
+                count = self.max_bars
+                self._size = 0
+            elif self._size + count > 2 * self.max_bars:
+                self._keep_newest(self.max_bars - count)
+        self._reserve(self._size + count)
+        for name in STREAM_COLUMNS:
+            self._columns[name][self._size:self._size + count] = columns[name]
+        self._size += count
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Views of the held bars in every column (no copy)"""
+        start = self._size - len(self)
+        return {name: column[start:self._size] for name, column in self._columns.items()}
+
+
+async def stream_pages(
+    fetch_page: FetchPage,
+    ticker: str,
+    multiplier: int,
+    timespan: str,
+    from_date: str,
+    to_date: str,
+    page_limit: int = 50000,
+    rate_limiter: Optional[TokenBucket] = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield every page of raw Polygon bars in the range, prefetching the next page while this one is used
+
+    `fetch_page(ticker, multiplier, timespan, from_, to, limit)` must return a
+    raw get_aggs response. Pages are chained from the last bar's timestamp
+    until a page comes back empty or the range is covered, so this works
+    whether or not the server passes Polygon's next_url through. The page
+    size is not a stop signal: Polygon's limit counts base aggregates, so a
+    truncated hour or day page holds fewer than `page_limit` bars. Only one
+    page is held ahead of the consumer, which keeps memory bounded.
+    """
+    end_ms = date_to_ms(parse_date(to_date) + timedelta(days=1)) - 1
+
+    async def fetch(cursor: str) -> Dict[str, Any]:
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        return await fetch_page(ticker, multiplier, timespan, cursor, str(end_ms), page_limit)
+
+    cursor_ms = date_to_ms(parse_date(from_date))
+    pending = asyncio.create_task(fetch(from_date))
+    try:
+        while pending is not None:
+            page = await pending
+            pending = None
+            if "error" in page:
+                raise RuntimeError(page["error"])
+
+            bars = page.get("results") or []
+            if not bars:
+                break
+
+            last_t = bars[-1]["t"]
+            # Stop when the range is covered or the server stopped moving forward
+            if last_t < end_ms and last_t >= cursor_ms:
+                cursor_ms = last_t + 1
+                pending = asyncio.create_task(fetch(str(cursor_ms)))
+
+            yield bars
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+
+
+async def stream_aggregates(
+    fetch_page: FetchPage,
+    ticker: str,
+    multiplier: int,
+    timespan: str,
+    from_date: str,
+    to_date: str,
+    page_limit: int = 50000,
+    rate_limiter: Optional[TokenBucket] = None
+) -> AsyncIterator[Dict[str, np.ndarray]]:
+    """Yield the pages of stream_pages() as column arrays, decoded while the next page is fetched"""
+    pages = stream_pages(fetch_page, ticker, multiplier, timespan, from_date, to_date, page_limit, rate_limiter)
+    async with aclosing(pages):
+        async for bars in pages:
+            yield page_to_columns(bars)
+
+
+async def collect_aggregates(
+    chunks: AsyncIterator[Dict[str, np.ndarray]],
+    capacity: int = 1024,
+    max_bars: Optional[int] = None
+) -> BarBuffer:
+    """Drain a stream of pages into one BarBuffer, keeping at most the newest `max_bars` bars"""
+    buffer = BarBuffer(capacity, max_bars)
+    async for chunk in chunks:
+        buffer.extend(chunk)
+    return buffer
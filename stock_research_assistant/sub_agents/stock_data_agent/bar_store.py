@@ -0,0 +1,266 @@
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+import numpy as np
+
+# Polygon bar fields and the dtype each is stored as on disk
+BAR_COLUMNS = {
+    "t": np.int64,
+    "o": np.float64,
+    "h": np.float64,
+    "l": np.float64,
+    "c": np.float64,
+    "v": np.float64,
+    "vw": np.float64,
+    "n": np.float64,
+}
+
+# Bar timestamps and trading dates are anchored to the exchange's timezone
+MARKET_TZ = ZoneInfo("America/New_York")
+
+DateRange = Tuple[date, date]
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def date_to_ms(day: date) -> int:
+    """Epoch milliseconds of midnight market time on `day`"""
+    return int(datetime(day.year, day.month, day.day, tzinfo=MARKET_TZ).timestamp() * 1000)
+
+
+def market_today() -> date:
+    return datetime.now(MARKET_TZ).date()
+
+
+def _merge_ranges(ranges: List[DateRange]) -> List[DateRange]:
+    """Merge overlapping or adjacent inclusive date ranges"""
+    merged: List[DateRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract_ranges(start: date, end: date, covered: List[DateRange]) -> List[DateRange]:
+    """Parts of [start, end] not covered by any of the (merged) ranges"""
+    gaps: List[DateRange] = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end < cursor:
+            continue
+        if c_start > end:
+            break
+        if c_start > cursor:
+            gaps.append((cursor, c_start - timedelta(days=1)))
+        cursor = max(cursor, c_end + timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+@contextmanager
+def _series_lock(series: Path, exclusive: bool) -> Iterator[None]:
+    """Lock a series directory against writers in other processes and threads"""
+    with open(series / "lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class BarStore:
+    """On-disk columnar store of OHLCV bars keyed by (ticker, multiplier, timespan)
+
+    Each series is a directory of memory-mapped .npy columns plus a meta.json
+    recording which trading dates have already been fetched. Completed days
+    never change, so only the still-forming current day expires, after
+    `live_bar_ttl` seconds. Several processes may share the store: writes to
+    a series hold an exclusive lock file and reads a shared one.
+    """
+
+    def __init__(self, root: Path, live_bar_ttl: float = 60.0):
+        self.root = Path(root)
+        self.live_bar_ttl = live_bar_ttl
+
+    def _series_dir(self, ticker: str, multiplier: int, timespan: str) -> Path:
+        return self.root / ticker.upper() / f"{multiplier}_{timespan}"
+
+    def _load_meta(self, series: Path) -> Dict[str, Any]:
+        try:
+            with open(series / "meta.json") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"covered": [], "live": None}
+
+    def _covered(self, meta: Dict[str, Any]) -> List[DateRange]:
+        return [(parse_date(start), parse_date(end)) for start, end in meta["covered"]]
+
+    def load(self, ticker: str, multiplier: int = 1, timespan: str = "day") -> Dict[str, np.ndarray]:
+        """Memory-map every column of a series (empty arrays if nothing is stored)"""
+        series = self._series_dir(ticker, multiplier, timespan)
+        columns = {}
+        for name, dtype in BAR_COLUMNS.items():
+            path = series / f"{name}.npy"
+            if path.exists():
+                columns[name] = np.load(path, mmap_mode="r")
+            else:
+                columns[name] = np.empty(0, dtype=dtype)
+        return columns
+
+    def missing_ranges(
+        self,
+        ticker: str,
+        multiplier: int,
+        timespan: str,
+        from_date: str,
+        to_date: str
+    ) -> List[Tuple[str, str]]:
+        """Date ranges within [from_date, to_date] that have to be fetched from the server"""
+        start, end = parse_date(from_date), parse_date(to_date)
+        today = market_today()
+        end = min(end, today)
+        if start > end:
+            return []
+
+        meta = self._load_meta(self._series_dir(ticker, multiplier, timespan))
+        covered = self._covered(meta)
+
+        # Today's bar is still forming; it only counts as covered while fresh
+        live = meta.get("live")
+        if live and live["date"] == today.isoformat() and time.time() - live["fetched_at"] < self.live_bar_ttl:
+            covered = _merge_ranges(covered + [(today, today)])
+
+        return [
+            (gap_start.isoformat(), gap_end.isoformat())
+            for gap_start, gap_end in _subtract_ranges(start, end, covered)
+        ]
+
+    def write(
+        self,
+        ticker: str,
+        multiplier: int,
+        timespan: str,
+        bars: List[Dict[str, Any]],
+        from_date: str,
+        to_date: str
+    ):
+        """Merge freshly fetched bars for [from_date, to_date] into the store"""
+        series = self._series_dir(ticker, multiplier, timespan)
+        series.mkdir(parents=True, exist_ok=True)
+        # Columns and meta are re-read under the lock, so a concurrent writer's bars are kept
+        with _series_lock(series, exclusive=True):
+            self._write(series, ticker, multiplier, timespan, bars, from_date, to_date)
+
+    def _write(
+        self,
+        series: Path,
+        ticker: str,
+        multiplier: int,
+        timespan: str,
+        bars: List[Dict[str, Any]],
+        from_date: str,
+        to_date: str
+    ):
+        existing = self.load(ticker, multiplier, timespan)
+        incoming = {
+            name: np.array([bar.get(name, np.nan) for bar in bars], dtype=dtype)
+            for name, dtype in BAR_COLUMNS.items()
+        }
+        merged = {name: np.concatenate([existing[name], incoming[name]]) for name in BAR_COLUMNS}
+
+        # Sort by timestamp and keep the newest copy of any duplicated bar
+        order = np.argsort(merged["t"], kind="stable")
+        t_sorted = merged["t"][order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[:-1] = t_sorted[1:] != t_sorted[:-1]
+        index = order[keep]
+
+        for name in BAR_COLUMNS:
+            tmp = series / f"{name}.tmp.npy"
+            np.save(tmp, merged[name][index])
+            os.replace(tmp, series / f"{name}.npy")
+
+        # Record coverage last so a crash mid-write only costs a refetch
+        meta = self._load_meta(series)
+        start, end = parse_date(from_date), parse_date(to_date)
+        today = market_today()
+        completed_end = min(end, today - timedelta(days=1))
+        covered = self._covered(meta)
+        if start <= completed_end:
+            covered = _merge_ranges(covered + [(start, completed_end)])
+        meta["covered"] = [[s.isoformat(), e.isoformat()] for s, e in covered]
+        if start <= today <= end:
+            meta["live"] = {"date": today.isoformat(), "fetched_at": time.time()}
+
+        tmp = series / "meta.tmp.json"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, series / "meta.json")
+
+    def read(
+        self,
+        ticker: str,
+        multiplier: int,
+        timespan: str,
+        from_date: str,
+        to_date: str
+    ) -> List[Dict[str, Any]]:
+        """Bars within [from_date, to_date] in Polygon's result format"""
+        series = self._series_dir(ticker, multiplier, timespan)
+        if not series.is_dir():
+            return []
+        # Columns are replaced one file at a time, so read them all under the lock
+        with _series_lock(series, exclusive=False):
+            return self._read(ticker, multiplier, timespan, from_date, to_date)
+
+    def _read(
+        self,
+        ticker: str,
+        multiplier: int,
+        timespan: str,
+        from_date: str,
+        to_date: str
+    ) -> List[Dict[str, Any]]:
+        columns = self.load(ticker, multiplier, timespan)
+        t = columns["t"]
+        lo = np.searchsorted(t, date_to_ms(parse_date(from_date)), side="left")
+        hi = np.searchsorted(t, date_to_ms(parse_date(to_date) + timedelta(days=1)), side="left")
+
+        bars = []
+        for i in range(lo, hi):
+            bar = {"t": int(t[i])}
+            for name in BAR_COLUMNS:
+                if name == "t":
+                    continue
+                value = float(columns[name][i])
+                if not np.isnan(value):
+                    bar[name] = int(value) if name == "n" else value
+            bars.append(bar)
+        return bars
+
+
+# Global bar store instance
+_bar_store = None
+
+def get_bar_store() -> Optional[BarStore]:
+    """Get or create the bar store, or None when caching is disabled"""
+    global _bar_store
+    if os.getenv("POLYGON_BAR_CACHE", "1") == "0":
+        return None
+    if _bar_store is None:
+        root = os.getenv("POLYGON_BAR_CACHE_DIR") or Path.home() / ".cache" / "stock_research_assistant" / "bars"
+        _bar_store = BarStore(Path(root), live_bar_ttl=float(os.getenv("POLYGON_LIVE_BAR_TTL", "60")))
+    return _bar_store
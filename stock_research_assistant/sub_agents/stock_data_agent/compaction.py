@@ -0,0 +1,180 @@
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from .bar_store import MARKET_TZ
+
+# Rough characters-per-token ratio for JSON text, used to estimate prompt size
+CHARS_PER_TOKEN = 4
+
+# Bars kept in the downsampled series of a compacted aggregates result
+MAX_SERIES_POINTS = 30
+
+# News items kept after deduplication
+MAX_NEWS_ITEMS = 15
+
+
+def default_token_budget() -> int:
+    """Token budget per tool result; 0 disables compaction"""
+    return int(os.getenv("POLYGON_RESULT_TOKEN_BUDGET", "2000"))
+
+
+def estimate_tokens(value: Any) -> int:
+    """Approximate token count of a value once serialized into the prompt"""
+    text = value if isinstance(value, str) else json.dumps(value, default=str, separators=(",", ":"))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _bar_date(timestamp_ms: Optional[int]) -> Optional[str]:
+    if timestamp_ms is None:
+        return None
+    moment = datetime.fromtimestamp(timestamp_ms / 1000, MARKET_TZ)
+    return moment.strftime("%Y-%m-%d %H:%M") if moment.hour or moment.minute else moment.strftime("%Y-%m-%d")
+
+
+def _is_bar_list(items: Any) -> bool:
+    return isinstance(items, list) and bool(items) and isinstance(items[0], dict) and "t" in items[0] and "c" in items[0]
+
+
+def _is_news_list(items: Any) -> bool:
+    return isinstance(items, list) and bool(items) and isinstance(items[0], dict) and "title" in items[0]
+
+
+def _downsample(items: List[Any], max_points: int) -> List[Any]:
+    """Evenly spaced subset that always keeps the first and last item"""
+    if len(items) <= max_points or max_points < 2:
+        return items[-max_points:] if max_points > 0 else []
+    step = (len(items) - 1) / (max_points - 1)
+    return [items[round(i * step)] for i in range(max_points)]
+
+
+def compact_bars(bars: List[Dict[str, Any]], max_points: int = MAX_SERIES_POINTS) -> Dict[str, Any]:
+    """Summary statistics plus a downsampled [date, close, volume] series"""
+    closes = [bar["c"] for bar in bars if bar.get("c") is not None]
+    highs = [bar["h"] for bar in bars if bar.get("h") is not None]
+    lows = [bar["l"] for bar in bars if bar.get("l") is not None]
+    volumes = [bar.get("v", 0) for bar in bars]
+    first, last = bars[0], bars[-1]
+
+    summary = {
+        "bars": len(bars),
+        "from": _bar_date(first.get("t")),
+        "to": _bar_date(last.get("t")),
+        "open": first.get("o"),
+        "close": last.get("c"),
+        "high": max(highs) if highs else None,
+        "low": min(lows) if lows else None,
+        "avg_volume": round(sum(volumes) / len(volumes)) if volumes else None,
+    }
+    if closes and first.get("o"):
+        summary["change_pct"] = round((last["c"] - first["o"]) / first["o"] * 100, 2)
+
+    return {
+        "summary": summary,
+        "series_fields": ["date", "close", "volume"],
+        "series": [[_bar_date(bar.get("t")), bar.get("c"), bar.get("v")] for bar in _downsample(bars, max_points)],
+    }
+
+
+def compact_news(items: List[Dict[str, Any]], max_items: int = MAX_NEWS_ITEMS) -> Dict[str, Any]:
+    """Deduplicated [headline, source, date] tuples, newest first as returned"""
+    seen = set()
+    headlines = []
+    for item in items:
+        title = (item.get("title") or "").strip()
+        key = " ".join(title.lower().split())
+        if not title or key in seen:
+            continue
+        seen.add(key)
+        publisher = item.get("publisher")
+        source = publisher.get("name") if isinstance(publisher, dict) else publisher
+        headlines.append([title, source, (item.get("published_utc") or "")[:10]])
+        if len(headlines) >= max_items:
+            break
+    return {"news_fields": ["headline", "source", "date"], "news": headlines, "total_items": len(items)}
+
+
+def _largest_list(value: Any, path=()) -> Optional[tuple]:
+    """Path to the longest list inside a nested structure"""
+    best = (path, len(value)) if isinstance(value, list) and len(value) > 1 else None
+    children = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else []
+    for key, child in children:
+        found = _largest_list(child, path + (key,))
+        if found and (best is None or found[1] > best[1]):
+            best = found
+    return best
+
+
+def enforce_budget(value: Any, token_budget: int) -> Any:
+    """Shrink the longest lists until the value fits the budget, then truncate as a last resort"""
+    if token_budget <= 0 or estimate_tokens(value) <= token_budget:
+        return value
+
+    value = json.loads(json.dumps(value, default=str))
+    while estimate_tokens(value) > token_budget:
+        found = _largest_list(value)
+        if found is None:
+            break
+        path, length = found
+        parent = value
+        for key in path[:-1]:
+            parent = parent[key]
+        if path:
+            parent[path[-1]] = _downsample(parent[path[-1]], length // 2)
+        else:
+            value = _downsample(value, length // 2)
+
+    if estimate_tokens(value) > token_budget:
+        text = json.dumps(value, default=str)
+        return {"truncated": True, "text": text[:token_budget * CHARS_PER_TOKEN]}
+    return value
+
+
+def compact_result(tool_name: str, result: Any, token_budget: Optional[int] = None) -> Any:
+    """Compact a decoded Polygon tool result before it is handed to the model"""
+    token_budget = default_token_budget() if token_budget is None else token_budget
+    if token_budget <= 0 or not isinstance(result, dict) or "error" in result:
+        return result
+
+    items = result.get("results")
+    if _is_bar_list(items):
+        compacted = {k: v for k, v in result.items() if k not in ("results", "request_id", "next_url")}
+        compacted.update(compact_bars(items))
+    elif _is_news_list(items):
+        compacted = {k: v for k, v in result.items() if k not in ("results", "request_id", "next_url")}
+        compacted.update(compact_news(items))
+    else:
+        compacted = result
+    return enforce_budget(compacted, token_budget)
+
+
+def compact_text_table(text: str, token_budget: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Downsample the rows of a CSV-style text result, keeping its header line"""
+    token_budget = default_token_budget() if token_budget is None else token_budget
+    if token_budget <= 0 or estimate_tokens(text) <= token_budget:
+        return None
+    header, *rows = text.splitlines()
+    keep = len(rows)
+    while keep > 1 and estimate_tokens("\n".join([header] + _downsample(rows, keep))) > token_budget:
+        keep //= 2
+    table = "\n".join([header] + _downsample(rows, keep))
+    return {"rows": len(rows), "rows_shown": min(keep, len(rows)), "text": table[:token_budget * CHARS_PER_TOKEN]}
+
+
+def compact_tool_response(tool, args: Dict[str, Any], tool_context, tool_response: Any) -> Optional[Dict[str, Any]]:
+    """after_tool_callback that compacts raw MCP tool output for the model
+
+    MCP tools return a CallToolResult dump whose text content holds the
+    Polygon JSON. Other tools already return finished numbers and are left alone.
+    """
+    if not isinstance(tool_response, dict) or "content" not in tool_response:
+        return None
+    texts = [c.get("text") for c in tool_response.get("content") or [] if isinstance(c, dict) and c.get("text")]
+    if len(texts) != 1:
+        return None
+    try:
+        decoded = json.loads(texts[0])
+    except json.JSONDecodeError:
+        return compact_text_table(texts[0])
+    compacted = compact_result(tool.name, decoded)
+    return compacted if isinstance(compacted, dict) else {"result": compacted}
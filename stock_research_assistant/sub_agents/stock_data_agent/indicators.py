@@ -0,0 +1,244 @@
+# Vectorized technical indicators over OHLCV bar arrays.
+#
+# Every function accepts a 1-D series or a 2-D (tickers x bars) matrix and
+# computes along the last axis, so a whole watchlist with the same number of
+# bars is processed in a single pass. Positions without enough history are NaN.
+from typing import Any, Dict, List, Optional
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def _rolling(x: np.ndarray, window: int) -> np.ndarray:
+    """Windows of `window` bars ending at each position from window-1 onwards"""
+    return sliding_window_view(x, window, axis=-1)
+
+
+def _pad_front(values: np.ndarray, length: int) -> np.ndarray:
+    """Left-pad the last axis with NaN back to `length`"""
+    pad = length - values.shape[-1]
+    if pad <= 0:
+        return values
+    return np.concatenate([np.full(values.shape[:-1] + (pad,), np.nan), values], axis=-1)
+
+
+def sma(x, window: int) -> np.ndarray:
+    """Simple moving average"""
+    x = _as_float(x)
+    if x.shape[-1] < window:
+        return np.full(x.shape, np.nan)
+    csum = np.cumsum(x, axis=-1)
+    sums = csum[..., window - 1:].copy()
+    sums[..., 1:] -= csum[..., :-window]
+    return _pad_front(sums / window, x.shape[-1])
+
+
+def _ema_from(x: np.ndarray, start: np.ndarray, alpha: float) -> np.ndarray:
+    """Run the EMA recursion over `x` starting from the value `start`
+
+    Uses the closed form y_k = decay^k * (y_0 + alpha * sum_j decay^-j * x_j)
+    with cumulative sums, in blocks short enough that decay^-k cannot overflow.
+    """
+    decay = 1.0 - alpha
+    n = x.shape[-1]
+    out = np.empty(x.shape)
+    if decay <= 0.0:
+        out[...] = x
+        return out
+    block = max(1, int(600.0 / -np.log(decay))) if decay < 1.0 else n
+    prev = np.asarray(start, dtype=np.float64)
+    for lo in range(0, n, block):
+        chunk = x[..., lo:lo + block]
+        k = np.arange(1, chunk.shape[-1] + 1)
+        weighted = np.cumsum(chunk * decay ** -k, axis=-1)
+        out[..., lo:lo + block] = decay ** k * (prev[..., None] + alpha * weighted)
+        prev = out[..., lo + chunk.shape[-1] - 1]
+    return out
+
+
+def ema(x, span: Optional[int] = None, alpha: Optional[float] = None) -> np.ndarray:
+    """Exponential moving average seeded with the SMA of the first `span` bars
+
+    Pass `alpha` directly for Wilder smoothing (alpha = 1 / period).
+    """
+    x = _as_float(x)
+    if span is None:
+        span = int(round(1.0 / alpha))
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < span:
+        return out
+    seed = x[..., :span].mean(axis=-1)
+    out[..., span - 1] = seed
+    out[..., span:] = _ema_from(x[..., span:], seed, alpha)
+    return out
+
+
+def rsi(close, period: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing"""
+    close = _as_float(close)
+    delta = np.diff(close, axis=-1)
+    gains = np.clip(delta, 0.0, None)
+    losses = np.clip(-delta, 0.0, None)
+    avg_gain = ema(gains, span=period, alpha=1.0 / period)
+    avg_loss = ema(losses, span=period, alpha=1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        values = 100.0 - 100.0 / (1.0 + rs)
+    # No losses at all over the window means maximum strength
+    values = np.where((avg_loss == 0) & ~np.isnan(avg_gain), 100.0, values)
+    return _pad_front(values, close.shape[-1])
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    """MACD line, signal line and histogram"""
+    close = _as_float(close)
+    line = ema(close, fast) - ema(close, slow)
+    # The signal EMA starts once the MACD line itself is defined
+    signal_line = np.full(close.shape, np.nan)
+    if close.shape[-1] >= slow:
+        signal_line[..., slow - 1:] = ema(line[..., slow - 1:], signal)
+    return {"macd": line, "signal": signal_line, "histogram": line - signal_line}
+
+
+def bollinger_bands(close, window: int = 20, num_std: float = 2.0) -> Dict[str, np.ndarray]:
+    """Bollinger bands around the simple moving average"""
+    close = _as_float(close)
+    middle = sma(close, window)
+    if close.shape[-1] < window:
+        std = np.full(close.shape, np.nan)
+    else:
+        std = _pad_front(_rolling(close, window).std(axis=-1), close.shape[-1])
+    return {
+        "upper": middle + num_std * std,
+        "middle": middle,
+        "lower": middle - num_std * std,
+        "bandwidth": (2.0 * num_std * std) / middle,
+    }
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Average True Range with Wilder smoothing"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = close[..., :-1]
+    true_range = np.maximum.reduce([
+        high[..., 1:] - low[..., 1:],
+        np.abs(high[..., 1:] - prev_close),
+        np.abs(low[..., 1:] - prev_close),
+    ])
+    return _pad_front(ema(true_range, span=period, alpha=1.0 / period), close.shape[-1])
+
+
+def vwap(high, low, close, volume) -> np.ndarray:
+    """Cumulative volume-weighted average price over the series"""
+    high, low, close, volume = _as_float(high), _as_float(low), _as_float(close), _as_float(volume)
+    typical = (high + low + close) / 3.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.cumsum(typical * volume, axis=-1) / np.cumsum(volume, axis=-1)
+
+
+def rolling_volatility(close, window: int = 20, periods_per_year: int = 252) -> np.ndarray:
+    """Annualized rolling standard deviation of log returns"""
+    close = _as_float(close)
+    returns = np.diff(np.log(close), axis=-1)
+    if returns.shape[-1] < window:
+        return np.full(close.shape, np.nan)
+    vol = _rolling(returns, window).std(axis=-1, ddof=1) * np.sqrt(periods_per_year)
+    return _pad_front(vol, close.shape[-1])
+
+
+def compute_indicators(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Every indicator for OHLCV columns keyed by Polygon field names (o, h, l, c, v)"""
+    close, high, low, volume = columns["c"], columns["h"], columns["l"], columns["v"]
+    indicators = {
+        "sma_20": sma(close, 20),
+        "sma_50": sma(close, 50),
+        "sma_200": sma(close, 200),
+        "ema_12": ema(close, 12),
+        "ema_26": ema(close, 26),
+        "rsi_14": rsi(close, 14),
+        "atr_14": atr(high, low, close, 14),
+        "vwap": vwap(high, low, close, volume),
+        "volatility_20": rolling_volatility(close, 20),
+    }
+    for name, values in macd(close).items():
+        indicators[name] = values
+    for name, values in bollinger_bands(close).items():
+        indicators[f"bollinger_{name}"] = values
+    return indicators
+
+
+def _latest(values: np.ndarray) -> Optional[float]:
+    value = float(values[-1])
+    return None if np.isnan(value) else round(value, 4)
+
+
+def _signals(latest: Dict[str, Optional[float]], close: float) -> List[str]:
+    """Plain-language readings of the latest indicator values"""
+    signals = []
+    rsi_value = latest.get("rsi_14")
+    if rsi_value is not None:
+        if rsi_value >= 70:
+            signals.append("RSI above 70 (overbought)")
+        elif rsi_value <= 30:
+            signals.append("RSI below 30 (oversold)")
+    for name in ("sma_50", "sma_200"):
+        if latest.get(name) is not None:
+            side = "above" if close > latest[name] else "below"
+            signals.append(f"Price {side} {name.upper().replace('_', ' ')}")
+    if latest.get("macd") is not None and latest.get("signal") is not None:
+        side = "above" if latest["macd"] > latest["signal"] else "below"
+        signals.append(f"MACD {side} signal line")
+    if latest.get("bollinger_upper") is not None:
+        if close > latest["bollinger_upper"]:
+            signals.append("Close above upper Bollinger band")
+        elif close < latest["bollinger_lower"]:
+            signals.append("Close below lower Bollinger band")
+    return signals
+
+
+def bars_to_columns(bars: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Convert Polygon result dicts into OHLCV column arrays"""
+    return {
+        name: np.array([bar.get(name, np.nan) for bar in bars], dtype=np.float64)
+        for name in ("t", "o", "h", "l", "c", "v")
+    }
+
+
+def summarize_indicator_batch(series: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, Dict[str, Any]]:
+    """Latest indicator values and signals for many tickers at once
+
+    Tickers with the same number of bars are stacked into one matrix so each
+    indicator is computed once per group instead of once per ticker.
+    """
+    groups: Dict[int, List[str]] = {}
+    for ticker, columns in series.items():
+        groups.setdefault(len(columns["c"]), []).append(ticker)
+
+    summaries: Dict[str, Dict[str, Any]] = {}
+    for length, tickers in groups.items():
+        if length < 2:
+            for ticker in tickers:
+                summaries[ticker] = {"error": "Not enough bars to compute indicators"}
+            continue
+
+        stacked = {
+            name: np.vstack([series[ticker][name] for ticker in tickers])
+            for name in ("o", "h", "l", "c", "v")
+        }
+        indicators = compute_indicators(stacked)
+
+        for row, ticker in enumerate(tickers):
+            close = float(stacked["c"][row, -1])
+            latest = {name: _latest(values[row]) for name, values in indicators.items()}
+            summaries[ticker] = {
+                "close": close,
+                "bars": length,
+                "indicators": latest,
+                "signals": _signals(latest, close),
+            }
+    return summaries
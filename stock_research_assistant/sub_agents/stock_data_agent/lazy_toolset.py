@@ -0,0 +1,34 @@
+from typing import List, Optional, Union
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset, ToolPredicate
+from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
+from .server_config import polygon_server_params
+
+
+class LazyPolygonToolset(BaseToolset):
+    """Polygon MCPToolset that resolves its server and connects on first use
+    
+    Importing the agent stays cheap: the API key, server command and the
+    MCPToolset itself are only set up when the agent first lists its tools.
+    """
+
+    def __init__(self, tool_filter: Optional[Union[ToolPredicate, List[str]]] = None):
+        super().__init__(tool_filter=tool_filter)
+        self._toolset: Optional[MCPToolset] = None
+
+    def _get_toolset(self) -> MCPToolset:
+        if self._toolset is None:
+            self._toolset = MCPToolset(
+                connection_params=polygon_server_params(),
+                tool_filter=self.tool_filter,
+            )
+        return self._toolset
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[BaseTool]:
+        return await self._get_toolset().get_tools(readonly_context)
+
+    async def close(self):
+        if self._toolset is not None:
+            await self._toolset.close()
+            self._toolset = None
@@ -4,38 +4,42 @@ import os
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime, timedelta
 from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
 from functools import wraps
+from .response_cache import ResponseCache, get_response_cache
+from .session_pool import PooledSession
+from .background_loop import default_call_timeout, get_background_loop
+from .server_config import polygon_server_params, resolve_polygon_api_key
+from .compaction import compact_result
+from .resilience import SessionCheckout, get_call_policy, resilient_call
 
 class PolygonMCPClient:
     """MCP Client for Polygon.io financial data"""
     
-    def __init__(self, polygon_api_key: str):
+    def __init__(self, polygon_api_key: str, cache: Optional[ResponseCache] = None):
         self.polygon_api_key = polygon_api_key
         self.session: Optional[ClientSession] = None
-        self._client = None
+        self._client: Optional[PooledSession] = None
         self._connected = False
+        self._connect_lock = asyncio.Lock()
+        self.cache = cache if cache is not None else get_response_cache()
+        # Every attempt uses this client's one session, restarted first if it has died
+        self._checkout = SessionCheckout(lambda: self._client, self.connect)
         
         # Server parameters for the Polygon MCP server
-        self.server_params = StdioServerParameters(
-            command="uvx",
-            args=[
-                "--from", 
-                "git+https://github.com/polygon-io/mcp_polygon@v0.4.0",
-                "mcp_polygon"
-            ],
-            env={
-                "POLYGON_API_KEY": polygon_api_key,
-                "HOME": os.path.expanduser("~")
-            }
-        )
+        self.server_params = polygon_server_params(polygon_api_key)
     
     async def connect(self):
-        """Establish connection to MCP server"""
-        if not self._connected:
-            self._client = stdio_client(self.server_params)
-            self.session, _ = await self._client.__aenter__()
-            await self.session.initialize()
+        """Establish connection to MCP server, replacing a session that has died or hung"""
+        async with self._connect_lock:
+            if self._connected and self._client is not None and self._client.alive:
+                return
+            if self._client is not None:
+                print("Restarting Polygon MCP server")
+                await self._client.close(timeout=2.0)
+            self._connected = False
+            self._client = PooledSession(self.server_params)
+            await self._client.start()
+            self.session = self._client.session
             self._connected = True
             print("Connected to Polygon MCP server")
     
@@ -43,21 +47,39 @@ class PolygonMCPClient:
         """Disconnect from MCP server"""
         if self._connected and self._client:
             try:
-                await self._client.__aexit__(None, None, None)
-                self._connected = False
-                self.session = None
-                self._client = None
+                await self._client.close()
                 print("Disconnected from Polygon MCP server")
             except Exception as e:
                 print(f"Error disconnecting: {e}")
+            finally:
+                self._connected = False
+                self.session = None
+                self._client = None
     
-    async def call_mcp_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Call MCP tool with automatic connection management"""
-        if not self._connected:
-            await self.connect()
+    async def call_mcp_tool(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        compact: bool = False,
+        token_budget: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Call MCP tool, answering repeats from the response cache
         
+        Pass compact=True when the result goes to a model rather than to code.
+        """
+        if self.cache is None:
+            result = await self._call_mcp_tool_uncached(tool_name, arguments)
+        else:
+            result = await self.cache.get_or_call(tool_name, arguments, self._call_mcp_tool_uncached)
+        if compact:
+            return compact_result(tool_name, result, token_budget)
+        return result
+    
+    async def _call_mcp_tool_uncached(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Call MCP tool with automatic connection management, deadlines and retries"""
         try:
-            result = await self.session.call_tool(tool_name, arguments)
+            # A hedge on the same session would queue behind the slow call
+            result = await resilient_call(tool_name, arguments, self._checkout, get_call_policy()._replace(hedge_after=0))
             
             if result.content and len(result.content) > 0:
                 content = result.content[0]
@@ -76,37 +98,31 @@ class PolygonMCPClient:
         except Exception as e:
             return {"error": f"MCP tool call failed: {str(e)}"}
 
-# Global MCP client instance
+# Global MCP client instance. Its session lives on the background loop, so
+# only await it from coroutines running there (e.g. functions using @mcp_tool).
 _mcp_client = None
 
 def get_mcp_client():
     """Get or create MCP client instance"""
     global _mcp_client
     if _mcp_client is None:
-        polygon_api_key = os.getenv("POLYGON_API_KEY")
-        if not polygon_api_key:
-            raise ValueError("POLYGON_API_KEY environment variable is required")
-        _mcp_client = PolygonMCPClient(polygon_api_key)
+        _mcp_client = PolygonMCPClient(resolve_polygon_api_key())
     return _mcp_client
 
-def mcp_tool(func):
-    """Decorator to handle async MCP tool calls for sync agent functions"""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        # Run the async function in the event loop
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+def mcp_tool(func=None, *, timeout: Optional[float] = None):
+    """Decorator to handle async MCP tool calls for sync agent functions
+    
+    The coroutine runs on the shared background loop that owns the MCP
+    session, so every call reuses the same warm connection.
+    """
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            call_timeout = timeout if timeout is not None else default_call_timeout()
+            return get_background_loop().run(func(*args, **kwargs), timeout=call_timeout)
         
-        if loop.is_running():
-            # If event loop is already running, we need to create a task
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, func(*args, **kwargs))
-                return future.result()
-        else:
-            return loop.run_until_complete(func(*args, **kwargs))
+        return wrapper
     
-    return wrapper
\ No newline at end of file
+    if func is not None:
+        return decorate(func)
+    return decorate
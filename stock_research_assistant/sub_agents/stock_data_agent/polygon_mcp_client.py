@@ -1,37 +1,89 @@
 import asyncio
 import json
-from typing import Dict, List, Optional, Any
+import os
+from typing import AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from .session_pool import PooledSession, PolygonSessionPool, get_session_pool
+from .rate_limiter import TokenBucket, get_concurrency_limit, get_rate_limiter
+from .bar_store import BarStore, get_bar_store
+from .aggregate_planner import RangeRequest, execute_plan
+from .server_config import polygon_server_params, resolve_polygon_api_key
+from .compaction import compact_result
+from .aggregate_stream import BarBuffer, collect_aggregates, stream_aggregates, stream_pages
+from .quote_stream import QuoteFeed, get_quote_feed, quote_max_age
+from .resilience import SessionCheckout, get_call_policy, resilient_call
+import numpy as np
+
+# Largest page Polygon returns for a single aggregates request
+MAX_AGGS_LIMIT = 50000
 
 class PolygonMCPClient:
     """Client for interacting with the Polygon MCP server from polygon-io/mcp_polygon"""
     
-    def __init__(self, polygon_api_key: str):
+    def __init__(
+        self,
+        polygon_api_key: str,
+        pooled: Optional[PooledSession] = None,
+        bar_store: Optional[BarStore] = None,
+        spare_sessions: Optional[Callable[[], AsyncContextManager[PooledSession]]] = None,
+        rate_limiter: Optional[TokenBucket] = None
+    ):
         self.polygon_api_key = polygon_api_key
-        self.session: Optional[ClientSession] = None
-        
-        # Server parameters for the Polygon MCP server
-        self.server_params = StdioServerParameters(
-            command="python",  # or "python3" depending on your system
-            args=["-m", "mcp_polygon"],  # This runs the MCP server
-            env={"POLYGON_API_KEY": polygon_api_key}  # Pass API key to server
-        )
+        # A session passed in (e.g. checked out of the pool) is borrowed, not owned
+        self.pooled: Optional[PooledSession] = pooled
+        self.bar_store = bar_store
+        # Checks out another session for retries and hedged requests
+        self.spare_sessions = spare_sessions
+        # Charged once for every request that goes out, so bar store hits cost nothing
+        self.rate_limiter = rate_limiter
+        self._owned: Optional[PooledSession] = None
+        self._single = SessionCheckout(lambda: self.pooled, self._restart)
+    
+    @property
+    def session(self) -> Optional[ClientSession]:
+        return self.pooled.session if self.pooled else None
     
     async def __aenter__(self):
         """Async context manager entry"""
-        self.stdio_client = stdio_client(self.server_params)
-        self.session, _ = await self.stdio_client.__aenter__()
-        
-        # Initialize the server connection
-        # await self.session.initialize()
+        if self.pooled is None:
+            await self._restart()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        if self.session:
-            await self.stdio_client.__aexit__(exc_type, exc_val, exc_tb)
+        if self._owned:
+            await self._owned.close()
+            self._owned = None
+            self.pooled = None
+    
+    async def _restart(self):
+        """Start a fresh owned session in place of a missing or broken one"""
+        if self.pooled is not None and self._owned is not self.pooled:
+            # Borrowed sessions are replaced by the pool, not here
+            return
+        if self._owned is not None:
+            await self._owned.close(timeout=2.0)
+        self._owned = PooledSession(polygon_server_params(self.polygon_api_key))
+        await self._owned.start()
+        self.pooled = self._owned
+    
+    def _checkout(self, index: int) -> AsyncContextManager[PooledSession]:
+        if index == 0 or self.spare_sessions is None:
+            return self._single(index)
+        return self.spare_sessions()
+    
+    async def _call(self, tool_name: str, arguments: Dict[str, Any]):
+        """Call a tool with a deadline, retries, hedging and the tool's circuit breaker"""
+        policy = get_call_policy()
+        if self.spare_sessions is None:
+            # A hedge on the same session would queue behind the slow call
+            policy = policy._replace(hedge_after=0)
+        # Retries and hedges are charged when they check out a spare session
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        return await resilient_call(tool_name, arguments, self._checkout, policy)
     
     async def get_aggregates(
         self, 
@@ -42,17 +94,102 @@ class PolygonMCPClient:
         to_date: str = None,
         limit: int = 100
     ) -> Dict[str, Any]:
-        """Get aggregate bars for a ticker using the MCP server's get_aggs tool"""
+        """Get aggregate bars for a ticker, served from the bar store when one is attached
+        
+        With a bar store only the date ranges not already on disk are fetched,
+        and the most recent `limit` bars of the range are returned.
+        """
+        # Set default dates if not provided
+        if not to_date:
+            to_date = datetime.now().strftime("%Y-%m-%d")
+        if not from_date:
+            from_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        
+        if self.bar_store is None:
+            return await self._fetch_aggregates(ticker, multiplier, timespan, from_date, to_date, limit)
+        
         try:
-            # Set default dates if not provided
-            if not to_date:
-                to_date = datetime.now().strftime("%Y-%m-%d")
-            if not from_date:
-                from_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+            gaps = self.bar_store.missing_ranges(ticker, multiplier, timespan, from_date, to_date)
+            fetched = await asyncio.gather(*(
+                self._fetch_gap(ticker, multiplier, timespan, gap_from, gap_to)
+                for gap_from, gap_to in gaps
+            ))
+            for (gap_from, gap_to), data in zip(gaps, fetched):
+                if "error" in data:
+                    return data
+                self.bar_store.write(ticker, multiplier, timespan, data.get("results") or [], gap_from, gap_to)
             
-            result = await self.session.call_tool(
+            bars = self.bar_store.read(ticker, multiplier, timespan, from_date, to_date)
+        except Exception as e:
+            return {"error": f"Failed to get aggregates for {ticker}: {str(e)}"}
+        
+        if limit:
+            bars = bars[-limit:]
+        return {
+            "ticker": ticker.upper(),
+            "status": "OK",
+            "results": bars,
+            "resultsCount": len(bars),
+            "fetched_ranges": [list(gap) for gap in gaps]
+        }
+    
+    async def _fetch_gap(
+        self,
+        ticker: str,
+        multiplier: int,
+        timespan: str,
+        from_date: str,
+        to_date: str
+    ) -> Dict[str, Any]:
+        """Every bar in a range missing from the bar store, paging past the per-request limit
+
+        The range is only recorded as covered once it has been fetched to the
+        end, so a long minute or hour range must not stop at its first page.
+        """
+        bars: List[Dict[str, Any]] = []
+        try:
+            async for page in stream_pages(
+                self._fetch_aggregates, ticker, multiplier, timespan, from_date, to_date, page_limit=MAX_AGGS_LIMIT
+            ):
+                bars.extend(page)
+        except RuntimeError as e:
+            return {"error": str(e)}
+        return {"results": bars}
+    
+    def stream_aggregates(
+        self,
+        ticker: str,
+        multiplier: int = 1,
+        timespan: str = "day",
+        from_date: str = None,
+        to_date: str = None,
+        page_limit: int = MAX_AGGS_LIMIT,
+        rate_limiter: Optional[TokenBucket] = None
+    ) -> AsyncIterator[Dict[str, np.ndarray]]:
+        """Stream every bar in the range page by page as column arrays, with no limit cap"""
+        if not to_date:
+            to_date = datetime.now().strftime("%Y-%m-%d")
+        if not from_date:
+            from_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        return stream_aggregates(
+            self._fetch_aggregates, ticker, multiplier, timespan, from_date, to_date,
+            page_limit=page_limit, rate_limiter=rate_limiter
+        )
+    
+    async def _fetch_aggregates(
+        self,
+        ticker: str,
+        multiplier: int,
+        timespan: str,
+        from_date: str,
+        to_date: str,
+        limit: int
+    ) -> Dict[str, Any]:
+        """Fetch aggregate bars from the MCP server's get_aggs tool"""
+        try:
+            result = await self._call(
                 "get_aggs",
-                arguments={
+                {
                     "ticker": ticker.upper(),
                     "multiplier": multiplier,
                     "timespan": timespan,
@@ -74,15 +211,25 @@ class PolygonMCPClient:
         except Exception as e:
             return {"error": f"Failed to get aggregates for {ticker}: {str(e)}"}
     
-    async def call_tool_safe(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Safely call any tool on the MCP server"""
+    async def call_tool_safe(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        compact: bool = False,
+        token_budget: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Safely call any tool on the MCP server
+        
+        Pass compact=True when the result goes to a model rather than to code.
+        """
         try:
-            result = await self.session.call_tool(tool_name, arguments)
+            result = await self._call(tool_name, arguments)
             
             if result.content and len(result.content) > 0:
                 content = result.content[0]
                 if hasattr(content, 'text'):
-                    return json.loads(content.text)
+                    decoded = json.loads(content.text)
+                    return compact_result(tool_name, decoded, token_budget) if compact else decoded
                 else:
                     return content
             return {}
@@ -93,12 +240,80 @@ class PolygonMCPClient:
 class StockDataService:
     """Service class for stock data operations using Polygon MCP"""
     
-    def __init__(self, polygon_api_key: str):
+    def __init__(
+        self,
+        polygon_api_key: str,
+        pool: Optional[PolygonSessionPool] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_concurrency: Optional[int] = None,
+        quote_feed: Optional[QuoteFeed] = None
+    ):
         self.polygon_api_key = polygon_api_key
+        self._pool = pool
+        self._server_params: Optional[StdioServerParameters] = None
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_concurrency = max_concurrency or int(os.getenv("POLYGON_MAX_CONCURRENCY", "8"))
+        self.quote_feed = quote_feed or get_quote_feed()
+        self.quote_max_age = quote_max_age()
+    
+    @property
+    def pool(self) -> PolygonSessionPool:
+        """Session pool shared by every service method"""
+        if self._pool is not None:
+            return self._pool
+        # The process-wide pool is per event loop, so look it up on every use
+        if self._server_params is None:
+            self._server_params = polygon_server_params(self.polygon_api_key)
+        return get_session_pool(self._server_params)
+    
+    async def warm_up(self):
+        """Open the pooled MCP sessions ahead of the first request"""
+        await self.pool.start()
+    
+    @asynccontextmanager
+    async def client(self):
+        """Borrow a warm pooled session wrapped in a PolygonMCPClient"""
+        async with get_concurrency_limit().slot(), self.pool.session() as pooled:
+            yield PolygonMCPClient(
+                self.polygon_api_key,
+                pooled=pooled,
+                bar_store=get_bar_store(),
+                spare_sessions=self._spare_session,
+                rate_limiter=self.rate_limiter
+            )
+    
+    @asynccontextmanager
+    async def _spare_session(self):
+        """Another pooled session for a retry or hedge, paced by the rate limiter like any request
+        
+        It runs inside the slot its call already holds in the concurrency limit.
+        """
+        await self.rate_limiter.acquire()
+        async with self.pool.session() as pooled:
+            yield pooled
+    
+    def live_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Fresh snapshot from the quote stream, subscribing the ticker when it has none"""
+        if self.quote_feed is None:
+            return None
+        quote = self.quote_feed.table.get(symbol, max_age=self.quote_max_age)
+        if quote is None:
+            # Later lookups of this ticker are then served from the stream
+            self.quote_feed.subscribe([symbol])
+        return quote
+    
+    def live_day_bar(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """The ticker's still-forming session bar from the quote stream, if it is fresh"""
+        if self.quote_feed is None:
+            return None
+        return self.quote_feed.table.day_bar(symbol, max_age=self.quote_max_age)
     
     async def get_stock_quote(self, symbol: str) -> Dict[str, Any]:
-        """Get current stock data (latest daily bar)"""
-        async with PolygonMCPClient(self.polygon_api_key) as client:
+        """Get current stock data: the streamed snapshot when fresh, else the latest daily bar"""
+        live = self.live_quote(symbol)
+        if live is not None:
+            return live
+        async with self.client() as client:
             # Get the latest daily data
             data = await client.get_aggregates(
                 ticker=symbol,
@@ -109,22 +324,26 @@ class StockDataService:
             
             # Transform the data to include current price info
             if "results" in data and data["results"]:
-                latest = data["results"][-1]
-                return {
-                    "symbol": symbol.upper(),
-                    "price": latest.get("c"),  # close price
-                    "open": latest.get("o"),
-                    "high": latest.get("h"), 
-                    "low": latest.get("l"),
-                    "volume": latest.get("v"),
-                    "timestamp": latest.get("t"),
-                    "date": datetime.fromtimestamp(latest.get("t", 0) / 1000).strftime("%Y-%m-%d") if latest.get("t") else None
-                }
+                return self._quote_from_bar(symbol, data["results"][-1])
             return data
     
+    @staticmethod
+    def _quote_from_bar(symbol: str, latest: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a daily bar as a quote"""
+        return {
+            "symbol": symbol.upper(),
+            "price": latest.get("c"),  # close price
+            "open": latest.get("o"),
+            "high": latest.get("h"), 
+            "low": latest.get("l"),
+            "volume": latest.get("v"),
+            "timestamp": latest.get("t"),
+            "date": datetime.fromtimestamp(latest.get("t", 0) / 1000).strftime("%Y-%m-%d") if latest.get("t") else None
+        }
+    
     async def get_historical_data(self, symbol: str, days: int = 30) -> Dict[str, Any]:
         """Get historical stock data"""
-        async with PolygonMCPClient(self.polygon_api_key) as client:
+        async with self.client() as client:
             end_date = datetime.now().strftime("%Y-%m-%d")
             start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
             
@@ -137,9 +356,45 @@ class StockDataService:
                 limit=days
             )
     
+    async def stream_history(
+        self,
+        symbol: str,
+        from_date: str,
+        to_date: str,
+        multiplier: int = 1,
+        timespan: str = "minute"
+    ) -> AsyncIterator[Dict[str, np.ndarray]]:
+        """Stream a long bar history page by page; each page is usable as soon as it arrives"""
+        # Pages are fetched one after another, so the stream holds a single request slot
+        async with get_concurrency_limit().slot(), self.pool.session() as pooled:
+            client = PolygonMCPClient(
+                self.polygon_api_key, pooled=pooled, spare_sessions=self._spare_session, rate_limiter=self.rate_limiter
+            )
+            async for chunk in client.stream_aggregates(symbol, multiplier, timespan, from_date, to_date):
+                yield chunk
+    
+    async def get_bar_history(
+        self,
+        symbol: str,
+        from_date: str,
+        to_date: str,
+        multiplier: int = 1,
+        timespan: str = "minute",
+        max_bars: Optional[int] = None
+    ) -> BarBuffer:
+        """Pull a long bar history into a struct-of-arrays buffer holding at most the newest `max_bars` bars
+        
+        max_bars defaults to POLYGON_HISTORY_MAX_BARS; 0 keeps every bar.
+        """
+        if max_bars is None:
+            max_bars = int(os.getenv("POLYGON_HISTORY_MAX_BARS", "1000000"))
+        return await collect_aggregates(
+            self.stream_history(symbol, from_date, to_date, multiplier, timespan), max_bars=max_bars or None
+        )
+    
     async def get_intraday_data(self, symbol: str, hours: int = 24) -> Dict[str, Any]:
         """Get intraday data (hourly bars)"""
-        async with PolygonMCPClient(self.polygon_api_key) as client:
+        async with self.client() as client:
             end_date = datetime.now().strftime("%Y-%m-%d")
             start_date = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d")  # Get 2 days to ensure we have enough data
             
@@ -152,28 +407,69 @@ class StockDataService:
                 limit=hours
             )
     
-    async def get_multiple_quotes(self, symbols: List[str]) -> Dict[str, Any]:
-        """Get quotes for multiple stocks"""
-        results = {}
-        async with PolygonMCPClient(self.polygon_api_key) as client:
-            for symbol in symbols:
-                quote_data = await self.get_stock_quote(symbol)
-                results[symbol.upper()] = quote_data
-                
-                # Add small delay to avoid rate limits
-                await asyncio.sleep(0.1)
+    async def _fan_out(
+        self,
+        symbols: List[str],
+        fetch: Callable[[str], Awaitable[Dict[str, Any]]],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Run `fetch` for every symbol with bounded concurrency, collecting errors per symbol"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
         
-        return results
+        async def run(symbol: str):
+            async with semaphore:
+                try:
+                    data = await fetch(symbol)
+                except Exception as e:
+                    errors[symbol] = str(e)
+                    return
+                if isinstance(data, dict) and "error" in data:
+                    errors[symbol] = data["error"]
+                else:
+                    results[symbol] = data
+        
+        # Deduplicate while keeping the caller's order
+        unique = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        tasks = [asyncio.create_task(run(symbol)) for symbol in unique]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        # Anything that neither succeeded nor failed ran out of time
+        for symbol in unique:
+            if symbol not in results and symbol not in errors:
+                errors[symbol] = f"Timed out after {timeout}s"
+        
+        return {
+            "results": {symbol: results[symbol] for symbol in unique if symbol in results},
+            "errors": errors,
+            "requested": len(unique),
+            "succeeded": len(results),
+            "partial": bool(errors)
+        }
     
-    async def get_market_data_batch(self, symbols: List[str], timespan: str = "day", days: int = 7) -> Dict[str, Any]:
+    async def get_multiple_quotes(self, symbols: List[str], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Get quotes for multiple stocks"""
+        return await self._fan_out(symbols, self.get_stock_quote, timeout=timeout)
+    
+    async def get_market_data_batch(
+        self,
+        symbols: List[str],
+        timespan: str = "day",
+        days: int = 7,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
         """Get market data for multiple symbols"""
-        results = {}
-        async with PolygonMCPClient(self.polygon_api_key) as client:
-            end_date = datetime.now().strftime("%Y-%m-%d")
-            start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-            
-            for symbol in symbols:
-                data = await client.get_aggregates(
+        end_date = datetime.now().strftime("%Y-%m-%d")
+        start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        
+        async def fetch(symbol: str) -> Dict[str, Any]:
+            async with self.client() as client:
+                return await client.get_aggregates(
                     ticker=symbol,
                     multiplier=1,
                     timespan=timespan,
@@ -181,39 +477,100 @@ class StockDataService:
                     to_date=end_date,
                     limit=days
                 )
-                results[symbol.upper()] = data
-                
-                # Add small delay to avoid rate limits
-                await asyncio.sleep(0.1)
         
-        return results
+        return await self._fan_out(symbols, fetch, timeout=timeout)
+
+    async def get_news_batch(
+        self,
+        symbols: List[str],
+        days: int = 7,
+        limit: int = 50,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Get recent news items for multiple symbols"""
+        since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+        async def fetch(symbol: str) -> Dict[str, Any]:
+            async with self.client() as client:
+                data = await client.call_tool_safe(
+                    "list_ticker_news",
+                    # mcp_polygon passes range filters through as raw query parameters
+                    {"ticker": symbol, "limit": limit, "params": {"published_utc.gte": since}}
+                )
+            if "error" in data:
+                return data
+            # Keep the window even if the server ignores the date filter
+            return [item for item in data.get("results") or [] if (item.get("published_utc") or since) >= since]
+
+        return await self._fan_out(symbols, fetch, timeout=timeout)
+
+    async def _fetch_range(
+        self,
+        ticker: str,
+        multiplier: int,
+        timespan: str,
+        from_date: str,
+        to_date: str
+    ) -> Dict[str, Any]:
+        """Fetch every bar in a date range on its own pooled session"""
+        async with self.client() as client:
+            return await client.get_aggregates(
+                ticker=ticker,
+                multiplier=multiplier,
+                timespan=timespan,
+                from_date=from_date,
+                to_date=to_date,
+                limit=MAX_AGGS_LIMIT
+            )
     
     async def get_comprehensive_analysis(self, symbol: str) -> Dict[str, Any]:
-        """Get comprehensive stock analysis data"""
+        """Get comprehensive stock analysis data
+        
+        Every timeframe is derived from one shared daily series: overlapping
+        ranges are merged into a single fetch before anything goes upstream.
+        """
         try:
+            now = datetime.now()
+            today = now.strftime("%Y-%m-%d")
+            days_ago = lambda days: (now - timedelta(days=days)).strftime("%Y-%m-%d")
+            
             # Get multiple timeframes for analysis
-            current_quote = await self.get_stock_quote(symbol)
-            daily_data = await self.get_historical_data(symbol, 30)
-            weekly_data = await self.get_historical_data(symbol, 90)
+            series = await execute_plan(
+                [
+                    RangeRequest("daily_trend", symbol, days_ago(30), today),
+                    RangeRequest("weekly_trend", symbol, days_ago(90), today, resample="week"),
+                    RangeRequest("latest", symbol, days_ago(7), today),
+                ],
+                self._fetch_range
+            )
+            
+            latest = series["latest"]
+            live = self.live_quote(symbol)
+            if live is not None:
+                current_quote = live
+            elif latest.get("results"):
+                current_quote = self._quote_from_bar(symbol, latest["results"][-1])
+            else:
+                current_quote = latest
             
             analysis = {
                 "symbol": symbol.upper(),
                 "current_quote": current_quote,
-                "daily_trend": daily_data,
-                "weekly_trend": weekly_data,
-                "analysis_timestamp": datetime.now().isoformat()
+                "daily_trend": series["daily_trend"],
+                "weekly_trend": series["weekly_trend"],
+                "analysis_timestamp": now.isoformat()
             }
             
             return analysis
         except Exception as e:
             return {"error": f"Failed to get comprehensive analysis for {symbol}: {str(e)}"}
 
-# Initialize service instance
+# Global service instance
+_stock_data_service = None
+
 def get_stock_data_service():
     """Get stock data service instance"""
-    import os
-    polygon_api_key = os.getenv("POLYGON_API_KEY")
-    if not polygon_api_key:
-        raise ValueError("POLYGON_API_KEY environment variable is required")
-    
-    return StockDataService(polygon_api_key)
\ No newline at end of file
+    global _stock_data_service
+    if _stock_data_service is None:
+        _stock_data_service = StockDataService(resolve_polygon_api_key())
+    return _stock_data_service
\ No newline at end of file
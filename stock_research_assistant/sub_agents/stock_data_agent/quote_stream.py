@@ -0,0 +1,414 @@
+"""Streaming trade/quote feed and the in-memory snapshot table it keeps current.
+
+QuoteFeed holds one websocket connection to Polygon's stocks feed (or the
+local replay server in benchmarks/replay_quote_server.py) on the background
+loop. It subscribes to trades, quotes and minute aggregates, and applies
+every event to a SnapshotTable. The table keeps one row per ticker in a
+single array plus a per-ticker sequence number, so a quote read is a dict
+lookup and one row copy. The table holds no bar history.
+
+    POLYGON_QUOTE_STREAM=1               enable the feed (real-time websockets need a paid Polygon plan)
+    POLYGON_QUOTE_STREAM_URL=...         feed URL (default wss://socket.polygon.io/stocks)
+    POLYGON_QUOTE_STREAM_TICKERS=A,B     tickers subscribed at start; "*" subscribes the whole market
+    POLYGON_QUOTE_MAX_AGE=60             seconds a snapshot is served before falling back to MCP
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+import numpy as np
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+from .background_loop import get_background_loop
+from .bar_store import MARKET_TZ, date_to_ms
+from .server_config import resolve_polygon_api_key
+
+DEFAULT_STREAM_URL = "wss://socket.polygon.io/stocks"
+
+# Fields of a snapshot row. Rows live in one float64 matrix so a row reads and
+# writes in one operation; timestamps and counters stay exact below 2**53.
+SNAPSHOT_FIELDS = (
+    "price", "size", "bid", "bid_size", "ask", "ask_size",
+    "open", "high", "low", "volume", "vwap", "notional",
+    "trade_time", "updated", "day", "seq",
+)
+(
+    PRICE, SIZE, BID, BID_SIZE, ASK, ASK_SIZE,
+    OPEN, HIGH, LOW, VOLUME, VWAP, NOTIONAL,
+    TRADE_TIME, UPDATED, DAY, SEQ,
+) = range(len(SNAPSHOT_FIELDS))
+
+# Event channels subscribed per ticker: trades, quotes and minute aggregates
+CHANNELS = ("T", "Q", "AM")
+
+
+class SnapshotTable:
+    """Latest trade, quote and session totals per ticker, one row per ticker
+
+    Rows are never removed, so a ticker keeps its row for the process
+    lifetime. `seq` counts the events applied to a row, which tells readers
+    whether a ticker changed since they last looked. Writes come from the
+    feed's loop thread and reads from any thread, so both take the lock.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._data = self._empty(capacity)
+        self.index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Malformed feed events skipped by apply()
+        self.rejected = 0
+        # Market-day bounds of the most recent event, so most events skip date conversion
+        self._day_bounds = (0, 0, 0)
+
+    @staticmethod
+    def _empty(capacity: int) -> np.ndarray:
+        data = np.full((capacity, len(SNAPSHOT_FIELDS)), np.nan)
+        data[:, TRADE_TIME:] = 0
+        return data
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self.index
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def _row(self, symbol: str) -> int:
+        row = self.index.get(symbol)
+        if row is not None:
+            return row
+        row = len(self.index)
+        if row >= self.capacity:
+            grown = self._empty(self.capacity * 2)
+            grown[:row] = self._data[:row]
+            self._data = grown
+        self.index[symbol] = row
+        return row
+
+    def _market_day(self, t_ms: int) -> int:
+        """Ordinal of the New York trading date containing t_ms"""
+        start, end, ordinal = self._day_bounds
+        if start <= t_ms < end:
+            return ordinal
+        day = datetime.fromtimestamp(t_ms / 1000, MARKET_TZ).date()
+        self._day_bounds = (date_to_ms(day), date_to_ms(day + timedelta(days=1)), day.toordinal())
+        return day.toordinal()
+
+    def _start_day(self, values: List[float], t: int):
+        """Reset session totals on a ticker's first event of a new trading day"""
+        day = self._market_day(t)
+        if values[DAY] == day:
+            return
+        values[DAY] = day
+        values[OPEN] = values[HIGH] = values[LOW] = values[VWAP] = math.nan
+        values[VOLUME] = values[NOTIONAL] = 0.0
+
+    def _apply_trade(self, values: List[float], event: Dict[str, Any], t: int):
+        price, size = float(event["p"]), float(event.get("s") or 0)
+        self._start_day(values, t)
+        # Late prints still count toward volume but never replace a newer last price
+        if t >= values[TRADE_TIME]:
+            values[PRICE], values[SIZE], values[TRADE_TIME] = price, size, t
+        if math.isnan(values[OPEN]):
+            values[OPEN] = price
+        # Comparisons against NaN are false, so an empty session takes the first price
+        if not price <= values[HIGH]:
+            values[HIGH] = price
+        if not price >= values[LOW]:
+            values[LOW] = price
+        values[VOLUME] += size
+        values[NOTIONAL] += price * size
+        if values[VOLUME] > 0:
+            values[VWAP] = values[NOTIONAL] / values[VOLUME]
+
+    @staticmethod
+    def _apply_quote(values: List[float], event: Dict[str, Any]):
+        values[BID] = event.get("bp", math.nan)
+        values[BID_SIZE] = event.get("bs", math.nan)
+        values[ASK] = event.get("ap", math.nan)
+        values[ASK_SIZE] = event.get("as", math.nan)
+
+    def _apply_aggregate(self, values: List[float], event: Dict[str, Any], t: int):
+        """Minute aggregates carry authoritative session open, volume and VWAP"""
+        self._start_day(values, t)
+        if event.get("op") is not None:
+            values[OPEN] = event["op"]
+        if event.get("h") is not None and not event["h"] <= values[HIGH]:
+            values[HIGH] = event["h"]
+        if event.get("l") is not None and not event["l"] >= values[LOW]:
+            values[LOW] = event["l"]
+        if event.get("av") is not None and event["av"] >= values[VOLUME]:
+            values[VOLUME] = event["av"]
+            if event.get("a") is not None:
+                values[VWAP] = event["a"]
+                values[NOTIONAL] = event["a"] * event["av"]
+        if t >= values[TRADE_TIME] and event.get("c") is not None:
+            values[PRICE], values[TRADE_TIME] = event["c"], t
+
+    def apply(self, events: Iterable[Dict[str, Any]]) -> int:
+        """Apply feed events (Polygon T, Q, A and AM messages); returns how many were applied"""
+        applied = 0
+        with self._lock:
+            for event in events:
+                try:
+                    kind = event.get("ev")
+                    symbol = event.get("sym")
+                    if not symbol or kind not in ("T", "Q", "A", "AM"):
+                        continue
+                    symbol = symbol.upper()
+                    # Worked on a copy, so a new ticker only gets a row once its event applies
+                    row = self.index.get(symbol)
+                    values = (self._empty(1)[0] if row is None else self._data[row]).tolist()
+                    t = int(event.get("t") or event.get("e") or time.time() * 1000)
+                    if kind == "T":
+                        self._apply_trade(values, event, t)
+                    elif kind == "Q":
+                        self._apply_quote(values, event)
+                    else:
+                        self._apply_aggregate(values, event, t)
+                    values = np.array(values, dtype=float)
+                except (AttributeError, KeyError, TypeError, ValueError):
+                    # A malformed event is dropped; the rest of the message still applies
+                    self.rejected += 1
+                    continue
+                if row is None:
+                    row = self._row(symbol)
+                if t > values[UPDATED]:
+                    values[UPDATED] = t
+                values[SEQ] += 1
+                self._data[row] = values
+                applied += 1
+        return applied
+
+    def seq(self, symbol: str) -> int:
+        """Events applied to a ticker so far; 0 for tickers never seen"""
+        row = self.index.get(symbol.upper())
+        return 0 if row is None else int(self._data[row, SEQ])
+
+    def get(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Latest snapshot of a ticker shaped like StockDataService quotes, or None when unknown or stale"""
+        symbol = symbol.upper()
+        with self._lock:
+            row = self.index.get(symbol)
+            if row is None:
+                return None
+            values = self._data[row].tolist()
+        if math.isnan(values[PRICE]):
+            return None
+        if max_age is not None and time.time() * 1000 - values[UPDATED] > max_age * 1000:
+            return None
+
+        def number(field: int) -> Optional[float]:
+            return None if math.isnan(values[field]) else values[field]
+
+        return {
+            "symbol": symbol,
+            "price": values[PRICE],
+            "open": number(OPEN),
+            "high": number(HIGH),
+            "low": number(LOW),
+            "volume": values[VOLUME],
+            "vwap": number(VWAP),
+            "bid": number(BID),
+            "ask": number(ASK),
+            "bid_size": number(BID_SIZE),
+            "ask_size": number(ASK_SIZE),
+            "timestamp": int(values[TRADE_TIME]),
+            "date": date.fromordinal(int(values[DAY])).isoformat() if values[DAY] else None,
+            "seq": int(values[SEQ]),
+            "source": "stream",
+        }
+
+    def day_bar(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The ticker's current session as a Polygon daily bar, or None when unknown or stale"""
+        quote = self.get(symbol, max_age)
+        if quote is None or quote["date"] is None or quote["open"] is None:
+            return None
+        return {
+            "t": date_to_ms(date.fromisoformat(quote["date"])),
+            "o": quote["open"],
+            "h": quote["high"],
+            "l": quote["low"],
+            "c": quote["price"],
+            "v": quote["volume"],
+            "vw": quote["vwap"],
+        }
+
+    def day_bars(self, day: date) -> List[Dict[str, Any]]:
+        """Every ticker's session bar for `day`, shaped like grouped daily results"""
+        with self._lock:
+            data = self._data[:len(self.index)].copy()
+            tickers = list(self.index)
+        rows = np.flatnonzero((data[:, DAY] == day.toordinal()) & ~np.isnan(data[:, PRICE]) & ~np.isnan(data[:, OPEN]))
+        t = date_to_ms(day)
+        return [
+            {
+                "T": tickers[row],
+                "t": t,
+                "o": data[row, OPEN],
+                "h": data[row, HIGH],
+                "l": data[row, LOW],
+                "c": data[row, PRICE],
+                "v": data[row, VOLUME],
+                "vw": data[row, VWAP],
+            }
+            for row in rows.tolist()
+        ]
+
+
+def with_live_bar(columns: Dict[str, np.ndarray], bar: Optional[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """OHLCV columns with the still-forming session bar replacing or extending the last bar"""
+    if bar is None or not len(columns["t"]) or bar["t"] < columns["t"][-1]:
+        return columns
+    if bar["t"] == columns["t"][-1]:
+        merged = {name: values.copy() for name, values in columns.items()}
+        for name in merged:
+            if bar.get(name) is not None:
+                merged[name][-1] = bar[name]
+        return merged
+    return {name: np.append(values, bar.get(name, np.nan)) for name, values in columns.items()}
+
+
+class QuoteFeed:
+    """Websocket client for Polygon's stocks feed that keeps a SnapshotTable current
+
+    Runs on the background loop and reconnects with jittered exponential
+    backoff, resubscribing to everything requested so far. A rejected API key
+    stops the feed instead of retrying.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        url: str = DEFAULT_STREAM_URL,
+        table: Optional[SnapshotTable] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0
+    ):
+        self.api_key = api_key
+        self.url = url
+        self.table = table or SnapshotTable()
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.symbols: Set[str] = set()
+        self.connected = threading.Event()
+        self._ws = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Future] = None
+
+    @property
+    def covers_market(self) -> bool:
+        """Whether the feed is subscribed to every ticker"""
+        return "*" in self.symbols
+
+    @staticmethod
+    def _params(symbols: Iterable[str]) -> str:
+        return ",".join(f"{channel}.{symbol}" for symbol in sorted(symbols) for channel in CHANNELS)
+
+    def start(self):
+        """Start the feed on the background loop if it is not already running"""
+        if self._task is not None and not self._task.done():
+            return
+        background = get_background_loop()
+        self._loop = background.loop
+        self._task = background.submit(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.connected.clear()
+
+    def subscribe(self, symbols: Iterable[str]):
+        """Add tickers to the subscription; safe to call from any thread"""
+        new = {symbol.upper() for symbol in symbols} - self.symbols
+        if not new:
+            return
+        # Rebound rather than mutated so the loop thread can iterate the old set safely
+        self.symbols = self.symbols | new
+        if self._ws is not None and self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._send("subscribe", new), self._loop)
+
+    async def _send(self, action: str, symbols: Iterable[str]):
+        try:
+            await self._ws.send(json.dumps({"action": action, "params": self._params(symbols)}))
+        except (ConnectionClosed, AttributeError):
+            # The reconnect path resubscribes everything in self.symbols
+            pass
+
+    async def _authenticate(self, ws):
+        """Wait for the connected status, then authenticate; raises PermissionError on a rejected key"""
+        await ws.recv()
+        await ws.send(json.dumps({"action": "auth", "params": self.api_key}))
+        while True:
+            for event in json.loads(await ws.recv()):
+                if event.get("ev") != "status":
+                    continue
+                if event.get("status") == "auth_success":
+                    return
+                if event.get("status") == "auth_failed":
+                    raise PermissionError(event.get("message") or "Polygon stream authentication failed")
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with connect(self.url, max_size=None, ping_interval=20) as ws:
+                    await self._authenticate(ws)
+                    self._ws = ws
+                    if self.symbols:
+                        await self._send("subscribe", self.symbols)
+                    self.connected.set()
+                    delay = self.reconnect_delay
+                    async for raw in ws:
+                        try:
+                            events = json.loads(raw)
+                            self.table.apply(events if isinstance(events, list) else [events])
+                        except Exception as e:
+                            # One bad message must not take the connection down with it
+                            print(f"Skipping malformed Polygon quote stream message ({type(e).__name__}: {e})")
+            except asyncio.CancelledError:
+                raise
+            except PermissionError as e:
+                print(f"Polygon quote stream stopped: {e}")
+                return
+            except (OSError, ConnectionClosed, InvalidHandshake, TimeoutError, ValueError) as e:
+                print(f"Polygon quote stream disconnected ({type(e).__name__}: {e}); reconnecting in {delay:.1f}s")
+            finally:
+                self._ws = None
+                self.connected.clear()
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+
+def quote_max_age() -> float:
+    return float(os.getenv("POLYGON_QUOTE_MAX_AGE", "60"))
+
+
+# Global quote feed instance
+_quote_feed = None
+_quote_feed_lock = threading.Lock()
+
+def get_quote_feed() -> Optional[QuoteFeed]:
+    """Get or start the quote feed, or None when streaming is disabled"""
+    global _quote_feed
+    if os.getenv("POLYGON_QUOTE_STREAM", "0") != "1":
+        return None
+    with _quote_feed_lock:
+        if _quote_feed is None:
+            _quote_feed = QuoteFeed(
+                resolve_polygon_api_key(),
+                url=os.getenv("POLYGON_QUOTE_STREAM_URL") or DEFAULT_STREAM_URL,
+            )
+            tickers = os.getenv("POLYGON_QUOTE_STREAM_TICKERS", "")
+            _quote_feed.subscribe(t.strip() for t in tickers.split(",") if t.strip())
+            _quote_feed.start()
+    return _quote_feed
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter sized to the Polygon plan's request quota"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        # rate is tokens per second; a rate of 0 or less disables limiting
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @classmethod
+    def per_minute(cls, requests: float, burst: Optional[float] = None) -> "TokenBucket":
+        """Build a limiter from a requests-per-minute quota"""
+        return cls(requests / 60.0, burst)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and consume them"""
+        if self.rate <= 0:
+            return
+        # Reserve the tokens immediately and sleep off any debt. Callers are
+        # served in arrival order without holding a lock across the sleep.
+        self._refill()
+        self._tokens -= tokens
+        if self._tokens < 0:
+            try:
+                await asyncio.sleep(-self._tokens / self.rate)
+            except asyncio.CancelledError:
+                # The request will not be made, so give its reservation back
+                self._refill()
+                self._tokens = min(self.capacity, self._tokens + tokens)
+                raise
+
+    @property
+    def available(self) -> float:
+        """Tokens that could be consumed right now without waiting"""
+        self._refill()
+        return max(0.0, self._tokens)
+
+
+class ConcurrencyLimit:
+    """Caps Polygon requests in flight across the process; a limit of 0 or less disables it"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit) if limit > 0 else None
+
+    async def acquire(self):
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+
+    def release(self):
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one request slot for the duration of the block"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+# Global rate limiter instance, shared because the quota is per API key
+_rate_limiter = None
+_concurrency_limit = None
+
+def get_rate_limiter() -> TokenBucket:
+    """Get or create the process-wide Polygon rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        per_minute = float(os.getenv("POLYGON_REQUESTS_PER_MINUTE", "600"))
+        burst = os.getenv("POLYGON_RATE_BURST")
+        _rate_limiter = TokenBucket.per_minute(per_minute, float(burst) if burst else None)
+    return _rate_limiter
+
+def get_concurrency_limit() -> ConcurrencyLimit:
+    """Get or create the process-wide cap on Polygon requests in flight"""
+    global _concurrency_limit
+    if _concurrency_limit is None:
+        _concurrency_limit = ConcurrencyLimit(int(os.getenv("POLYGON_MAX_IN_FLIGHT", "0")))
+    return _concurrency_limit
+
+def set_concurrency_limit(limit: int) -> ConcurrencyLimit:
+    """Replace the process-wide cap, e.g. from a batch run's --polygon-concurrency"""
+    global _concurrency_limit
+    _concurrency_limit = ConcurrencyLimit(limit)
+    return _concurrency_limit
@@ -0,0 +1,298 @@
+"""Deadlines, retries, hedged requests and circuit breaking for MCP tool calls.
+
+Every attempt gets a deadline. A timed-out or disconnected attempt marks its
+session broken, so the pool drops it and a fresh server subprocess takes its
+place. Idempotent tools (get_*, list_*) are retried with full-jitter
+exponential backoff after timeouts, transport errors, rate limits and server
+errors. They may also be hedged: if the first attempt is slow, a duplicate
+goes to another pooled session and the first answer wins. Each tool has a
+circuit breaker that fails calls fast after repeated failures, so a broken
+upstream is not hammered.
+
+    POLYGON_MCP_CALL_TIMEOUT=30        seconds one attempt may take, waiting for a session included
+    POLYGON_MCP_RETRIES=2              extra attempts for idempotent tools
+    POLYGON_MCP_RETRY_BACKOFF=0.25     base backoff; retry n sleeps up to base * 2**n
+    POLYGON_MCP_HEDGE_AFTER=0          seconds before a hedged duplicate is sent (0 = off)
+    POLYGON_MCP_BREAKER_FAILURES=5     consecutive failures that open a tool's circuit
+    POLYGON_MCP_BREAKER_RESET=30       seconds an open circuit rejects calls before a trial call
+"""
+import asyncio
+import os
+import random
+import re
+import time
+from contextlib import AbstractAsyncContextManager, AsyncExitStack
+from typing import Any, Callable, Dict, NamedTuple, Optional
+import anyio
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, CallToolResult
+from .session_pool import PooledSession
+from ...telemetry import traced_mcp_call
+
+# Error texts from the Polygon server that are worth another attempt
+TRANSIENT_ERROR_PATTERN = re.compile(r"\b(429|5\d\d)\b|too many requests|timed? ?out|temporarily|unavailable", re.IGNORECASE)
+
+# A checkout yields the session for one attempt; index 0 is the first attempt
+Checkout = Callable[[int], AbstractAsyncContextManager]
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a tool whose circuit is open"""
+
+
+class TransientToolError(RuntimeError):
+    """A tool error result, such as a rate limit or server error, that may succeed on retry"""
+
+
+class CallPolicy(NamedTuple):
+    """How one MCP tool call is bounded, retried and hedged"""
+    timeout: float = 30.0
+    retries: int = 2
+    backoff: float = 0.25
+    max_backoff: float = 5.0
+    hedge_after: float = 0.0
+
+    @classmethod
+    def from_env(cls) -> "CallPolicy":
+        return cls(
+            timeout=float(os.getenv("POLYGON_MCP_CALL_TIMEOUT", "30")),
+            retries=int(os.getenv("POLYGON_MCP_RETRIES", "2")),
+            backoff=float(os.getenv("POLYGON_MCP_RETRY_BACKOFF", "0.25")),
+            hedge_after=float(os.getenv("POLYGON_MCP_HEDGE_AFTER", "0")),
+        )
+
+    def delay(self, retry: int) -> float:
+        """Full-jitter backoff before the given retry (0-based)"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retry))
+
+
+class CircuitBreaker:
+    """Closed, open or half-open circuit around one tool
+
+    After `failure_threshold` consecutive failed calls (each counted after
+    its retries) the circuit opens and calls fail fast. Once `reset_timeout`
+    has passed, one trial call is let through: success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; claims the trial slot when half-open"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                print(f"Circuit for MCP tool {self.name} opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+    def release_trial(self):
+        """Give back a claimed trial slot whose call ended without a verdict"""
+        self._trial_running = False
+
+
+def is_idempotent(tool_name: str) -> bool:
+    """Read-only tools that are safe to retry and hedge"""
+    return tool_name.startswith(("get_", "list_"))
+
+
+def transient_error(result: CallToolResult) -> Optional[str]:
+    """The error text of a rate-limited or failed-upstream result, None for anything else"""
+    content = result.content[0] if result.content else None
+    text = getattr(content, "text", None) or ""
+    is_error = getattr(result, "isError", False) or text.startswith("Error")
+    if is_error and TRANSIENT_ERROR_PATTERN.search(text):
+        return text[:200]
+    return None
+
+
+def _is_transport_failure(error: BaseException) -> bool:
+    """Errors that mean the session itself is unusable"""
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, (TimeoutError, OSError, EOFError, anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream))
+
+
+def _is_retryable(error: BaseException) -> bool:
+    return isinstance(error, TransientToolError) or _is_transport_failure(error)
+
+
+async def _attempt(tool_name: str, arguments: Dict[str, Any], checkout: Checkout, index: int, timeout: float) -> CallToolResult:
+    """One call whose deadline covers waiting for a session as well as the call itself"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    async with AsyncExitStack() as stack:
+        try:
+            pooled = await asyncio.wait_for(stack.enter_async_context(checkout(index)), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No MCP session was available for {tool_name} within {timeout}s")
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise TimeoutError(f"No MCP session was available for {tool_name} within {timeout}s")
+        try:
+            result = await asyncio.wait_for(traced_mcp_call(pooled.session, tool_name, arguments), remaining)
+        except asyncio.TimeoutError:
+            pooled.mark_broken(f"{tool_name} did not answer within {timeout}s")
+            raise TimeoutError(f"MCP tool {tool_name} did not answer within {timeout}s")
+        except Exception as e:
+            if _is_transport_failure(e) or pooled.session is None:
+                pooled.mark_broken(f"{type(e).__name__}: {e}")
+            raise
+    error = transient_error(result)
+    if error:
+        raise TransientToolError(error)
+    return result
+
+
+async def _hedged(tool_name: str, arguments: Dict[str, Any], checkout: Checkout, index: int, policy: CallPolicy) -> CallToolResult:
+    """Run an attempt, adding a duplicate on another session if it is slower than hedge_after"""
+    tasks = [asyncio.ensure_future(_attempt(tool_name, arguments, checkout, index, policy.timeout))]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=policy.hedge_after)
+        if not done:
+            tasks.append(asyncio.ensure_future(_attempt(tool_name, arguments, checkout, index + 1, policy.timeout)))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # The slower attempt is abandoned; its session goes back to the pool
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def resilient_call(
+    tool_name: str,
+    arguments: Dict[str, Any],
+    checkout: Checkout,
+    policy: Optional[CallPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None
+) -> CallToolResult:
+    """Call an MCP tool with a deadline per attempt, retries, optional hedging and a circuit breaker
+
+    `checkout(index)` yields the PooledSession for attempt `index`. Attempts
+    after the first should come from another pooled session where possible,
+    so a dead session is not retried against.
+    """
+    policy = policy or get_call_policy()
+    breaker = breaker or get_circuit_breaker(tool_name)
+    trial = breaker.state == "half_open"
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit for MCP tool {tool_name} is open after repeated failures; retry shortly")
+
+    idempotent = is_idempotent(tool_name)
+    attempts = 1 + (policy.retries if idempotent else 0)
+    index = 0
+    try:
+        for attempt in range(attempts):
+            # Every attempt after the first gets sessions the earlier ones did not use
+            first, index = index, index + (2 if idempotent and policy.hedge_after > 0 else 1)
+            try:
+                if idempotent and policy.hedge_after > 0:
+                    result = await _hedged(tool_name, arguments, checkout, first, policy)
+                else:
+                    result = await _attempt(tool_name, arguments, checkout, first, policy.timeout)
+                breaker.record_success()
+                return result
+            except Exception as e:
+                if not _is_retryable(e):
+                    # The tool answered; the request itself was bad, not the upstream
+                    breaker.record_success()
+                    raise
+                # Only calls that fail after every retry count toward opening the circuit
+                if attempt + 1 >= attempts:
+                    breaker.record_failure()
+                    raise
+                await asyncio.sleep(policy.delay(attempt))
+    finally:
+        if trial:
+            breaker.release_trial()
+
+
+class SessionCheckout:
+    """Checkout for a client holding one session, restarting it when it breaks
+
+    Used where there is no pool to draw another session from: every attempt
+    reuses the client's session, and a broken one is replaced by a fresh
+    server subprocess before the next attempt.
+    """
+
+    def __init__(self, current: Callable[[], Optional[PooledSession]], restart: Callable[[], Any]):
+        self._current = current
+        self._restart = restart
+
+    def __call__(self, index: int) -> AbstractAsyncContextManager:
+        return self._Use(self)
+
+    class _Use:
+        def __init__(self, owner: "SessionCheckout"):
+            self.owner = owner
+
+        async def __aenter__(self) -> PooledSession:
+            pooled = self.owner._current()
+            if pooled is None or not pooled.alive:
+                await self.owner._restart()
+                pooled = self.owner._current()
+            return pooled
+
+        async def __aexit__(self, exc_type, exc_val, exc_tb):
+            return False
+
+
+# Global call policy and per-tool breakers
+_call_policy: Optional[CallPolicy] = None
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_call_policy() -> CallPolicy:
+    """Get or create the call policy from the environment"""
+    global _call_policy
+    if _call_policy is None:
+        _call_policy = CallPolicy.from_env()
+    return _call_policy
+
+def get_circuit_breaker(tool_name: str) -> CircuitBreaker:
+    """Get or create the circuit breaker for one tool"""
+    breaker = _circuit_breakers.get(tool_name)
+    if breaker is None:
+        breaker = _circuit_breakers[tool_name] = CircuitBreaker(
+            tool_name,
+            failure_threshold=int(os.getenv("POLYGON_MCP_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("POLYGON_MCP_BREAKER_RESET", "30")),
+        )
+    return breaker
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Seconds a response stays fresh, per MCP tool. Tools not listed use the default TTL.
+DEFAULT_TOOL_TTLS = {
+    "get_snapshot_ticker": 5.0,
+    "get_snapshot_all": 5.0,
+    "get_last_trade": 2.0,
+    "get_last_quote": 2.0,
+    "get_aggs": 30.0,
+    "get_grouped_daily_aggs": 300.0,
+    "list_ticker_news": 60.0,
+    "get_ticker_details": 3600.0,
+    "list_dividends": 3600.0,
+    "list_splits": 3600.0,
+}
+
+# Result handed to joined callers when the call they were waiting on was cancelled
+_ABANDONED = object()
+
+
+class ResponseCache:
+    """TTL/LRU cache of MCP tool responses that coalesces identical in-flight calls"""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        default_ttl: float = 10.0,
+        ttls: Optional[Dict[str, float]] = None
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(DEFAULT_TOOL_TTLS, **(ttls or {}))
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Canonical cache key: sorted arguments, no None values, upper-cased tickers"""
+        canonical = {k: v for k, v in arguments.items() if v is not None}
+        if isinstance(canonical.get("ticker"), str):
+            canonical["ticker"] = canonical["ticker"].upper()
+        return tool_name + ":" + json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+
+    def ttl_for(self, tool_name: str) -> float:
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look up a fresh entry, returning (found, value)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def put(self, key: str, value: Any, ttl: float):
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_call(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        call: Callable[[str, Dict[str, Any]], Awaitable[Any]]
+    ) -> Any:
+        """Serve a cached response, join an identical in-flight call, or make the call"""
+        key = self.key(tool_name, arguments)
+        while True:
+            found, value = self.get(key)
+            if found:
+                self.hits += 1
+                return value
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            value = await asyncio.shield(in_flight)
+            if value is not _ABANDONED:
+                self.coalesced += 1
+                return value
+            # The call was cancelled by its own caller; the next waiter makes it again
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await call(tool_name, arguments)
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; retrieve it so asyncio does not warn
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelling one caller must not cancel the others that joined it
+            future.set_result(_ABANDONED)
+            raise
+        else:
+            future.set_result(value)
+            # Errors are not cached, so the next call retries upstream
+            if not (isinstance(value, dict) and "error" in value):
+                self.put(key, value, self.ttl_for(tool_name))
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def invalidate(self, tool_name: Optional[str] = None):
+        """Drop every entry, or only the entries for one tool"""
+        if tool_name is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k.startswith(tool_name + ":")]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+# Global response cache instance
+_response_cache = None
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get or create the response cache, or None when caching is disabled"""
+    global _response_cache
+    if os.getenv("POLYGON_RESPONSE_CACHE", "1") == "0":
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            max_entries=int(os.getenv("POLYGON_RESPONSE_CACHE_SIZE", "1024")),
+            default_ttl=float(os.getenv("POLYGON_RESPONSE_CACHE_TTL", "10")),
+        )
+    return _response_cache
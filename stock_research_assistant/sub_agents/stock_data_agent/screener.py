@@ -0,0 +1,322 @@
+import asyncio
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
+from . import indicators
+from .bar_store import market_today
+
+# Filter operators and the vectorized comparison each maps to
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+# Descriptions of every screenable column, also surfaced to the model
+FIELDS = {
+    "close": "Latest close price",
+    "open": "Latest open price",
+    "high": "Latest session high",
+    "low": "Latest session low",
+    "volume": "Latest session volume",
+    "vwap": "Latest session volume-weighted average price",
+    "dollar_volume": "Close x volume for the latest session",
+    "change_pct": "Percent change from the previous close",
+    "gap_pct": "Percent gap between the open and the previous close",
+    "range_pct": "Session high-low range as a percent of the close",
+    "return_5d": "Percent return over 5 sessions",
+    "return_20d": "Percent return over 20 sessions",
+    "avg_volume_20": "Average volume over the prior 20 sessions",
+    "volume_zscore": "Latest volume in standard deviations from the prior 20-session mean",
+    "relative_volume": "Latest volume divided by the prior 20-session average",
+    "sma_20": "20-session simple moving average of the close",
+    "sma_50": "50-session simple moving average of the close",
+    "pct_from_sma_20": "Percent distance of the close from its 20-session SMA",
+    "pct_from_sma_50": "Percent distance of the close from its 50-session SMA",
+    "rsi_14": "14-session RSI",
+    "volatility_20": "Annualized 20-session volatility of daily returns",
+}
+
+
+def _pct(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (numerator / denominator - 1.0) * 100.0
+
+
+def _lag(matrix: np.ndarray, sessions: int) -> np.ndarray:
+    """Column `sessions` back from the latest, NaN when history is too short"""
+    if matrix.shape[1] <= sessions:
+        return np.full(matrix.shape[0], np.nan)
+    return matrix[:, -1 - sessions]
+
+
+def _forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """Carry the last seen value across sessions a ticker did not trade"""
+    index = np.where(np.isnan(matrix), 0, np.arange(matrix.shape[1]))
+    np.maximum.accumulate(index, axis=1, out=index)
+    return matrix[np.arange(matrix.shape[0])[:, None], index]
+
+
+class MarketTable:
+    """In-memory columnar table of the whole market, one row per ticker
+
+    Built from grouped daily bars: `matrices` hold (tickers x sessions) price
+    and volume history and `columns` hold the derived per-ticker metrics that
+    filters are evaluated against.
+    """
+
+    def __init__(self, tickers: np.ndarray, dates: List[str], matrices: Dict[str, np.ndarray]):
+        self.tickers = tickers
+        self.index = {ticker: row for row, ticker in enumerate(tickers.tolist())}
+        self.dates = dates
+        self.matrices = matrices
+        self.built_at = time.time()
+        self.columns = self._derive_columns()
+
+    @classmethod
+    def from_grouped_days(cls, days: Dict[str, List[Dict[str, Any]]]) -> "MarketTable":
+        """Align grouped daily results (date -> bars with a "T" ticker) into matrices
+
+        The universe is the tickers that traded in the most recent session.
+        """
+        dates = sorted(day for day, bars in days.items() if bars)
+        if not dates:
+            raise ValueError("No grouped daily bars to build the market table from")
+
+        tickers = np.array(sorted({bar["T"] for bar in days[dates[-1]] if bar.get("T")}))
+        shape = (len(tickers), len(dates))
+        matrices = {name: np.full(shape, np.nan) for name in ("o", "h", "l", "c", "v", "vw")}
+
+        for col, day in enumerate(dates):
+            bars = [bar for bar in days[day] if bar.get("T")]
+            day_tickers = np.array([bar["T"] for bar in bars])
+            rows = np.searchsorted(tickers, day_tickers)
+            rows = np.clip(rows, 0, len(tickers) - 1)
+            present = tickers[rows] == day_tickers
+            for name, matrix in matrices.items():
+                values = np.fromiter((bar.get(name, np.nan) for bar in bars), dtype=np.float64, count=len(bars))
+                matrix[rows[present], col] = values[present]
+
+        return cls(tickers, dates, matrices)
+
+    def _derive_columns(self) -> Dict[str, np.ndarray]:
+        o, h, l, c, v, vw = (self.matrices[name] for name in ("o", "h", "l", "c", "v", "vw"))
+        # Indicators and lookbacks see halted sessions as unchanged prices
+        c = _forward_fill(c)
+        close, prev_close = c[:, -1], _lag(c, 1)
+
+        # Volume statistics use the 20 sessions before the latest one
+        prior_volume = v[:, -21:-1] if v.shape[1] > 1 else np.full((v.shape[0], 1), np.nan)
+        # nanmean/nanstd warn on rows with no volume history, e.g. new listings, so
+        # divide by the sample count instead and let 0/0 give NaN quietly
+        present = ~np.isnan(prior_volume)
+        counts = present.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_volume = np.where(present, prior_volume, 0.0).sum(axis=1) / counts
+            deviation = np.where(present, prior_volume - avg_volume[:, None], 0.0)
+            std_volume = np.sqrt((deviation ** 2).sum(axis=1) / counts)
+            volume_zscore = (v[:, -1] - avg_volume) / std_volume
+            relative_volume = v[:, -1] / avg_volume
+            range_pct = (h[:, -1] - l[:, -1]) / close * 100.0
+
+        sma_20 = indicators.sma(c, 20)[:, -1]
+        sma_50 = indicators.sma(c, 50)[:, -1]
+
+        return {
+            "close": close,
+            "open": o[:, -1],
+            "high": h[:, -1],
+            "low": l[:, -1],
+            "volume": v[:, -1],
+            "vwap": vw[:, -1],
+            "dollar_volume": close * v[:, -1],
+            "change_pct": _pct(close, prev_close),
+            "gap_pct": _pct(o[:, -1], prev_close),
+            "range_pct": range_pct,
+            "return_5d": _pct(close, _lag(c, 5)),
+            "return_20d": _pct(close, _lag(c, 20)),
+            "avg_volume_20": avg_volume,
+            "volume_zscore": volume_zscore,
+            "relative_volume": relative_volume,
+            "sma_20": sma_20,
+            "sma_50": sma_50,
+            "pct_from_sma_20": _pct(close, sma_20),
+            "pct_from_sma_50": _pct(close, sma_50),
+            "rsi_14": indicators.rsi(c, 14)[:, -1],
+            "volatility_20": indicators.rolling_volatility(c, 20)[:, -1],
+        }
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def mask(self, condition: Dict[str, Any]) -> np.ndarray:
+        """Boolean row mask for one filter, or for an {"any": [...]} / {"all": [...]} group"""
+        if not isinstance(condition, dict):
+            raise ValueError(f"Each filter must be an object like {{\"field\": ..., \"op\": ..., \"value\": ...}}, got {condition!r}")
+        if "any" in condition:
+            masks = [self.mask(c) for c in condition["any"]]
+            return np.logical_or.reduce(masks) if masks else np.zeros(len(self), dtype=bool)
+        if "all" in condition:
+            return self.evaluate(condition["all"])
+
+        field, op, value = condition.get("field"), condition.get("op"), condition.get("value")
+        if field == "ticker":
+            if not isinstance(value, (str, list, tuple)):
+                raise ValueError(f"Ticker filters need a ticker or a list of tickers, got {value!r}")
+            values = [value] if isinstance(value, str) else value
+            matched = np.isin(self.tickers, [str(t).upper() for t in values])
+            return ~matched if op == "not_in" else matched
+        if field not in self.columns:
+            raise ValueError(f"Unknown screener field '{field}'. Available: {', '.join(sorted(FIELDS))}")
+
+        column = self.columns[field]
+        with np.errstate(invalid="ignore"):
+            if op == "between":
+                if not isinstance(value, (list, tuple)) or len(value) != 2:
+                    raise ValueError(f"'between' on '{field}' needs a [low, high] value, got {value!r}")
+                low, high = (self._operand(field, v) for v in value)
+                return (column >= low) & (column <= high)
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator '{op}'. Use one of: {', '.join(OPERATORS)}, between")
+            return OPERATORS[op](column, self._operand(field, value))
+
+    def _operand(self, field: str, value: Any) -> Union[float, np.ndarray]:
+        """A filter value as a number, or as a column when it names another field"""
+        # Fields can also be compared against each other, e.g. close > sma_50
+        if isinstance(value, str) and value in self.columns:
+            return self.columns[value]
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Filter on '{field}' needs a number or a field name, got {value!r}") from None
+
+    def evaluate(self, filters: List[Dict[str, Any]]) -> np.ndarray:
+        """AND of every filter; rows with NaN in a filtered field never match"""
+        mask = np.ones(len(self), dtype=bool)
+        for condition in filters:
+            mask &= self.mask(condition)
+        return mask
+
+    def query(
+        self,
+        filters: List[Dict[str, Any]],
+        sort_by: Optional[str] = None,
+        descending: bool = True,
+        limit: int = 25,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Rows matching every filter, sorted and trimmed, as plain dicts"""
+        rows = np.flatnonzero(self.evaluate(filters))
+
+        if sort_by:
+            if sort_by not in self.columns:
+                raise ValueError(f"Unknown sort field '{sort_by}'")
+            keys = self.columns[sort_by][rows]
+            keys = np.where(np.isnan(keys), -np.inf if descending else np.inf, keys)
+            order = np.argsort(-keys if descending else keys, kind="stable")
+            rows = rows[order]
+
+        if not fields:
+            # Show the filtered and sorted fields alongside the basics
+            fields = {"close", "change_pct", "volume"}
+            fields |= {c["field"] for c in filters if c.get("field") in self.columns}
+            if sort_by:
+                fields.add(sort_by)
+            fields = sorted(fields)
+
+        matches = []
+        for row in rows[:limit]:
+            match = {"ticker": str(self.tickers[row])}
+            for name in fields:
+                value = float(self.columns[name][row])
+                match[name] = None if np.isnan(value) else round(value, 4)
+            matches.append(match)
+
+        return {
+            "as_of": self.dates[-1],
+            "universe": len(self),
+            "matched": int(len(rows)),
+            "results": matches,
+        }
+
+
+def _recent_weekdays(as_of: date, count: int) -> List[str]:
+    """The most recent `count` weekdays up to and including `as_of`"""
+    days = []
+    day = as_of
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day -= timedelta(days=1)
+    return days
+
+
+class MarketScreener:
+    """Loads grouped daily bars into a MarketTable and answers screening queries
+
+    Completed sessions never change, so each day's grouped bars are fetched
+    once and kept; only the table itself is rebuilt when it goes stale.
+    """
+
+    def __init__(self, service, sessions: int = 60, table_ttl: float = 900.0):
+        self.service = service
+        self.sessions = sessions
+        self.table_ttl = table_ttl
+        self._days: Dict[str, List[Dict[str, Any]]] = {}
+        self._table: Optional[MarketTable] = None
+        self._lock = asyncio.Lock()
+
+    async def _fetch_day(self, day: str) -> List[Dict[str, Any]]:
+        async with self.service.client() as client:
+            data = await client.call_tool_safe("get_grouped_daily_aggs", {"date": day})
+        if "error" in data:
+            raise RuntimeError(data["error"])
+        return data.get("results") or []
+
+    async def table(self) -> MarketTable:
+        """The current market table, rebuilt when older than table_ttl"""
+        async with self._lock:
+            if self._table is not None and time.time() - self._table.built_at < self.table_ttl:
+                return self._table
+
+            today = market_today()
+            # Weekdays cover holidays with some slack; empty days are simply skipped
+            candidates = _recent_weekdays(today, int(self.sessions * 1.1) + 5)
+            missing = [day for day in candidates if day not in self._days or day == today.isoformat()]
+            fetched = await asyncio.gather(*(self._fetch_day(day) for day in missing), return_exceptions=True)
+            for day, bars in zip(missing, fetched):
+                if isinstance(bars, BaseException):
+                    print(f"Failed to load grouped daily bars for {day}: {bars}")
+                    continue
+                self._days[day] = bars
+
+            # Grouped bars for today only exist after the close; a whole-market quote stream fills the gap
+            feed = getattr(self.service, "quote_feed", None)
+            if feed is not None and feed.covers_market and not self._days.get(today.isoformat()):
+                self._days[today.isoformat()] = feed.table.day_bars(today)
+
+            trading_days = sorted(day for day in candidates if self._days.get(day))[-self.sessions:]
+            for day in list(self._days):
+                if day not in candidates:
+                    del self._days[day]
+
+            self._table = MarketTable.from_grouped_days({day: self._days[day] for day in trading_days})
+            return self._table
+
+    async def screen(self, filters: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        return (await self.table()).query(filters, **kwargs)
+
+
+# Global screener instance
+_market_screener = None
+
+def get_market_screener(service) -> MarketScreener:
+    """Get or create the market screener"""
+    global _market_screener
+    if _market_screener is None:
+        _market_screener = MarketScreener(service)
+    return _market_screener
@@ -0,0 +1,92 @@
+import importlib.util
+import os
+import shlex
+import shutil
+import sys
+from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
+from mcp import StdioServerParameters
+
+# Pinned upstream source used when the server has to be fetched through uvx
+MCP_POLYGON_SOURCE = "git+https://github.com/polygon-io/mcp_polygon@v0.4.0"
+
+agent_folder = Path(__file__).parent
+_env_loaded = False
+
+def load_env():
+    """Load the agent's .env file once, on first use rather than at import"""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv(dotenv_path=agent_folder / ".env")
+        _env_loaded = True
+
+def resolve_polygon_api_key() -> str:
+    """Polygon API key from the environment or the agent's .env file"""
+    load_env()
+    polygon_api_key = os.getenv("POLYGON_API_KEY")
+    if not polygon_api_key:
+        raise ValueError("POLYGON_API_KEY environment variable must be set")
+    return polygon_api_key
+
+def find_uvx() -> Optional[str]:
+    """Locate the uvx executable on PATH or in its usual install locations"""
+    uvx_path = shutil.which("uvx")
+    if uvx_path:
+        return uvx_path
+    
+    possible_paths = [
+        Path.home() / ".cargo" / "bin" / "uvx", 
+        Path.home() / ".local" / "bin" / "uvx",  
+        Path("/usr/local/bin/uvx"),              
+    ]
+    for path in possible_paths:
+        if path.exists() and path.is_file():
+            return str(path)
+    return None
+
+def _local_server_command() -> Optional[list]:
+    """Command for a pre-installed or vendored mcp_polygon, if there is one"""
+    explicit = os.getenv("POLYGON_MCP_COMMAND")
+    if explicit:
+        return shlex.split(explicit)
+    entry_point = shutil.which("mcp_polygon")
+    if entry_point:
+        return [entry_point]
+    if importlib.util.find_spec("mcp_polygon") is not None:
+        return [sys.executable, "-m", "mcp_polygon"]
+    return None
+
+def polygon_server_params(polygon_api_key: Optional[str] = None, mode: Optional[str] = None) -> StdioServerParameters:
+    """Server parameters for the Polygon MCP server
+    
+    POLYGON_MCP_MODE picks how the server is launched:
+    - "local": a pre-installed `mcp_polygon` entry point, the module in this
+      interpreter, or the command in POLYGON_MCP_COMMAND. Works offline.
+    - "uvx": build the pinned release from git through uvx.
+    - "auto" (default): local when available, otherwise uvx.
+    """
+    load_env()
+    polygon_api_key = polygon_api_key or resolve_polygon_api_key()
+    mode = (mode or os.getenv("POLYGON_MCP_MODE", "auto")).lower()
+    
+    env = {
+        "POLYGON_API_KEY": polygon_api_key,
+        "HOME": str(Path.home()),  # Some packages might need HOME
+        "PATH": os.environ.get("PATH", ""),  # Preserve PATH
+    }
+    
+    command = _local_server_command() if mode in ("local", "auto") else None
+    if command:
+        return StdioServerParameters(command=command[0], args=command[1:], env=env)
+    if mode == "local":
+        raise ValueError("POLYGON_MCP_MODE=local but mcp_polygon is not installed; install it or set POLYGON_MCP_COMMAND")
+    
+    uvx_path = find_uvx()
+    if not uvx_path:
+        raise ValueError("uvx not found. Please install uv/uvx or add it to your PATH")
+    return StdioServerParameters(
+        command=uvx_path,
+        args=["--from", os.getenv("POLYGON_MCP_SOURCE", MCP_POLYGON_SOURCE), "mcp_polygon"],
+        env=env
+    )
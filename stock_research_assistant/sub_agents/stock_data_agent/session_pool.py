@@ -0,0 +1,336 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+
+class PooledSession:
+    """A single warm MCP session whose stdio subprocess is owned by a dedicated task"""
+
+    def __init__(self, server_params: StdioServerParameters):
+        self.server_params = server_params
+        self.session: Optional[ClientSession] = None
+        self.created_at = 0.0
+        self.last_used = 0.0
+        self.uses = 0
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+        # Why the session stopped answering, once a call has timed out or lost its connection
+        self.broken: Optional[str] = None
+
+    async def start(self, timeout: float = 60.0):
+        """Spawn the server subprocess and wait for the MCP handshake to finish"""
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise TimeoutError(f"MCP server did not initialize within {timeout}s")
+        except asyncio.CancelledError:
+            # Whoever was waiting gave up; do not leave the subprocess running unowned
+            self._closing.set()
+            self._task.cancel()
+            raise
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self):
+        # The stdio transport uses anyio cancel scopes, so it has to be entered
+        # and exited from the same task. This task keeps it open until close().
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self.created_at = self.last_used = time.monotonic()
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    @property
+    def alive(self) -> bool:
+        """Whether the session is connected and not shutting down"""
+        return (
+            self.session is not None
+            and self.broken is None
+            and not self._closing.is_set()
+            and self._task is not None
+            and not self._task.done()
+        )
+
+    def mark_broken(self, reason: str):
+        """Take the session out of service; the pool replaces it with a fresh subprocess"""
+        if self.broken is None:
+            print(f"Pooled MCP session broken ({reason}); it will be restarted")
+            self.broken = reason
+
+    @property
+    def idle_for(self) -> float:
+        """Seconds since the session was last returned to the pool"""
+        return time.monotonic() - self.last_used
+
+    async def ping(self, timeout: float = 10.0) -> bool:
+        """Health check the session with an MCP ping"""
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception:
+            return False
+
+    async def close(self, timeout: float = 10.0):
+        """Shut down the session and its subprocess"""
+        self._closing.set()
+        if self._task and not self._task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout)
+            except (asyncio.TimeoutError, Exception):
+                self._task.cancel()
+
+
+class PolygonSessionPool:
+    """Process-wide pool of warm, initialized Polygon MCP sessions"""
+
+    def __init__(
+        self,
+        server_params: StdioServerParameters,
+        size: int = 2,
+        max_size: int = 4,
+        max_idle: float = 300.0,
+        health_check_interval: float = 30.0,
+        connect_timeout: float = 60.0,
+    ):
+        self.server_params = server_params
+        self.size = size
+        self.max_size = max(size, max_size)
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout
+
+        self._idle: asyncio.LifoQueue = asyncio.LifoQueue()
+        self._sessions: List[PooledSession] = []
+        self._pending = 0
+        self._lock = asyncio.Lock()
+        self._started = False
+        self._closed = False
+        self._reaper: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing_tasks = set()
+
+    async def start(self):
+        """Open the warm sessions up front so no request pays the spawn cost"""
+        async with self._lock:
+            if self._started:
+                return
+            self._loop = asyncio.get_running_loop()
+            self._started = True
+
+        results = await asyncio.gather(
+            *(self._open_session() for _ in range(self.size)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, PooledSession):
+                self._idle.put_nowait(result)
+            else:
+                print(f"Failed to open pooled MCP session: {result}")
+
+        self._reaper = asyncio.create_task(self._reap_loop())
+        print(f"Polygon MCP session pool ready ({len(self._sessions)} sessions)")
+
+    async def _open_session(self) -> PooledSession:
+        """Spawn a new session and track it"""
+        self._pending += 1
+        try:
+            pooled = PooledSession(self.server_params)
+            await pooled.start(self.connect_timeout)
+            self._sessions.append(pooled)
+            return pooled
+        finally:
+            self._pending -= 1
+
+    async def _discard(self, pooled: PooledSession, wait: bool = True):
+        """Drop a session from the pool and shut it down"""
+        if pooled in self._sessions:
+            self._sessions.remove(pooled)
+        if wait:
+            await pooled.close()
+            return
+        # A hung subprocess can take seconds to terminate; callers should not wait on it
+        self._background(pooled.close())
+        if not self._closed and self.total < self.size:
+            self._background(self._replenish())
+
+    def _background(self, coro):
+        task = asyncio.create_task(coro)
+        self._closing_tasks.add(task)
+        task.add_done_callback(self._closing_tasks.discard)
+
+    async def _replenish(self):
+        """Start a replacement for a discarded session so the pool stays at its warm size"""
+        if self._closed or self.total >= self.size:
+            return
+        try:
+            pooled = await self._open_session()
+        except Exception as e:
+            print(f"Failed to restart pooled MCP session: {e}")
+            return
+        if self._closed:
+            await self._discard(pooled)
+        else:
+            self._idle.put_nowait(pooled)
+
+    @property
+    def total(self) -> int:
+        """Number of usable sessions, including ones still connecting
+
+        A broken session that a caller still holds does not count, so a
+        retry can open its replacement before the broken one is released.
+        """
+        return sum(1 for pooled in self._sessions if pooled.broken is None) + self._pending
+
+    async def acquire(self) -> PooledSession:
+        """Check out a healthy session, growing the pool up to max_size"""
+        if self._closed:
+            raise RuntimeError("Session pool is closed")
+        if not self._started:
+            await self.start()
+
+        while True:
+            if self._idle.empty() and self.total < self.max_size:
+                pooled = await self._open_session()
+            else:
+                pooled = await self._idle.get()
+
+            if pooled.alive:
+                pooled.uses += 1
+                return pooled
+            await self._discard(pooled)
+
+    async def release(self, pooled: PooledSession, discard: bool = False):
+        """Return a session to the pool, or drop it if it is broken"""
+        if discard or self._closed or not pooled.alive:
+            await self._discard(pooled, wait=False)
+            return
+        pooled.last_used = time.monotonic()
+        self._idle.put_nowait(pooled)
+
+    @asynccontextmanager
+    async def session(self):
+        """Check out a session for the duration of the block"""
+        pooled = await self.acquire()
+        failed = False
+        try:
+            yield pooled
+        except Exception:
+            failed = not pooled.alive or not await pooled.ping()
+            raise
+        finally:
+            await self.release(pooled, discard=failed)
+
+    async def _reap_loop(self):
+        """Periodically health check idle sessions and close ones idle too long"""
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self._reap()
+            except Exception as e:
+                # A failed pass must not end health checks for the life of the pool
+                print(f"Pooled MCP session health check failed: {e!r}")
+
+    async def _reap(self):
+        """One health check pass over the idle sessions"""
+        idle = []
+        while not self._idle.empty():
+            idle.append(self._idle.get_nowait())
+
+        # Oldest first, so the sessions that stay are the most recently used
+        idle.sort(key=lambda s: s.last_used)
+        keep = []
+        try:
+            while idle:
+                pooled = idle[0]
+                surplus = len(self._sessions) > self.size
+                if surplus and pooled.idle_for > self.max_idle:
+                    await self._discard(pooled)
+                elif not await pooled.ping():
+                    print("Replacing unhealthy pooled MCP session")
+                    await self._discard(pooled)
+                else:
+                    keep.append(pooled)
+                idle.pop(0)
+        finally:
+            # Sessions the pass did not get to go back too, so an error loses none
+            for pooled in reversed(keep + idle):
+                self._idle.put_nowait(pooled)
+
+        # Top back up to the warm size after discarding dead sessions
+        while self.total < self.size and not self._closed:
+            try:
+                self._idle.put_nowait(await self._open_session())
+            except Exception as e:
+                print(f"Failed to reopen pooled MCP session: {e}")
+                break
+
+    def stats(self) -> Dict[str, int]:
+        """Current pool occupancy"""
+        return {
+            "open": len(self._sessions),
+            "idle": self._idle.qsize(),
+            "in_use": len(self._sessions) - self._idle.qsize(),
+            "max_size": self.max_size,
+        }
+
+    async def close(self):
+        """Close every session in the pool"""
+        self._closed = True
+        if self._reaper:
+            self._reaper.cancel()
+        sessions, self._sessions = self._sessions, []
+        await asyncio.gather(*(s.close() for s in sessions), *self._closing_tasks, return_exceptions=True)
+        print("Polygon MCP session pool closed")
+
+
+# Global session pool instance
+_session_pool: Optional[PolygonSessionPool] = None
+
+def get_session_pool(server_params: StdioServerParameters) -> PolygonSessionPool:
+    """Get or create the session pool for the running event loop"""
+    global _session_pool
+    loop = asyncio.get_running_loop()
+    pool = _session_pool
+    if pool is None or pool._closed or (pool._loop is not None and pool._loop is not loop):
+        if pool is not None and not pool._closed:
+            _retire(pool)
+        _session_pool = PolygonSessionPool(
+            server_params,
+            size=int(os.getenv("POLYGON_MCP_POOL_SIZE", "2")),
+            max_size=int(os.getenv("POLYGON_MCP_POOL_MAX_SIZE", "4")),
+            max_idle=float(os.getenv("POLYGON_MCP_POOL_MAX_IDLE", "300")),
+        )
+    return _session_pool
+
+
+def _retire(pool: PolygonSessionPool):
+    """Close a pool left behind on another event loop, so its subprocesses do not leak"""
+    loop = pool._loop
+    if loop.is_closed():
+        # Shutting the loop down already cancelled the tasks that own the subprocesses
+        pool._closed = True
+    elif loop.is_running():
+        asyncio.run_coroutine_threadsafe(pool.close(), loop)
+    else:
+        # Nothing drives the old loop any more, so run the close on it from a helper
+        # thread; it is not a daemon, so interpreter exit waits for the shutdown
+        threading.Thread(target=loop.run_until_complete, args=(pool.close(),), name="session-pool-close").start()
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List
+from .indicators import bars_to_columns, summarize_indicator_batch
+from .polygon_mcp_client import get_stock_data_service
+from .quote_stream import with_live_bar
+from .screener import FIELDS, get_market_screener
+
+async def get_technical_indicators(tickers: List[str], lookback_days: int = 365) -> Dict[str, Any]:
+    """Compute technical indicators from daily bars for one or more stock tickers.
+
+    Returns the latest SMA 20/50/200, EMA 12/26, RSI 14, MACD, Bollinger bands,
+    ATR 14, VWAP and annualized 20-day volatility for each ticker, plus short
+    plain-language signals. Use these numbers instead of computing indicators
+    from raw bars.
+
+    Args:
+        tickers: Stock ticker symbols, e.g. ["AAPL", "MSFT"].
+        lookback_days: Calendar days of daily bars to compute over. At least
+            300 is needed for a 200-day moving average.
+    """
+    service = get_stock_data_service()
+    batch = await service.get_market_data_batch(tickers, timespan="day", days=lookback_days)
+
+    # The quote stream, when enabled, supplies today's still-forming bar
+    series = {
+        symbol: with_live_bar(bars_to_columns(data.get("results") or []), service.live_day_bar(symbol))
+        for symbol, data in batch["results"].items()
+    }
+    indicators = summarize_indicator_batch(series)
+    for symbol, error in batch["errors"].items():
+        indicators[symbol] = {"error": error}
+    return indicators
+
+
+async def screen_stocks(
+    filters: List[Dict[str, Any]],
+    sort_by: str = "dollar_volume",
+    descending: bool = True,
+    limit: int = 25
+) -> Dict[str, Any]:
+    """Screen the whole US stock market in one query using the latest daily bars.
+
+    Each filter is {"field": <field>, "op": <op>, "value": <number>}. Filters
+    are combined with AND; wrap filters in {"any": [...]} for OR. Supported ops
+    are >, >=, <, <=, ==, != and "between" (value is [low, high]). The value
+    may also name another field, e.g. {"field": "close", "op": ">", "value": "sma_50"}.
+    Use {"field": "ticker", "op": "in", "value": ["AAPL", "MSFT"]} to restrict
+    to specific tickers.
+
+    Fields: close, open, high, low, volume, vwap, dollar_volume, change_pct,
+    gap_pct, range_pct, return_5d, return_20d (percent), avg_volume_20,
+    volume_zscore, relative_volume, sma_20, sma_50, pct_from_sma_20,
+    pct_from_sma_50, rsi_14, volatility_20 (annualized, 0.3 = 30%).
+
+    Args:
+        filters: Filter expressions to apply.
+        sort_by: Field to sort matches by.
+        descending: Sort largest first.
+        limit: Maximum number of matches to return.
+    """
+    screener = get_market_screener(get_stock_data_service())
+    try:
+        return await screener.screen(filters, sort_by=sort_by, descending=descending, limit=limit)
+    except ValueError as e:
+        return {"error": str(e), "fields": FIELDS}
@@ -0,0 +1,333 @@
+"""Timing and token telemetry for agents, LLM calls, tools and MCP calls.
+
+Spans are recorded into in-process latency histograms and counters, and
+optionally appended to a JSONL trace file. Metrics can be scraped in
+Prometheus text format from a small HTTP endpoint.
+
+    TELEMETRY=0                      disable recording entirely
+    TELEMETRY_TRACE_FILE=traces.jsonl    append every span as one JSON line
+    TELEMETRY_METRICS_PORT=9464      serve /metrics on this port
+    TELEMETRY_METRICS_HOST=0.0.0.0   address to bind it to (default 127.0.0.1, local scrapers only)
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins import BasePlugin
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+METRIC_PREFIX = "stock_research"
+
+# Trace id (the ADK invocation id) of the work running in the current task
+current_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_trace_id", default=None)
+
+
+class Span:
+    """One timed unit of work: an agent run, LLM call, tool call or MCP call"""
+
+    def __init__(self, kind: str, name: str, trace_id: Optional[str] = None, **attributes):
+        self.kind = kind
+        self.name = name
+        self.trace_id = trace_id or current_trace_id.get()
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes: Dict[str, Any] = attributes
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "kind": self.kind,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_s": self.duration,
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running = 0
+        rows = []
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += count
+            rows.append((str(bound), running))
+        return rows
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Telemetry:
+    """Collects finished spans into metrics and the optional JSONL trace file
+
+    Spans may finish on any thread (MCP calls run on the background loop), so
+    all recording happens under one lock.
+    """
+
+    def __init__(self, enabled: bool = True, trace_file: Optional[str] = None):
+        self.enabled = enabled
+        self.trace_file = trace_file
+        self._lock = threading.Lock()
+        self._trace = open(trace_file, "a", buffering=1) if enabled and trace_file else None
+        self._latency: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def _add(self, metric: str, value: float, **labels):
+        key = (metric, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def record(self, span: Span):
+        if not self.enabled:
+            return
+        span.finish()
+        with self._lock:
+            key = (span.kind, span.name)
+            self._latency.setdefault(key, LatencyHistogram()).observe(span.duration)
+            if span.error:
+                self._errors[key] = self._errors.get(key, 0) + 1
+            attrs = span.attributes
+            if span.kind == "llm":
+                model = attrs.get("model") or "unknown"
+                self._add("llm_tokens_total", attrs.get("prompt_tokens") or 0, model=model, direction="prompt")
+                self._add("llm_tokens_total", attrs.get("response_tokens") or 0, model=model, direction="response")
+            if span.kind == "mcp":
+                self._add("mcp_response_bytes_total", attrs.get("response_bytes") or 0, tool=span.name)
+            if self._trace is not None:
+                self._trace.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes) -> Iterator[Span]:
+        """Time the enclosed block; exceptions are recorded on the span and re-raised"""
+        span = Span(kind, name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.record(span)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        duration = f"{METRIC_PREFIX}_span_duration_seconds"
+        lines = [
+            f"# HELP {duration} Latency of agent runs, LLM calls, tool calls and MCP calls.",
+            f"# TYPE {duration} histogram",
+        ]
+        with self._lock:
+            for (kind, name), histogram in sorted(self._latency.items()):
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{duration}_bucket{_labels(kind=kind, name=name, le=bound)} {count}")
+                lines.append(f"{duration}_sum{_labels(kind=kind, name=name)} {histogram.total:.6f}")
+                lines.append(f"{duration}_count{_labels(kind=kind, name=name)} {histogram.count}")
+
+            errors = f"{METRIC_PREFIX}_span_errors_total"
+            lines += [f"# HELP {errors} Spans that ended in an error.", f"# TYPE {errors} counter"]
+            for (kind, name), count in sorted(self._errors.items()):
+                lines.append(f"{errors}{_labels(kind=kind, name=name)} {count}")
+
+            described = set()
+            for (metric, labels), value in sorted(self._counters.items()):
+                full_name = f"{METRIC_PREFIX}_{metric}"
+                if full_name not in described:
+                    described.add(full_name)
+                    lines.append(f"# TYPE {full_name} counter")
+                lines.append(f"{full_name}{_labels(**dict(labels))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve /metrics from a daemon thread, on loopback unless another host is given"""
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="telemetry-metrics", daemon=True).start()
+        return server
+
+
+# Global telemetry instance
+_telemetry = None
+
+def get_telemetry() -> Telemetry:
+    """Get or create the telemetry recorder, starting the metrics endpoint if configured"""
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = Telemetry(
+            enabled=os.getenv("TELEMETRY", "1").lower() not in ("0", "false", "no"),
+            trace_file=os.getenv("TELEMETRY_TRACE_FILE") or None,
+        )
+        port = int(os.getenv("TELEMETRY_METRICS_PORT", "0"))
+        if _telemetry.enabled and port:
+            _telemetry.serve_metrics(port, os.getenv("TELEMETRY_METRICS_HOST") or "127.0.0.1")
+    return _telemetry
+
+
+async def traced_mcp_call(session, tool_name: str, arguments: Dict[str, Any]):
+    """session.call_tool wrapped in an "mcp" span with argument and response sizes"""
+    with get_telemetry().span("mcp", tool_name, args_bytes=len(json.dumps(arguments, default=str))) as span:
+        result = await session.call_tool(tool_name, arguments)
+        span.set(response_bytes=sum(len(getattr(c, "text", None) or "") for c in result.content or []))
+        if getattr(result, "isError", False):
+            span.error = "MCP tool returned an error result"
+        return result
+
+
+class TelemetryPlugin(BasePlugin):
+    """Runner plugin that records a span for every agent run, LLM call and tool call"""
+
+    def __init__(self, telemetry: Optional[Telemetry] = None):
+        super().__init__(name="telemetry")
+        self._telemetry = telemetry
+        self._open: Dict[Tuple[str, ...], Span] = {}
+
+    @property
+    def telemetry(self) -> Telemetry:
+        # Resolved on first use so constructing the plugin starts no endpoint
+        if self._telemetry is None:
+            self._telemetry = get_telemetry()
+        return self._telemetry
+
+    def _start(self, key: Tuple[str, ...], kind: str, name: str, trace_id: str, **attributes):
+        self._open[key] = Span(kind, name, trace_id=trace_id, **attributes)
+
+    def _end(self, key: Tuple[str, ...], error: Optional[Exception] = None, **attributes) -> None:
+        span = self._open.pop(key, None)
+        if span is None:
+            return
+        span.set(**attributes)
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        self.telemetry.record(span)
+
+    async def before_agent_callback(self, *, agent, callback_context: CallbackContext):
+        current_trace_id.set(callback_context.invocation_id)
+        self._start(("agent", callback_context.invocation_id, agent.name), "agent", agent.name, callback_context.invocation_id)
+        return None
+
+    async def after_agent_callback(self, *, agent, callback_context: CallbackContext):
+        self._end(("agent", callback_context.invocation_id, agent.name))
+        return None
+
+    async def on_agent_error_callback(self, *, agent, callback_context: CallbackContext, error: Exception) -> None:
+        self._end(("agent", callback_context.invocation_id, agent.name), error=error)
+
+    async def after_run_callback(self, *, invocation_context) -> None:
+        # An agent whose before_agent_callback answers directly never reaches after_agent_callback
+        for key in [key for key in self._open if key[0] == "agent" and key[1] == invocation_context.invocation_id]:
+            self._end(key)
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        key = ("llm", callback_context.invocation_id, callback_context.agent_name)
+        self._start(key, "llm", callback_context.agent_name, callback_context.invocation_id, model=llm_request.model)
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        # Streaming responses call back per chunk; only the final chunk closes the span
+        if llm_response.partial:
+            return None
+        usage = llm_response.usage_metadata
+        self._end(
+            ("llm", callback_context.invocation_id, callback_context.agent_name),
+            prompt_tokens=usage.prompt_token_count if usage else None,
+            response_tokens=usage.candidates_token_count if usage else None,
+            error=None if not llm_response.error_code else Exception(llm_response.error_message or llm_response.error_code),
+        )
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> Optional[LlmResponse]:
+        self._end(("llm", callback_context.invocation_id, callback_context.agent_name), error=error)
+        return None
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext
+    ) -> Optional[Dict[str, Any]]:
+        self._start(
+            ("tool", tool_context.function_call_id), "tool", tool.name, tool_context.invocation_id,
+            agent=tool_context.agent_name,
+            args_bytes=len(json.dumps(tool_args, default=str)),
+        )
+        return None
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, result: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        failed = isinstance(result, dict) and "error" in result
+        self._end(
+            ("tool", tool_context.function_call_id),
+            error=Exception(result["error"]) if failed else None,
+            response_bytes=len(json.dumps(result, default=str)),
+        )
+        return None
+
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, error: Exception
+    ) -> Optional[Dict[str, Any]]:
+        self._end(("tool", tool_context.function_call_id), error=error)
+        return None
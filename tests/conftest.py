@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+import pytest
+from mcp import StdioServerParameters
+from stock_research_assistant.sub_agents.stock_data_agent import rate_limiter, resilience
+
+FAKE_SERVER = Path(__file__).resolve().parents[1] / "benchmarks" / "fake_polygon_server.py"
+
+
+def fake_server_params(*args: str) -> StdioServerParameters:
+    """Parameters that launch the offline fake Polygon MCP server with extra flags"""
+    return StdioServerParameters(command=sys.executable, args=[str(FAKE_SERVER), *args], env={"POLYGON_API_KEY": "fake"})
+
+
+@pytest.fixture(autouse=True)
+def offline_env(monkeypatch, tmp_path):
+    """Keep tests away from real keys, on-disk caches and the live quote stream"""
+    monkeypatch.setenv("POLYGON_API_KEY", "fake")
+    monkeypatch.setenv("POLYGON_MCP_MODE", "local")
+    monkeypatch.setenv("POLYGON_MCP_COMMAND", f"{sys.executable} {FAKE_SERVER}")
+    monkeypatch.setenv("POLYGON_BAR_CACHE", "0")
+    monkeypatch.setenv("POLYGON_BAR_CACHE_DIR", str(tmp_path / "bars"))
+    monkeypatch.setenv("POLYGON_QUOTE_STREAM", "0")
+    # Process-wide limits and breakers start fresh in every test
+    monkeypatch.setattr(rate_limiter, "_concurrency_limit", None)
+    monkeypatch.setattr(resilience, "_circuit_breakers", {})
@@ -0,0 +1,73 @@
+import asyncio
+import numpy as np
+from stock_research_assistant.sub_agents.stock_data_agent.aggregate_stream import (
+    BarBuffer,
+    collect_aggregates,
+    stream_aggregates,
+)
+from stock_research_assistant.sub_agents.stock_data_agent.bar_store import date_to_ms, parse_date
+
+HOUR_MS = 3_600_000
+
+
+def hourly_server(from_date, to_date):
+    """get_aggs stand-in whose limit counts base minute aggregates and that never sends next_url"""
+    start = date_to_ms(parse_date(from_date))
+    every_hour = list(range(start, date_to_ms(parse_date(to_date)) + 24 * HOUR_MS, HOUR_MS))
+    calls = []
+
+    async def fetch_page(ticker, multiplier, timespan, from_, to, limit):
+        lo = start if "-" in from_ else int(from_)
+        calls.append(lo)
+        hours = [t for t in every_hour if lo <= t <= int(to)][:max(1, limit // 60)]
+        return {"results": [{"t": t, "o": 1, "h": 1, "l": 1, "c": 1, "v": 1} for t in hours]}
+
+    return fetch_page, every_hour, calls
+
+
+def test_truncated_pages_are_followed_to_the_end_of_the_range():
+    fetch_page, every_hour, calls = hourly_server("2024-01-01", "2024-01-10")
+
+    async def run():
+        chunks = stream_aggregates(fetch_page, "AAPL", 1, "hour", "2024-01-01", "2024-01-10", page_limit=600)
+        return await collect_aggregates(chunks)
+
+    buffer = asyncio.run(run())
+    # Each page held 10 hourly bars, well under page_limit, yet the whole range came back
+    assert buffer.columns()["t"].tolist() == every_hour
+    # One page per ten bars, plus the empty page that ends the stream
+    assert len(calls) == len(every_hour) // 10 + 1
+
+
+def test_stream_stops_on_an_empty_page():
+    async def fetch_page(ticker, multiplier, timespan, from_, to, limit):
+        if "-" in from_:
+            return {"results": [{"t": date_to_ms(parse_date("2024-01-02")), "c": 1}]}
+        return {"results": []}
+
+    async def run():
+        return [chunk async for chunk in stream_aggregates(fetch_page, "AAPL", 1, "day", "2024-01-01", "2024-12-31")]
+
+    chunks = asyncio.run(run())
+    assert len(chunks) == 1
+
+
+def test_bar_buffer_keeps_only_the_newest_bars():
+    buffer = BarBuffer(capacity=4, max_bars=100)
+    for start in range(0, 1000, 30):
+        t = np.arange(start, min(start + 30, 1000))
+        buffer.extend({name: t.astype(dtype) for name, dtype in (("t", np.int64), ("o", float), ("h", float), ("l", float), ("c", float), ("v", float))})
+        assert buffer.capacity <= 200
+
+    assert len(buffer) == 100
+    assert buffer.dropped == 900
+    assert buffer.columns()["t"].tolist() == list(range(900, 1000))
+
+
+def test_bar_buffer_without_a_cap_keeps_everything():
+    buffer = BarBuffer(capacity=1)
+    for start in range(0, 100, 7):
+        t = np.arange(start, min(start + 7, 100))
+        buffer.extend({name: t for name in ("t", "o", "h", "l", "c", "v")})
+    assert buffer.columns()["c"].tolist() == list(range(100))
+    assert buffer.dropped == 0
@@ -0,0 +1,34 @@
+import threading
+from datetime import date, timedelta
+from stock_research_assistant.sub_agents.stock_data_agent.bar_store import BarStore, date_to_ms
+
+
+def day_bars(day: date, count: int = 50):
+    start = date_to_ms(day)
+    return [{"t": start + i * 60_000, "o": 1.0, "h": 1.0, "l": 1.0, "c": 1.0, "v": 1.0} for i in range(count)]
+
+
+def test_concurrent_writers_keep_each_others_bars(tmp_path):
+    days = [date(2024, 3, 4) + timedelta(days=i) for i in range(16)]
+    barrier = threading.Barrier(len(days))
+
+    def write(day):
+        # Each writer has its own store object, like separate processes sharing the directory
+        store = BarStore(tmp_path)
+        barrier.wait()
+        store.write("AAPL", 1, "minute", day_bars(day), day.isoformat(), day.isoformat())
+
+    threads = [threading.Thread(target=write, args=(day,)) for day in days]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store = BarStore(tmp_path)
+    first, last = days[0].isoformat(), days[-1].isoformat()
+    assert len(store.read("AAPL", 1, "minute", first, last)) == 50 * len(days)
+    assert store.missing_ranges("AAPL", 1, "minute", first, last) == []
+
+
+def test_reading_a_series_that_was_never_written(tmp_path):
+    assert BarStore(tmp_path).read("AAPL", 1, "day", "2024-01-01", "2024-01-31") == []
@@ -0,0 +1,56 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from stock_research_assistant import batch
+from stock_research_assistant.batch import BatchReportRunner, Checkpoint, ConcurrencyLimitPlugin
+from stock_research_assistant.sub_agents.stock_data_agent.rate_limiter import ConcurrencyLimit
+
+
+def model_context(session_id, agent="stock_data_agent"):
+    return SimpleNamespace(session=SimpleNamespace(id=session_id), invocation_id=f"inv-{session_id}", agent_name=agent)
+
+
+def test_release_session_returns_permits_left_by_an_interrupted_run():
+    async def run():
+        plugin = ConcurrencyLimitPlugin(llm_concurrency=2, polygon_limit=ConcurrencyLimit(1))
+        await plugin.before_model_callback(callback_context=model_context("a"), llm_request=None)
+        await plugin.before_model_callback(callback_context=model_context("b"), llm_request=None)
+        assert plugin.llm_semaphore.locked()
+
+        # Session "a" was cancelled before after_model_callback ran
+        plugin.release_session("a")
+        await asyncio.wait_for(plugin.before_model_callback(callback_context=model_context("c"), llm_request=None), 1)
+
+        await plugin.after_model_callback(callback_context=model_context("b"), llm_response=None)
+        await plugin.after_model_callback(callback_context=model_context("c"), llm_response=None)
+        # Releasing twice must not over-release the semaphore
+        plugin.release_session("b")
+        assert plugin._held == {}
+        assert not plugin.llm_semaphore.locked()
+        assert plugin.llm_semaphore._value == 2
+
+    asyncio.run(run())
+
+
+def test_timed_out_ticker_releases_its_permit_and_session(tmp_path, monkeypatch):
+    runner = BatchReportRunner(str(tmp_path), workers=1, llm_concurrency=1, polygon_concurrency=1, retries=0, ticker_timeout=0.2)
+
+    async def stuck_run(*, user_id, session_id, new_message):
+        ctx = model_context(session_id)
+        await runner.limits.before_model_callback(callback_context=ctx, llm_request=None)
+        await asyncio.sleep(3600)
+        yield None
+
+    monkeypatch.setattr(runner.runner, "run_async", stuck_run)
+
+    async def run():
+        summary = await runner.run(["AAPL", "MSFT"])
+        sessions = await runner.runner.session_service.list_sessions(app_name=batch.APP_NAME, user_id=batch.USER_ID)
+        return summary, sessions
+
+    summary, sessions = asyncio.run(run())
+    # Without the release the second ticker would wait forever for the only LLM permit
+    assert summary == {"processed": 2, "done": 0, "failed": 2}
+    assert runner.limits._held == {}
+    assert sessions.sessions == []
+    assert Checkpoint(str(tmp_path / "checkpoint.json")).tickers["MSFT"]["error"].startswith("TimeoutError")
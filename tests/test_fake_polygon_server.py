@@ -0,0 +1,31 @@
+import asyncio
+import json
+from datetime import date, timedelta
+from mcp import ClientSession
+from mcp.client.stdio import stdio_client
+from conftest import fake_server_params
+
+# Argument names of the mcp_polygon tools the fake server stands in for
+MCP_POLYGON_ARGUMENTS = {
+    "get_aggs": {"ticker", "multiplier", "timespan", "from_", "to", "adjusted", "sort", "limit", "params"},
+    "get_snapshot_ticker": {"market_type", "ticker", "params"},
+    "list_ticker_news": {"ticker", "published_utc", "limit", "sort", "order", "params"},
+    "get_grouped_daily_aggs": {"date", "adjusted", "include_otc", "locale", "market_type", "params"},
+}
+
+
+def test_tools_mirror_mcp_polygon_and_honour_raw_params():
+    since = (date.today() - timedelta(days=2)).isoformat()
+
+    async def run():
+        async with stdio_client(fake_server_params()) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                tools = (await session.list_tools()).tools
+                news = await session.call_tool("list_ticker_news", {"ticker": "AAPL", "limit": 20, "params": {"published_utc.gte": since}})
+                return tools, json.loads(news.content[0].text)
+
+    tools, news = asyncio.run(run())
+    assert {tool.name: set(tool.inputSchema["properties"]) for tool in tools} == MCP_POLYGON_ARGUMENTS
+    assert len(news["results"]) == 20
+    assert min(item["published_utc"] for item in news["results"]) >= since
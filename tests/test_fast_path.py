@@ -0,0 +1,54 @@
+import pytest
+from stock_research_assistant.fast_path import format_quote, parse_quote_request
+
+
+@pytest.mark.parametrize("text, tickers, fields", [
+    ("What's AAPL trading at?", ["AAPL"], {"price"}),
+    ("what’s the price of $tsla right now", ["TSLA"], {"price"}),
+    ("$MSFT open high low close", ["MSFT"], {"ohlc"}),
+    ("How much is NVDA up today?", ["NVDA"], {"price", "change"}),
+    ("AAPL, MSFT and GOOGL price", ["AAPL", "MSFT", "GOOGL"], {"price"}),
+    ("BRK.B quote", ["BRK.B"], {"price"}),
+    ("$F price", ["F"], {"price"}),
+    ("WHAT IS $AAPL PRICE", ["AAPL"], {"price"}),
+])
+def test_simple_lookups_are_parsed(text, tickers, fields):
+    request = parse_quote_request(text)
+    assert request is not None
+    assert request.tickers == tickers
+    assert request.fields == frozenset(fields)
+
+
+@pytest.mark.parametrize("text", [
+    "What is the market cap of AAPL at close?",
+    "Who is the CEO of AAPL at the moment?",
+    "What is the P/E ratio for AAPL at the moment?",
+    "What was the high for AMZN in Q3?",
+    "What does AAPL do and what is its price",
+    "Is AAPL at a good level?",
+    "What is the EPS of MSFT today?",
+    "AAPL price over the last 30 days",
+    "Should I buy TSLA at this price?",
+    "Give me a report on NVDA",
+    "What is F trading at?",
+    "WHAT IS AAPL PRICE",
+    "price",
+    "",
+])
+def test_anything_beyond_a_quote_goes_to_the_agent(text):
+    assert parse_quote_request(text) is None
+
+
+def test_too_many_tickers_go_to_the_agent():
+    symbols = " ".join(f"$T{chr(65 + i)}" for i in range(11))
+    assert parse_quote_request(f"{symbols} price") is None
+
+
+def test_format_quote_reports_change_and_ohlc():
+    bars = [
+        {"t": 1_700_000_000_000, "o": 99, "h": 101, "l": 98, "c": 100.0, "v": 1_000},
+        {"t": 1_700_086_400_000, "o": 100, "h": 106, "l": 99, "c": 105.0, "v": 2_500_000},
+    ]
+    line = format_quote("AAPL", bars, frozenset({"price", "change", "ohlc"}))
+    assert line.startswith("**AAPL**: $105.00, +5.00 (+5.00%) from the previous close of $100.00")
+    assert "high $106.00" in line and "volume 2.50M" in line
@@ -0,0 +1,108 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from google.adk.tools.agent_tool import AgentTool
+from stock_research_assistant import research_data
+from stock_research_assistant.research_data import ToolResultLog, record_tool_result
+from stock_research_assistant.sub_agents.report_generator_agent import incremental_report
+from stock_research_assistant.sub_agents.sentiment_agent import sentiment_agent
+from stock_research_assistant.sub_agents.report_generator_agent.incremental_report import (
+    SectionCache,
+    SectionSpec,
+    incremental_report_generator,
+)
+
+
+class FakeWriter:
+    """Section writer that records its calls instead of calling a model"""
+
+    model = "fake-model"
+
+    def __init__(self, key):
+        self.key = key
+        self.calls = 0
+
+    async def run_async(self, ctx):
+        self.calls += 1
+        ctx.session.state[self.key] = {"draft": self.calls}
+        return
+        yield
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(incremental_report, "_section_cache", SectionCache())
+    monkeypatch.setattr(research_data, "_tool_result_log", ToolResultLog())
+
+
+def run_section(state, invocation_id, tool_results, writer):
+    ctx = SimpleNamespace(session=SimpleNamespace(id="session", state=state), invocation_id=invocation_id, branch=None)
+    for args, result in tool_results:
+        tool_context = SimpleNamespace(session=ctx.session, agent_name="stock_data_agent", invocation_id=invocation_id)
+        record_tool_result(SimpleNamespace(name="get_aggs"), args, tool_context, result)
+    spec = SectionSpec("technicals", ("stock_data_agent_result",), writer)
+
+    async def run():
+        return [event async for event in incremental_report_generator._run_section(ctx, spec, {})]
+
+    return asyncio.run(run())
+
+
+def test_sections_are_keyed_on_tool_results_not_prose():
+    writer = FakeWriter("report_section_technicals")
+    bars = ({"ticker": "AAPL"}, {"results": [1, 2, 3]})
+
+    run_section({"stock_data_agent_result": "AAPL closed at 3."}, "inv-1", [bars], writer)
+    assert writer.calls == 1
+
+    # Same data, reworded answer: the cached section is reused
+    events = run_section({"stock_data_agent_result": "Apple finished the day at $3."}, "inv-2", [bars], writer)
+    assert writer.calls == 1
+    assert events[0].actions.state_delta == {"report_section_technicals": {"draft": 1}}
+
+    # New data regenerates the section
+    run_section({"stock_data_agent_result": "Apple finished the day at $3."}, "inv-3", [({"ticker": "AAPL"}, {"results": [1, 2, 4]})], writer)
+    assert writer.calls == 2
+
+
+def test_prose_is_the_key_when_no_tool_results_were_recorded():
+    writer = FakeWriter("report_section_technicals")
+    run_section({"stock_data_agent_result": "AAPL closed at 3."}, "inv-1", [], writer)
+    run_section({"stock_data_agent_result": "AAPL  closed at 3. "}, "inv-2", [], writer)
+    assert writer.calls == 1
+    run_section({"stock_data_agent_result": "AAPL closed at 4."}, "inv-3", [], writer)
+    assert writer.calls == 2
+
+
+def test_tool_result_log_only_reports_the_current_invocation():
+    log = ToolResultLog(max_entries=1)
+    log.record("s", "agent", "inv-1", ["get_aggs", {}], {"results": []})
+    assert log.fingerprint("s", "agent", "inv-1") is not None
+    assert log.fingerprint("s", "agent", "inv-2") is None
+    log.record("t", "agent", "inv-1", ["get_aggs", {}], {"results": []})
+    assert log.fingerprint("s", "agent", "inv-1") is None
+
+
+def test_web_search_results_reach_the_sentiment_key():
+    search = next(tool for tool in sentiment_agent.tools if isinstance(tool, AgentTool))
+    writer = FakeWriter("report_section_sentiment")
+    spec = SectionSpec("sentiment", ("sentiment_agent_result",), writer)
+    scores = {"AAPL": {"score": 0.4}}
+
+    def run(invocation_id, search_result):
+        ctx = SimpleNamespace(session=SimpleNamespace(id="session", state={"sentiment_agent_result": "Upbeat."}), invocation_id=invocation_id, branch=None)
+        tool_context = SimpleNamespace(session=ctx.session, agent_name=sentiment_agent.name, invocation_id=invocation_id)
+        record_tool_result(SimpleNamespace(name="score_news_sentiment"), {"tickers": ["AAPL"]}, tool_context, scores)
+        record_tool_result(search, {"request": "AAPL"}, tool_context, search_result)
+
+        async def go():
+            return [event async for event in incremental_report_generator._run_section(ctx, spec, {})]
+
+        asyncio.run(go())
+
+    run("inv-1", "Analysts are positive.")
+    run("inv-2", "Analysts are positive.")
+    assert writer.calls == 1
+    # Same news scores, but the search turned up a downgrade
+    run("inv-3", "Two analysts downgraded the stock.")
+    assert writer.calls == 2
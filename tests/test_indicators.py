@@ -0,0 +1,68 @@
+import math
+import numpy as np
+import pytest
+from benchmarks.bench_indicators import naive_all, naive_ema, naive_rsi, synthetic_closes
+from stock_research_assistant.sub_agents.stock_data_agent import indicators
+
+
+@pytest.fixture
+def closes():
+    return synthetic_closes(tickers=4, bars=300)
+
+
+def test_vectorized_matches_naive_loops(closes):
+    for row in closes:
+        naive = naive_all(row.tolist())
+        assert np.allclose(naive["sma_20"], indicators.sma(row, 20), equal_nan=True)
+        assert np.allclose(naive["sma_50"], indicators.sma(row, 50), equal_nan=True)
+        assert np.allclose(naive["ema_12"], indicators.ema(row, 12), equal_nan=True)
+        assert np.allclose(naive["rsi_14"], indicators.rsi(row, 14), equal_nan=True)
+        bands = indicators.bollinger_bands(row)
+        assert np.allclose(naive["bollinger"][0], bands["upper"], equal_nan=True)
+        assert np.allclose(naive["bollinger"][1], bands["lower"], equal_nan=True)
+
+
+def test_matrix_rows_match_single_series(closes):
+    batch = indicators.compute_indicators({"o": closes, "h": closes * 1.01, "l": closes * 0.99, "c": closes, "v": np.ones_like(closes)})
+    for i, row in enumerate(closes):
+        single = indicators.compute_indicators({"o": row, "h": row * 1.01, "l": row * 0.99, "c": row, "v": np.ones_like(row)})
+        for name, values in single.items():
+            assert np.allclose(batch[name][i], values, equal_nan=True), name
+
+
+def test_long_ema_does_not_overflow():
+    # Wilder smoothing over thousands of bars exercises the blocked closed form
+    values = synthetic_closes(tickers=1, bars=5000)[0]
+    fast = indicators.ema(values, span=200, alpha=1.0 / 200)
+    slow = naive_ema(values.tolist(), 200, 1.0 / 200)
+    assert np.all(np.isfinite(fast[199:]))
+    assert np.allclose(fast, slow, equal_nan=True)
+
+
+def test_short_history_is_nan():
+    values = np.arange(10.0)
+    assert np.isnan(indicators.sma(values, 20)).all()
+    assert np.isnan(indicators.ema(values, 12)).all()
+    assert np.isnan(indicators.rsi(values, 14)).all()
+
+
+def test_rsi_without_losses_is_100():
+    values = np.arange(1.0, 40.0)
+    assert indicators.rsi(values, 14)[-1] == 100.0
+    assert math.isclose(naive_rsi(values.tolist(), 14)[-1], 100.0)
+
+
+def test_summary_groups_by_length_and_flags_short_series():
+    long = synthetic_closes(tickers=2, bars=250)
+    series = {
+        "AAA": indicators.bars_to_columns([{"o": c, "h": c, "l": c, "c": c, "v": 100} for c in long[0]]),
+        "BBB": indicators.bars_to_columns([{"o": c, "h": c, "l": c, "c": c, "v": 100} for c in long[1][:120]]),
+        "CCC": indicators.bars_to_columns([{"o": 1, "h": 1, "l": 1, "c": 1, "v": 1}]),
+    }
+    summary = indicators.summarize_indicator_batch(series)
+
+    assert summary["AAA"]["bars"] == 250
+    assert summary["AAA"]["indicators"]["sma_200"] is not None
+    assert summary["BBB"]["indicators"]["sma_200"] is None
+    assert summary["BBB"]["close"] == pytest.approx(long[1][119])
+    assert "error" in summary["CCC"]
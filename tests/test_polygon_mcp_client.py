@@ -0,0 +1,92 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from mcp.types import CallToolResult, TextContent
+from stock_research_assistant.sub_agents.stock_data_agent import polygon_mcp_client
+from stock_research_assistant.sub_agents.stock_data_agent.bar_store import BarStore, date_to_ms, parse_date
+from stock_research_assistant.sub_agents.stock_data_agent.polygon_mcp_client import PolygonMCPClient, StockDataService
+from stock_research_assistant.sub_agents.stock_data_agent.rate_limiter import TokenBucket
+
+
+class RecordingClient:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    async def call_tool_safe(self, tool_name, arguments):
+        self.calls.append((tool_name, arguments))
+        return {"results": self.results}
+
+
+def test_news_window_is_sent_as_a_raw_query_parameter(monkeypatch):
+    since = (datetime.now() - timedelta(days=3)).strftime("%Y-%m-%d")
+    old = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%dT00:00:00Z")
+    recorder = RecordingClient([{"title": "new", "published_utc": f"{since}T12:00:00Z"}, {"title": "old", "published_utc": old}])
+    service = StockDataService("fake", rate_limiter=TokenBucket(0))
+
+    @asynccontextmanager
+    async def client():
+        yield recorder
+
+    monkeypatch.setattr(service, "client", client)
+    news = asyncio.run(service.get_news_batch(["AAPL"], days=3, limit=5))
+    assert recorder.calls == [("list_ticker_news", {"ticker": "AAPL", "limit": 5, "params": {"published_utc.gte": since}})]
+    assert [item["title"] for item in news["results"]["AAPL"]] == ["new"]
+
+
+def test_missing_ranges_are_paged_to_the_end_before_they_count_as_covered(tmp_path, monkeypatch):
+    start = date_to_ms(parse_date("2024-01-02"))
+    every_hour = list(range(start, date_to_ms(parse_date("2024-01-06")), 3_600_000))
+    calls = []
+
+    async def fetch_page(ticker, multiplier, timespan, from_, to, limit):
+        lo = start if "-" in from_ else int(from_)
+        calls.append(lo)
+        # Ten bars per page, however large the requested limit
+        return {"results": [{"t": t, "c": 1.0} for t in every_hour if lo <= t <= int(to)][:10]}
+
+    client = PolygonMCPClient("fake", bar_store=BarStore(tmp_path))
+    monkeypatch.setattr(client, "_fetch_aggregates", fetch_page)
+
+    first = asyncio.run(client.get_aggregates("AAPL", 1, "hour", "2024-01-02", "2024-01-05", limit=0))
+    assert [bar["t"] for bar in first["results"]] == every_hour
+    # Ten pages of bars, then the empty page that ends the range
+    assert len(calls) == 11
+
+    again = asyncio.run(client.get_aggregates("AAPL", 1, "hour", "2024-01-02", "2024-01-05", limit=0))
+    assert again["fetched_ranges"] == []
+    assert len(again["results"]) == len(every_hour)
+
+
+class CountingBucket(TokenBucket):
+    def __init__(self):
+        super().__init__(0)
+        self.charged = 0
+
+    async def acquire(self, tokens=1.0):
+        self.charged += tokens
+
+
+def test_tokens_are_charged_per_request_not_per_checkout(tmp_path, monkeypatch):
+    requests = []
+
+    async def fake_resilient_call(tool_name, arguments, checkout, policy):
+        requests.append(arguments["from_"])
+        start = date_to_ms(parse_date("2024-01-02"))
+        bars = [{"t": start + day * 86_400_000, "c": 1.0} for day in range(3)]
+        lo = start if "-" in arguments["from_"] else int(arguments["from_"])
+        page = [bar for bar in bars if bar["t"] >= lo]
+        return CallToolResult(content=[TextContent(type="text", text=json.dumps({"results": page}))])
+
+    monkeypatch.setattr(polygon_mcp_client, "resilient_call", fake_resilient_call)
+    bucket = CountingBucket()
+    client = PolygonMCPClient("fake", bar_store=BarStore(tmp_path), rate_limiter=bucket)
+
+    asyncio.run(client.get_aggregates("AAPL", 1, "day", "2024-01-02", "2024-01-04"))
+    # One page of bars and the empty page after it
+    assert bucket.charged == len(requests) == 2
+
+    # Served from the bar store: no request, no token
+    asyncio.run(client.get_aggregates("AAPL", 1, "day", "2024-01-02", "2024-01-04"))
+    assert bucket.charged == len(requests) == 2
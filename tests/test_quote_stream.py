@@ -0,0 +1,55 @@
+import asyncio
+import json
+import math
+from websockets.asyncio.server import serve
+from stock_research_assistant.sub_agents.stock_data_agent.quote_stream import QuoteFeed, SnapshotTable
+
+T = 1_700_000_000_000
+
+
+def test_malformed_events_are_skipped_without_losing_the_rest():
+    table = SnapshotTable()
+    applied = table.apply([
+        {"ev": "T", "sym": "AAPL", "s": 10, "t": T},
+        {"ev": "Q", "sym": "AAPL", "bp": "not a price", "t": T},
+        {"ev": "AM", "sym": "MSFT", "h": "high", "t": T},
+        "not an event",
+        {"ev": "T", "sym": "AAPL", "p": 101.5, "s": 10, "t": T},
+    ])
+    assert applied == 1
+    assert table.rejected == 4
+    assert "MSFT" not in table
+    snapshot = table.get("AAPL")
+    assert snapshot["price"] == 101.5
+    assert table.seq("AAPL") == 1
+
+
+def test_feed_survives_a_malformed_message():
+    async def handler(ws):
+        await ws.send(json.dumps([{"ev": "status", "status": "connected"}]))
+        await ws.recv()
+        await ws.send(json.dumps([{"ev": "status", "status": "auth_success"}]))
+        await ws.send("{not json")
+        await ws.send(json.dumps([{"ev": "T", "sym": "AAPL", "t": T}]))
+        await ws.send(json.dumps({"ev": "T", "sym": "AAPL", "p": 99.0, "s": 5, "t": T}))
+        await ws.wait_closed()
+
+    async def run():
+        async with serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            feed = QuoteFeed("fake", url=f"ws://127.0.0.1:{port}", reconnect_delay=60)
+            task = asyncio.create_task(feed._run())
+            try:
+                for _ in range(100):
+                    if feed.table.get("AAPL"):
+                        break
+                    await asyncio.sleep(0.02)
+                return feed, task.done()
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    feed, stopped = asyncio.run(run())
+    assert not stopped
+    assert feed.table.get("AAPL")["price"] == 99.0
+    assert feed.table.rejected == 1
@@ -0,0 +1,40 @@
+import asyncio
+import time
+import pytest
+from stock_research_assistant.sub_agents.stock_data_agent.rate_limiter import ConcurrencyLimit, TokenBucket
+
+
+def test_cancelled_waiter_hands_its_tokens_back():
+    async def run():
+        bucket = TokenBucket(rate=10, capacity=1)
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire(5))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # Without the refund the next request would wait out the cancelled one's half second
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) < 0.2
+
+
+def test_concurrency_limit_caps_slots():
+    async def run():
+        limit = ConcurrencyLimit(2)
+        active = peak = 0
+
+        async def request():
+            nonlocal active, peak
+            async with limit.slot():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(request() for _ in range(6)))
+        return peak
+
+    assert asyncio.run(run()) == 2
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+import pytest
+from mcp.types import CallToolResult, TextContent
+from conftest import fake_server_params
+from stock_research_assistant.sub_agents.stock_data_agent import resilience
+from stock_research_assistant.sub_agents.stock_data_agent.polygon_mcp_client import StockDataService
+from stock_research_assistant.sub_agents.stock_data_agent.rate_limiter import TokenBucket
+from stock_research_assistant.sub_agents.stock_data_agent.resilience import (
+    CallPolicy,
+    CircuitBreaker,
+    CircuitOpenError,
+    TransientToolError,
+    resilient_call,
+)
+from stock_research_assistant.sub_agents.stock_data_agent.session_pool import PolygonSessionPool
+
+FAST = CallPolicy(timeout=0.5, retries=2, backoff=0.01)
+
+
+class FakeSession:
+    """Stands in for a ClientSession, answering from a scripted list of outcomes"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def call_tool(self, name, arguments=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if outcome == "hang":
+            await asyncio.sleep(3600)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return CallToolResult(content=[TextContent(type="text", text=outcome)], isError=outcome.startswith("Error"))
+
+
+class FakePooled:
+    def __init__(self, session):
+        self.session = session
+        self.broken = None
+
+    def mark_broken(self, reason):
+        self.broken = reason
+
+
+def checkout_for(*sessions):
+    """Checkout handing attempt i the i-th session, and recording which were used"""
+    used = []
+
+    @asynccontextmanager
+    async def checkout(index):
+        used.append(index)
+        yield sessions[min(index, len(sessions) - 1)]
+
+    return checkout, used
+
+
+def test_transient_errors_are_retried_on_fresh_sessions():
+    first = FakePooled(FakeSession(["Error: 429 Too Many Requests"]))
+    second = FakePooled(FakeSession(["ok"]))
+    checkout, used = checkout_for(first, second)
+    result = asyncio.run(resilient_call("get_aggs", {}, checkout, FAST, CircuitBreaker("get_aggs")))
+    assert result.content[0].text == "ok"
+    assert used == [0, 1]
+
+
+def test_timeout_marks_session_broken_and_retries():
+    hung = FakePooled(FakeSession(["hang"]))
+    healthy = FakePooled(FakeSession(["ok"]))
+    checkout, _ = checkout_for(hung, healthy)
+    result = asyncio.run(resilient_call("get_aggs", {}, checkout, FAST, CircuitBreaker("get_aggs")))
+    assert result.content[0].text == "ok"
+    assert hung.broken is not None
+    assert healthy.broken is None
+
+
+def test_checkout_wait_counts_toward_the_deadline():
+    @asynccontextmanager
+    async def starved(index):
+        await asyncio.sleep(3600)
+        yield None
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(resilient_call("get_aggs", {}, starved, FAST, CircuitBreaker("get_aggs")))
+    assert time.monotonic() - started < 3 * FAST.timeout + 1
+
+
+def test_non_idempotent_tools_are_not_retried():
+    session = FakeSession(["Error: 503 unavailable", "ok"])
+    checkout, used = checkout_for(FakePooled(session))
+    with pytest.raises(TransientToolError):
+        asyncio.run(resilient_call("create_order", {}, checkout, FAST, CircuitBreaker("create_order")))
+    assert used == [0]
+
+
+def test_bad_requests_do_not_count_against_the_circuit():
+    breaker = CircuitBreaker("get_aggs", failure_threshold=1)
+    checkout, used = checkout_for(FakePooled(FakeSession([ValueError("bad ticker")])))
+    with pytest.raises(ValueError):
+        asyncio.run(resilient_call("get_aggs", {}, checkout, FAST, breaker))
+    assert used == [0]
+    assert breaker.state == "closed"
+
+
+def test_circuit_opens_after_failed_calls_and_recovers_through_one_trial():
+    breaker = CircuitBreaker("get_aggs", failure_threshold=2, reset_timeout=0.2)
+    policy = FAST._replace(retries=0)
+    failing = FakePooled(FakeSession([ConnectionResetError()] * 2))
+    checkout, _ = checkout_for(failing)
+    for _ in range(2):
+        with pytest.raises(ConnectionResetError):
+            asyncio.run(resilient_call("get_aggs", {}, checkout, policy, breaker))
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(resilient_call("get_aggs", {}, checkout, policy, breaker))
+
+    time.sleep(0.25)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_hedge_returns_the_faster_answer():
+    slow = FakePooled(FakeSession(["hang"]))
+    fast = FakePooled(FakeSession(["ok"]))
+    checkout, used = checkout_for(slow, fast)
+    policy = FAST._replace(timeout=5.0, hedge_after=0.05)
+    started = time.monotonic()
+    result = asyncio.run(resilient_call("get_aggs", {}, checkout, policy, CircuitBreaker("get_aggs")))
+    assert result.content[0].text == "ok"
+    assert used == [0, 1]
+    assert time.monotonic() - started < 1.0
+
+
+def test_hung_pool_fails_within_the_deadline(monkeypatch):
+    # Every call hangs and the pool holds a single session: the retry must
+    # open a replacement for the broken session rather than wait for it
+    monkeypatch.setattr(resilience, "_call_policy", CallPolicy(timeout=1.0, retries=1, backoff=0.01))
+
+    async def run():
+        pool = PolygonSessionPool(fake_server_params("--hang-rate", "1.0"), size=1, max_size=1)
+        service = StockDataService("fake", pool=pool, rate_limiter=TokenBucket(0))
+        try:
+            await service.warm_up()
+            started = time.monotonic()
+            quote = await asyncio.wait_for(service.get_stock_quote("AAPL"), 15)
+            return quote, time.monotonic() - started
+        finally:
+            await pool.close()
+
+    quote, elapsed = asyncio.run(run())
+    assert "error" in quote
+    assert elapsed < 5
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from stock_research_assistant.sub_agents.stock_data_agent.response_cache import ResponseCache
+
+
+def counting_call(delay=0.0, result=None):
+    calls = []
+
+    async def call(tool_name, arguments):
+        calls.append(arguments)
+        await asyncio.sleep(delay)
+        return result if result is not None else {"ticker": arguments["ticker"], "n": len(calls)}
+
+    return call, calls
+
+
+def test_identical_calls_are_coalesced_and_cached():
+    cache = ResponseCache()
+    call, calls = counting_call(delay=0.05)
+
+    async def run():
+        first = await asyncio.gather(*(cache.get_or_call("get_snapshot_ticker", {"ticker": "aapl"}, call) for _ in range(5)))
+        again = await cache.get_or_call("get_snapshot_ticker", {"ticker": "AAPL", "extra": None}, call)
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(value == first[0] for value in first) and again == first[0]
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 4, 1)
+
+
+def test_error_responses_are_not_cached():
+    cache = ResponseCache()
+    call, calls = counting_call(result={"error": "429"})
+
+    async def run():
+        for _ in range(2):
+            await cache.get_or_call("get_aggs", {"ticker": "AAPL"}, call)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_exceptions_reach_every_joined_caller():
+    cache = ResponseCache()
+
+    async def failing(tool_name, arguments):
+        await asyncio.sleep(0.05)
+        raise ConnectionResetError("gone")
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_call("get_aggs", {"ticker": "AAPL"}, failing) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ConnectionResetError) for result in results)
+    assert cache._in_flight == {}
+
+
+def test_cancelling_the_first_caller_does_not_cancel_the_others():
+    cache = ResponseCache()
+    call, calls = counting_call(delay=0.05)
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_call("get_aggs", {"ticker": "AAPL"}, call))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(cache.get_or_call("get_aggs", {"ticker": "AAPL"}, call)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    results = asyncio.run(run())
+    # One follower made the call again and the rest joined it
+    assert len(calls) == 2
+    assert all(result == {"ticker": "AAPL", "n": 2} for result in results)
+    assert cache._in_flight == {}
+
+
+def test_entries_expire_and_the_oldest_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1, ttl=10)
+    cache.put("b", 2, ttl=10)
+    cache.get("a")
+    cache.put("c", 3, ttl=10)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    now[0] += 11
+    assert cache.get("c") == (False, None)
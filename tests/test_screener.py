@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from stock_research_assistant.sub_agents.stock_data_agent.screener import MarketTable
+
+# Tickers without history, like new listings, must not make numpy warn
+pytestmark = pytest.mark.filterwarnings("error::RuntimeWarning")
+
+
+@pytest.fixture
+def table():
+    days = {
+        "2024-01-02": [{"T": "AAPL", "c": 100.0, "v": 1e6}, {"T": "MSFT", "c": 300.0, "v": 2e6}],
+        "2024-01-03": [{"T": "AAPL", "c": 110.0, "v": 1e6}, {"T": "MSFT", "c": 290.0, "v": 3e6}, {"T": "F", "c": 12.0, "v": 5e6}],
+    }
+    return MarketTable.from_grouped_days(days)
+
+
+def tickers(table, filters, **kwargs):
+    return [row["ticker"] for row in table.query(filters, **kwargs)["results"]]
+
+
+def test_filters_compare_against_numbers_and_fields(table):
+    assert tickers(table, [{"field": "close", "op": ">", "value": 50}], sort_by="close") == ["MSFT", "AAPL"]
+    assert tickers(table, [{"field": "close", "op": ">", "value": "100.5"}, {"field": "change_pct", "op": ">", "value": 0}]) == ["AAPL"]
+    assert tickers(table, [{"field": "close", "op": "between", "value": [10, 200]}], sort_by="close") == ["AAPL", "F"]
+    assert tickers(table, [{"field": "high", "op": "<", "value": "close"}]) == []
+    assert tickers(table, [{"any": [{"field": "ticker", "op": "in", "value": "f"}, {"field": "volume", "op": ">=", "value": 3e6}]}], sort_by="volume") == ["F", "MSFT"]
+
+
+@pytest.mark.parametrize("condition", [
+    {"field": "close", "op": ">", "value": "abc"},
+    {"field": "close", "op": ">", "value": None},
+    {"field": "close", "op": "<", "value": [1, 2]},
+    {"field": "close", "op": "between", "value": 5},
+    {"field": "close", "op": "between", "value": [1, "x"]},
+    {"field": "close", "op": "like", "value": 5},
+    {"field": "ticker", "op": "in", "value": 7},
+    {"field": "nope", "op": ">", "value": 1},
+    "close > 5",
+])
+def test_bad_filters_raise_value_error(table, condition):
+    with pytest.raises(ValueError):
+        table.query([condition])
+
+
+def test_volume_statistics_match_numpy_and_are_nan_without_history():
+    volumes = [1e6, 3e6, 2e6, 6e6]
+    days = {f"2024-01-0{i + 2}": [{"T": "AAPL", "c": 100.0, "v": v}] for i, v in enumerate(volumes)}
+    days["2024-01-05"].append({"T": "NEWCO", "c": 10.0, "v": 5e5})
+    table = MarketTable.from_grouped_days(days)
+
+    aapl, newco = table.index["AAPL"], table.index["NEWCO"]
+    prior = np.array(volumes[:-1])
+    assert table.columns["avg_volume_20"][aapl] == pytest.approx(prior.mean())
+    assert table.columns["volume_zscore"][aapl] == pytest.approx((volumes[-1] - prior.mean()) / prior.std())
+    assert np.isnan(table.columns["avg_volume_20"][newco])
+    assert np.isnan(table.columns["relative_volume"][newco])
@@ -0,0 +1,64 @@
+import asyncio
+import time
+from conftest import fake_server_params
+from stock_research_assistant.sub_agents.stock_data_agent import session_pool
+from stock_research_assistant.sub_agents.stock_data_agent.session_pool import PolygonSessionPool, get_session_pool
+
+
+def test_pool_from_an_abandoned_loop_is_closed(monkeypatch):
+    monkeypatch.setattr(session_pool, "_session_pool", None)
+    params = fake_server_params()
+    old_loop = asyncio.new_event_loop()
+
+    async def first():
+        pool = get_session_pool(params)
+        await pool.start()
+        return pool
+
+    try:
+        old = old_loop.run_until_complete(first())
+        sessions = list(old._sessions)
+        assert sessions and all(s.alive for s in sessions)
+
+        async def second():
+            pool = get_session_pool(params)
+            try:
+                assert pool is not old
+                deadline = time.monotonic() + 15
+                while not all(s._task.done() for s in sessions) and time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+            finally:
+                await pool.close()
+
+        asyncio.run(second())
+        assert old._closed
+        assert all(s._task.done() for s in sessions)
+    finally:
+        old_loop.close()
+
+
+def test_health_checks_survive_a_failed_pass():
+    async def run():
+        pool = PolygonSessionPool(fake_server_params(), size=1, health_check_interval=0.05)
+        await pool.start()
+        pooled = pool._sessions[0]
+        pings = []
+        real_ping = pooled.ping
+
+        async def flaky_ping(timeout=10.0):
+            pings.append(timeout)
+            if len(pings) == 1:
+                raise RuntimeError("health check blew up")
+            return await real_ping(timeout)
+
+        pooled.ping = flaky_ping
+        try:
+            await asyncio.sleep(0.5)
+            # The loop kept going and the session stayed in the pool
+            assert not pool._reaper.done()
+            assert len(pings) > 1
+            assert pool._idle.qsize() == 1
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
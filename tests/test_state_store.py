@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import AsyncGenerator
+import pytest
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+from stock_research_assistant import state_store
+from stock_research_assistant.state_store import BlobStore, StateOffloadPlugin, is_blob_ref, resolve_state_value
+
+LARGE = "x" * 10_000
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("STATE_BLOB_PATH", str(tmp_path / "blobs.sqlite3"))
+    monkeypatch.setattr(state_store, "_blob_store", None)
+    return state_store.get_blob_store()
+
+
+class WritesLargeOutput(BaseAgent):
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            actions=EventActions(state_delta={"stock_data_agent_result": LARGE, "small": "kept"}),
+        )
+
+
+def test_plugin_offloads_before_the_event_is_stored(store):
+    async def run():
+        runner = InMemoryRunner(agent=WritesLargeOutput(name="writer"), app_name="test", plugins=[StateOffloadPlugin()])
+        session = await runner.session_service.create_session(app_name="test", user_id="u")
+        message = types.Content(role="user", parts=[types.Part(text="go")])
+        async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+            pass
+        return await runner.session_service.get_session(app_name="test", user_id="u", session_id=session.id)
+
+    session = asyncio.run(run())
+    value = session.state["stock_data_agent_result"]
+    assert is_blob_ref(value)
+    assert session.state["small"] == "kept"
+    # Neither the state nor any stored event carries the full value
+    assert all(LARGE not in str(event.actions.state_delta) for event in session.events)
+    assert resolve_state_value(value) == LARGE
+
+
+def test_session_cap_evicts_least_recently_used(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite3"), session_cap=25_000)
+    first = store.put("s", "a" * 10_000)
+    second = store.put("s", "b" * 10_000)
+    store.get(first)
+    store.put("s", "c" * 10_000)
+    assert store.get(first) is not None
+    assert store.get(second) is None
+
+
+def test_ttl_and_store_cap_expire_values_across_sessions(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite3"), store_cap=25_000, ttl=0.2)
+    old = store.put("abandoned", "a" * 10_000)
+    time.sleep(0.3)
+    kept = [store.put(f"s{i}", chr(98 + i) * 10_000) for i in range(3)]
+    store.expire()
+    assert store.get(old) is None
+    assert store.get(kept[0]) is None
+    assert store.get(kept[2]) is not None
+    assert store.stats()["bytes"] <= 25_000
+
+
+def test_shared_blobs_survive_until_every_session_drops_them(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite3"))
+    ref = store.put("a", LARGE)
+    store.put("b", LARGE)
+    store.drop_session("a")
+    assert store.get(ref) == LARGE
+    store.drop_session("b")
+    assert store.get(ref) is None
@@ -0,0 +1,32 @@
+import urllib.request
+from stock_research_assistant import telemetry
+from stock_research_assistant.telemetry import Telemetry
+
+
+def test_metrics_are_served_on_loopback_by_default():
+    recorder = Telemetry()
+    with recorder.span("tool", "get_aggs"):
+        pass
+    server = recorder.serve_metrics(0)
+    try:
+        host, port = server.server_address[:2]
+        assert host == "127.0.0.1"
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+        assert "get_aggs" in body
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_exposing_metrics_is_opt_in(monkeypatch):
+    bound = []
+    monkeypatch.setattr(Telemetry, "serve_metrics", lambda self, port, host="127.0.0.1": bound.append((port, host)))
+    monkeypatch.setenv("TELEMETRY_METRICS_PORT", "9464")
+
+    monkeypatch.setattr(telemetry, "_telemetry", None)
+    telemetry.get_telemetry()
+    monkeypatch.setenv("TELEMETRY_METRICS_HOST", "0.0.0.0")
+    monkeypatch.setattr(telemetry, "_telemetry", None)
+    telemetry.get_telemetry()
+
+    assert bound == [(9464, "127.0.0.1"), (9464, "0.0.0.0")]